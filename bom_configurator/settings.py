@@ -68,6 +68,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "configurator.services.catalog.CatalogVersionMiddleware",
 ]
 
 ROOT_URLCONF = "bom_configurator.urls"
@@ -99,6 +100,25 @@ DATABASES = {
         conn_max_age=600,
     )
 }
+# SQLite tests use a file database: the default in-memory one fails with
+# "table is locked" instead of waiting, which breaks the concurrency tests
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["TEST"] = {"NAME": (BASE_DIR / "test_db.sqlite3").as_posix()}
+
+# Cache for computed BOMs. In-process LRU by default; to share it between
+# workers point it at a file directory or Redis, e.g.
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# DJANGO_CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHE_BACKEND = os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "bom-configurator"),
+        "TIMEOUT": int(os.environ.get("DJANGO_CACHE_TIMEOUT", "3600")),
+    }
+}
+if "redis" not in CACHE_BACKEND.lower():
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.environ.get("DJANGO_CACHE_MAX_ENTRIES", "5000"))}
 
 
 # Password validation
@@ -154,6 +174,8 @@ STORAGES = {
 # To regenerate: python convert_excel_to_csv.py
 # To reload into DB: python manage.py import_csv_data --force
 CSV_FILES_DIR = BASE_DIR / "csv_files"
+# To load the sheets directly: python manage.py import_csv_data --excel
+MAIN_EXCEL_FILE = BASE_DIR / "main excel" / "main.xlsx"
 
 # Language and Localization
 LANGUAGE_CODE = "de-de"
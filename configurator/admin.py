@@ -1,10 +1,10 @@
 from django.contrib import admin
 from .models import (
-    CSVDataSource, Schacht, HVB, Sondengroesse, Sondenabstand, SondenDurchmesser, SondenDurchmesserPipe,
+    CSVDataSource, CatalogVersion, Article, Schacht, HVB, Sondengroesse, Sondenabstand, SondenDurchmesser, SondenDurchmesserPipe,
     Kugelhahn, DFM, Entlueftung, Sondenverschlusskappe,
     StumpfschweissEndkappe, WPVerschlusskappe, WPA, Verrohrung,
     Schachtgrenze, Schachtkompatibilitaet, BOMConfiguration,
-    BOMItem, GNXChamberArticle, GNXChamberConfiguration
+    BOMItem, GNXChamberArticle, GNXChamberConfiguration, ChildArticleCounter
 )
 
 
@@ -15,6 +15,20 @@ class CSVDataSourceAdmin(admin.ModelAdmin):
     search_fields = ['name', 'file_path']
 
 
+@admin.register(CatalogVersion)
+class CatalogVersionAdmin(admin.ModelAdmin):
+    list_display = ['version', 'updated_at']
+    readonly_fields = ['version', 'updated_at']
+
+
+@admin.register(Article)
+class ArticleAdmin(admin.ModelAdmin):
+    list_display = ['artikelnummer', 'artikelbezeichnung', 'source_tables']
+    search_fields = ['artikelnummer', 'artikelbezeichnung']
+    # Rebuilt from the component tables by the CSV import
+    readonly_fields = ['artikelnummer', 'artikelbezeichnung', 'source_tables']
+
+
 @admin.register(Schacht)
 class SchachtAdmin(admin.ModelAdmin):
     list_display = ['schachttyp', 'artikelnummer', 'artikelbezeichnung', 'menge_statisch']
@@ -123,6 +137,7 @@ class SchachtkompatibilitaetAdmin(admin.ModelAdmin):
 class BOMItemInline(admin.TabularInline):
     model = BOMItem
     extra = 0
+    ordering = ['position', 'id']
     readonly_fields = ['calculated_quantity']
 
 
@@ -179,4 +194,10 @@ class GNXChamberArticleAdmin(admin.ModelAdmin):
 class GNXChamberConfigurationAdmin(admin.ModelAdmin):
     list_display = ['bom_configuration', 'gnx_article', 'custom_quantity']
     search_fields = ['bom_configuration__name', 'gnx_article__artikelnummer']
-    list_filter = ['gnx_article__hvb_size_min', 'gnx_article__hvb_size_max']
\ No newline at end of file
+    list_filter = ['gnx_article__hvb_size_min', 'gnx_article__hvb_size_max']
+
+
+@admin.register(ChildArticleCounter)
+class ChildArticleCounterAdmin(admin.ModelAdmin):
+    list_display = ['mother_article_number', 'last_child_number']
+    search_fields = ['mother_article_number']
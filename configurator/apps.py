@@ -8,8 +8,11 @@ class ConfiguratorConfig(AppConfig):
     name = "configurator"
 
     def ready(self):
-        """Run seeding commands after migrations"""
+        """Run seeding commands after migrations and track catalog changes"""
+        from .signals import connect_catalog_signals
+
         post_migrate.connect(self.run_seeding, sender=self)
+        connect_catalog_signals()
 
     def run_seeding(self, sender, **kwargs):
         """Run all seeding commands after migrations"""
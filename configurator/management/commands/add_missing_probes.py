@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from configurator.models import Sondengroesse
+from configurator.services.catalog import catalog_update
 
 
 class Command(BaseCommand):
@@ -40,18 +42,19 @@ class Command(BaseCommand):
         ]
 
         count = 0
-        for probe_data in additional_probes:
-            # Check if combination already exists
-            existing = Sondengroesse.objects.filter(
-                durchmesser_sonde=probe_data['durchmesser_sonde'],
-                schachttyp=probe_data['schachttyp'],
-                hvb=probe_data['hvb']
-            ).first()
+        with transaction.atomic(), catalog_update():
+            for probe_data in additional_probes:
+                # Check if combination already exists
+                existing = Sondengroesse.objects.filter(
+                    durchmesser_sonde=probe_data['durchmesser_sonde'],
+                    schachttyp=probe_data['schachttyp'],
+                    hvb=probe_data['hvb']
+                ).first()
             
-            if not existing:
-                Sondengroesse.objects.create(**probe_data)
-                count += 1
-                self.stdout.write(f'Added: {probe_data["schachttyp"]} + {probe_data["hvb"]}mm HVB + {probe_data["durchmesser_sonde"]}mm probe')
+                if not existing:
+                    Sondengroesse.objects.create(**probe_data)
+                    count += 1
+                    self.stdout.write(f'Added: {probe_data["schachttyp"]} + {probe_data["hvb"]}mm HVB + {probe_data["durchmesser_sonde"]}mm probe')
 
         self.stdout.write(
             self.style.SUCCESS(f'Successfully added {count} new probe combinations!')
@@ -0,0 +1,65 @@
+"""
+Store the display order of existing BOM items in ``BOMItem.position``.
+Usage: python manage.py backfill_bom_positions [--all] [--chunk-size 500]
+
+New BOMs get their positions when they are generated. Items saved before
+that (or added by hand) have none, so their configurations are sorted again
+on every view and export. This command sorts them once, the same way as at
+generation time, and saves the positions.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from configurator.models import BOMConfiguration, BOMItem
+from configurator.services.bom_generation import assign_positions
+from configurator.services.csv_reader import batched
+
+
+class Command(BaseCommand):
+    help = 'Store the display order of existing BOM items (BOMItem.position)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute the positions of all configurations, not only those with unpositioned items',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Configurations per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        configurations = BOMConfiguration.objects.order_by('id')
+        if not options['all']:
+            configurations = configurations.filter(
+                id__in=BOMItem.objects.filter(position__isnull=True).values('configuration_id')
+            )
+
+        config_count = item_count = 0
+        rows = configurations.values_list('id', 'schachttyp').iterator()
+        for chunk in batched(rows, max(options['chunk_size'], 1)):
+            schachttypen = dict(chunk)
+            items_by_config = {}
+            with transaction.atomic():
+                items = (
+                    BOMItem.objects
+                    .filter(configuration_id__in=schachttypen)
+                    .only('configuration_id', 'artikelnummer', 'artikelbezeichnung', 'source_table', 'position')
+                    .order_by('configuration_id', 'id')
+                )
+                for item in items:
+                    items_by_config.setdefault(item.configuration_id, []).append(item)
+                for config_id, config_items in items_by_config.items():
+                    assign_positions(config_items, schachttypen[config_id])
+                updated = [item for config_items in items_by_config.values() for item in config_items]
+                BOMItem.objects.bulk_update(updated, ['position'], batch_size=500)
+            item_count += len(updated)
+            config_count += len(chunk)
+            self.stdout.write(f'{config_count} configurations done')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored positions of {item_count} items in {config_count} configurations'
+        ))
@@ -0,0 +1,131 @@
+"""
+Benchmark for the pre-parsed compatibility columns (ET-HVB, ET-Sonden, KH-HVB, DFM-HVB).
+Usage: python manage.py benchmark_compatibility [--scale 100] [--iterations 3]
+
+Copies the Kugelhahn, DFM and Entlüftung rows of the catalog snapshot
+``--scale`` times, then filters them for every HVB size / probe diameter
+combination twice: with the string comparison of ``utils.check_compatibility``
+(split and strip on every check) and with the size sets parsed when the
+snapshot loads. Checks that both keep the same rows and reports the
+compatibility cost per BOM.
+"""
+import copy
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from configurator.services.catalog import get_catalog
+from configurator.services.compatibility import attach_compatible_sizes, is_compatible, size_key
+from configurator.utils import check_compatibility
+
+# Column, check type (selected HVB size or probe diameter)
+COLUMN_CHECKS = (
+    ('et_hvb', 'hvb'),
+    ('et_sonden', 'sonden'),
+    ('kh_hvb', 'hvb'),
+    ('dfm_hvb', 'hvb'),
+)
+
+
+def size_key_order(value):
+    """Sort key putting sizes in numeric order."""
+    key = size_key(value)
+    return (0, key, '') if isinstance(key, int) else (1, 0, str(value))
+
+
+def legacy_compatible_rows(rows, hvb_size, probe_size):
+    """Rows passing all their compatibility columns, compared as strings."""
+    kept = []
+    for row in rows:
+        for column, check_type in COLUMN_CHECKS:
+            value = getattr(row, column, None)
+            if value and not check_compatibility(value, hvb_size, probe_size, check_type):
+                break
+        else:
+            kept.append(row)
+    return kept
+
+
+def compatible_rows(rows, hvb_size, probe_size):
+    """Rows passing all their compatibility columns, tested against the parsed size sets."""
+    keys = {'hvb': size_key(hvb_size), 'sonden': size_key(probe_size)}
+    checks = [(f'{column}_sizes', keys[check_type]) for column, check_type in COLUMN_CHECKS]
+    kept = []
+    for row in rows:
+        for attribute, key in checks:
+            if not is_compatible(getattr(row, attribute, None), key):
+                break
+        else:
+            kept.append(row)
+    return kept
+
+
+class Command(BaseCommand):
+    help = 'Compare and time string-based and pre-parsed compatibility checks on a scaled catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=100,
+            help='Copies of each Kugelhahn/DFM/Entlüftung row (default: 100)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=3,
+            help='Passes over all HVB size / probe diameter combinations (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        scale = max(options['scale'], 1)
+        iterations = max(options['iterations'], 1)
+        catalog = get_catalog()
+
+        rows = [
+            copy.copy(row)
+            for _ in range(scale)
+            for row in catalog.all_kugelhaehne() + catalog.all_dfms() + catalog.entlueftungen()
+        ]
+        if not rows:
+            raise CommandError('No Kugelhahn/DFM/Entlüftung rows found. Please run: python manage.py import_csv_data --force')
+
+        start = time.perf_counter()
+        attach_compatible_sizes(rows)
+        parse_time = time.perf_counter() - start
+
+        hvb_sizes = sorted({hvb.hauptverteilerbalken for hvb in catalog.hvbs()}, key=size_key_order)
+        probe_sizes = sorted({row.durchmesser for row in catalog.sonden_durchmesser()}, key=size_key_order)
+        selections = [(hvb_size, probe_size) for hvb_size in hvb_sizes for probe_size in probe_sizes]
+
+        mismatches = 0
+        for hvb_size, probe_size in selections:
+            expected = legacy_compatible_rows(rows, hvb_size, probe_size)
+            actual = compatible_rows(rows, hvb_size, probe_size)
+            if [id(row) for row in expected] != [id(row) for row in actual]:
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(
+                    f'Mismatch for HVB {hvb_size} / Sonde {probe_size}: old={len(expected)} rows new={len(actual)} rows'
+                ))
+
+        timings = {}
+        for label, check in (('old', legacy_compatible_rows), ('new', compatible_rows)):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for hvb_size, probe_size in selections:
+                    check(rows, hvb_size, probe_size)
+            timings[label] = (time.perf_counter() - start) / (iterations * len(selections))
+
+        self.stdout.write(
+            f'{len(rows)} rows ({scale}x catalog), {len(selections)} HVB/Sonde combinations, '
+            f'{iterations} passes'
+        )
+        self.stdout.write(f'Parsing compatibility columns: {parse_time * 1e3:.1f} ms (once per catalog version)')
+        self.stdout.write(f'{"Per BOM":<30} {"old ms":>9} {"new ms":>9} {"speedup":>8}')
+        self.stdout.write(
+            f'{"Compatibility filter":<30} {timings["old"] * 1e3:9.2f} {timings["new"] * 1e3:9.2f} '
+            f'{timings["old"] / timings["new"]:7.1f}x'
+        )
+        if mismatches:
+            raise CommandError(f'{mismatches} combinations with different rows between old and new checks')
+        self.stdout.write(self.style.SUCCESS(f'Same rows kept for {len(selections)} combinations'))
@@ -0,0 +1,162 @@
+"""
+Micro-benchmark for the compiled formula engine.
+Usage: python manage.py benchmark_formulas [--iterations 2000]
+
+Collects every formula from the CSV files (``Menge Formel`` / ``Formel``
+columns and any cell starting with ``=``), checks that the compiled engine
+returns exactly what the old regex + eval implementation returned for a
+range of contexts, and times both.
+"""
+import csv
+import os
+import re
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from configurator.services.formula import compile_formula, evaluate_formula
+
+
+def legacy_calculate_formula(formula, context):
+    """The previous ``utils.calculate_formula`` (regex substitution + eval), kept as reference."""
+    if not formula or formula.strip() == '':
+        return None
+
+    try:
+        safe_formula = formula.strip()
+        if safe_formula.startswith('='):
+            safe_formula = safe_formula[1:]
+
+        sorted_keys = sorted(context.keys(), key=len, reverse=True)
+        for key in sorted_keys:
+            value = context[key]
+            pattern = r'\b' + re.escape(key) + r'\b'
+            safe_formula = re.sub(pattern, str(value), safe_formula)
+
+        paren_pos = safe_formula.find('(')
+        if paren_pos >= 0:
+            paren_count = 0
+            for i in range(paren_pos, len(safe_formula)):
+                if safe_formula[i] == '(':
+                    paren_count += 1
+                elif safe_formula[i] == ')':
+                    paren_count -= 1
+                    if paren_count == 0:
+                        break
+            else:
+                if paren_count > 0:
+                    safe_formula = safe_formula[:paren_pos].strip()
+
+        match = re.match(r'[0-9+\-*/().\s]+', safe_formula)
+        if not match:
+            return None
+
+        safe_formula = match.group(0).strip()
+        if not safe_formula:
+            return None
+
+        if safe_formula.count('(') != safe_formula.count(')'):
+            paren_pos = safe_formula.find('(')
+            if paren_pos >= 0:
+                safe_formula = safe_formula[:paren_pos].strip()
+            if not safe_formula:
+                return None
+
+        allowed_chars = set('0123456789+-*/.() ')
+        if not all(c in allowed_chars for c in safe_formula):
+            return None
+
+        result = eval(safe_formula)
+        return Decimal(str(result))
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Compare and time the compiled formula engine against the old eval-based implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Evaluations per formula and implementation (default: 2000)',
+        )
+
+    def collect_formulas(self, csv_dir):
+        formulas = set()
+        for filename in sorted(os.listdir(csv_dir)):
+            if not filename.lower().endswith('.csv'):
+                continue
+            with open(os.path.join(csv_dir, filename), 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                formula_columns = {i for i, name in enumerate(header) if 'formel' in name.lower()}
+                for row in reader:
+                    for i, value in enumerate(row):
+                        value = value.strip()
+                        if value and (i in formula_columns or value.startswith('=')):
+                            formulas.add(value)
+        return sorted(formulas)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        formulas = self.collect_formulas(settings.CSV_FILES_DIR)
+        if not formulas:
+            raise CommandError(f'No formulas found in {settings.CSV_FILES_DIR}')
+
+        contexts = [
+            {
+                'sondenanzahl': sondenanzahl,
+                'sondenabstand': sondenabstand,
+                'zuschlag_links': zuschlag,
+                'zuschlag_rechts': zuschlag,
+            }
+            for sondenanzahl in (0, 1, 2, 5, 12, 40)
+            for sondenabstand in (0, 80, 100, 120)
+            for zuschlag in (0, 100, 150)
+        ]
+
+        mismatches = 0
+        for formula in formulas:
+            for context in contexts:
+                expected = legacy_calculate_formula(formula, context)
+                actual = evaluate_formula(formula, context)
+                if expected != actual or str(expected) != str(actual):
+                    mismatches += 1
+                    self.stdout.write(self.style.ERROR(
+                        f'Mismatch for {formula!r} with {context}: old={expected} new={actual}'
+                    ))
+
+        context = contexts[len(contexts) // 2]
+        self.stdout.write(f'{len(formulas)} distinct formulas, {iterations} evaluations each\n')
+        self.stdout.write(f'{"Formula":<70} {"old µs":>9} {"new µs":>9} {"speedup":>8}')
+
+        total_old = total_new = 0.0
+        for formula in formulas:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                legacy_calculate_formula(formula, context)
+            old = (time.perf_counter() - start) / iterations
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                evaluate_formula(formula, context)
+            new = (time.perf_counter() - start) / iterations
+
+            total_old += old
+            total_new += new
+            variables = len(compile_formula(formula, tuple(context)).variables)
+            label = f'{formula[:55]} ({variables} var)'
+            self.stdout.write(f'{label:<70} {old * 1e6:9.2f} {new * 1e6:9.2f} {old / new:7.1f}x')
+
+        self.stdout.write(
+            f'{"Total":<70} {total_old * 1e6:9.2f} {total_new * 1e6:9.2f} {total_old / total_new:7.1f}x'
+        )
+        if mismatches:
+            raise CommandError(f'{mismatches} result mismatches between old and new implementation')
+        self.stdout.write(self.style.SUCCESS(
+            f'Results identical for {len(formulas)} formulas x {len(contexts)} contexts'
+        ))
@@ -0,0 +1,53 @@
+"""
+Export the total quantity per article over many configurations as CSV.
+Usage: python manage.py export_material_requirements [--created-from 2026-07-01] [--created-to 2026-09-30]
+       [--name Projekt] [--schachttyp "GN X1"] [--hvb-size 63] [--article-number 1000] [--output bedarf.csv]
+
+Selects configurations with the configuration list filters (and creation
+date range) and sums the quantities of their BOM items per article number
+in the database. Without --output the CSV is written to stdout.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from configurator.services.requirements import (
+    InvalidDate, filter_requirement_configurations, stream_requirements_csv,
+)
+
+
+class Command(BaseCommand):
+    help = 'Export the summed BOM quantities per article of the matching configurations as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='', help='Configuration name contains')
+        parser.add_argument('--schachttyp', default='', help='Only configurations with this Schachttyp')
+        parser.add_argument('--hvb-size', default='', help='Only configurations with this HVB size')
+        parser.add_argument('--article-number', default='', help='Full, mother or child article number contains')
+        parser.add_argument('--created-from', default='', help='Created on or after this day (YYYY-MM-DD)')
+        parser.add_argument('--created-to', default='', help='Created on or before this day (YYYY-MM-DD)')
+        parser.add_argument('--output', type=str, help='CSV file to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ('name', 'schachttyp', 'hvb_size', 'article_number', 'created_from', 'created_to')
+        }
+        try:
+            configurations, _ = filter_requirement_configurations(params)
+        except InvalidDate as e:
+            raise CommandError(str(e))
+
+        lines = stream_requirements_csv(configurations)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        row_count = -1  # Header
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for line in lines:
+                f.write(line)
+                row_count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote requirements of {row_count} articles ({configurations.count()} configurations) '
+            f'to {options["output"]}'
+        ))
@@ -0,0 +1,42 @@
+"""
+Export the configurations containing an article as CSV.
+Usage: python manage.py export_where_used 2000852 [--output where_used.csv] [--schachttyp "GN X1"] [--hvb-size 63]
+
+One row per configuration (newest first) with the article's total quantity
+in its BOM. Without --output the CSV is written to stdout.
+"""
+from django.core.management.base import BaseCommand
+
+from configurator.services.where_used import stream_where_used_csv, where_used_configurations
+
+
+class Command(BaseCommand):
+    help = 'Export the configurations whose BOM contains an article number as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('artikelnummer', help='Article number to look up')
+        parser.add_argument('--output', type=str, help='CSV file to write (default: stdout)')
+        parser.add_argument('--schachttyp', default='', help='Only configurations with this Schachttyp')
+        parser.add_argument('--hvb-size', default='', help='Only configurations with this HVB size')
+
+    def handle(self, *args, **options):
+        artikelnummer = options['artikelnummer']
+        configurations, _ = where_used_configurations(artikelnummer, {
+            'schachttyp': options['schachttyp'],
+            'hvb_size': options['hvb_size'],
+        })
+
+        lines = stream_where_used_csv(artikelnummer, configurations)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        row_count = -1  # Header
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for line in lines:
+                f.write(line)
+                row_count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {row_count} configurations containing {artikelnummer} to {options["output"]}'
+        ))
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from configurator.models import Sondengroesse, Schacht, HVB
+from configurator.services.catalog import catalog_update
 from decimal import Decimal
 
 class Command(BaseCommand):
@@ -67,49 +69,51 @@ class Command(BaseCommand):
         added_count = 0
         errors = []
         
-        for probe_data in probe_combinations:
-            try:
-                # Get the actual model objects
-                schacht = Schacht.objects.filter(schachttyp=probe_data['schachttyp']).first()
-                hvb = HVB.objects.filter(hauptverteilerbalken=probe_data['hvb_size']).first()
+        with transaction.atomic(), catalog_update():
+            for probe_data in probe_combinations:
+                try:
+                    # Get the actual model objects
+                    schacht = Schacht.objects.filter(schachttyp=probe_data['schachttyp']).first()
+                    hvb = HVB.objects.filter(hauptverteilerbalken=probe_data['hvb_size']).first()
                 
-                if not schacht:
-                    errors.append(f"❌ Schachttyp '{probe_data['schachttyp']}' not found")
-                    continue
+                    if not schacht:
+                        errors.append(f"❌ Schachttyp '{probe_data['schachttyp']}' not found")
+                        continue
                     
-                if not hvb:
-                    errors.append(f"❌ HVB size '{probe_data['hvb_size']}' not found")
-                    continue
+                    if not hvb:
+                        errors.append(f"❌ HVB size '{probe_data['hvb_size']}' not found")
+                        continue
                 
-                # Check if combination already exists
-                existing = Sondengroesse.objects.filter(
-                    durchmesser_sonde=probe_data['durchmesser_sonde'],
-                    schachttyp=schacht,
-                    hvb_size=hvb
-                ).first()
-                
-                if not existing:
-                    Sondengroesse.objects.create(
+                    # Check if combination already exists
+                    existing = Sondengroesse.objects.filter(
                         durchmesser_sonde=probe_data['durchmesser_sonde'],
-                        artikelnummer=probe_data['artikelnummer'],
-                        artikelbezeichnung=probe_data['artikelbezeichnung'],
                         schachttyp=schacht,
-                        hvb_size=hvb,
-                        bauform='',  # Default empty
-                        sondenanzahl_min=probe_data['sondenanzahl_min'],
-                        sondenanzahl_max=probe_data['sondenanzahl_max'],
-                        vorlauf_laenge=probe_data['vorlauf_laenge'],
-                        ruecklauf_laenge=probe_data['ruecklauf_laenge'],
-                        vorlauf_formel='',  # Default empty
-                        ruecklauf_formel='',  # Default empty
-                        hinweis=''  # Default empty
-                    )
-                    added_count += 1
-                    self.stdout.write(f'✅ Added: {probe_data["schachttyp"]} + {probe_data["hvb_size"]}mm + {probe_data["durchmesser_sonde"]}mm')
+                        hvb_size=hvb
+                    ).first()
+                
+                    if not existing:
+                        Sondengroesse.objects.create(
+                            durchmesser_sonde=probe_data['durchmesser_sonde'],
+                            artikelnummer=probe_data['artikelnummer'],
+                            artikelbezeichnung=probe_data['artikelbezeichnung'],
+                            schachttyp=schacht,
+                            hvb_size=hvb,
+                            bauform='',  # Default empty
+                            sondenanzahl_min=probe_data['sondenanzahl_min'],
+                            sondenanzahl_max=probe_data['sondenanzahl_max'],
+                            vorlauf_laenge=probe_data['vorlauf_laenge'],
+                            ruecklauf_laenge=probe_data['ruecklauf_laenge'],
+                            vorlauf_formel='',  # Default empty
+                            ruecklauf_formel='',  # Default empty
+                            hinweis=''  # Default empty
+                        )
+                        added_count += 1
+                        self.stdout.write(f'✅ Added: {probe_data["schachttyp"]} + {probe_data["hvb_size"]}mm + {probe_data["durchmesser_sonde"]}mm')
                     
-            except Exception as e:
-                errors.append(f"❌ Error with {probe_data['schachttyp']} + {probe_data['hvb_size']}mm: {str(e)}")
+                except Exception as e:
+                    errors.append(f"❌ Error with {probe_data['schachttyp']} + {probe_data['hvb_size']}mm: {str(e)}")
         
+
         # Show results
         total_probes_after = Sondengroesse.objects.count()
         
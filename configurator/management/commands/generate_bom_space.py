@@ -0,0 +1,173 @@
+"""
+Compute the BOMs of the whole configuration space in parallel.
+Usage: python manage.py generate_bom_space [--workers 8] [--output space.jsonl] [--save]
+
+Enumerates every combination the configurator offers (see
+services.bom_space.enumerate_configurations) and distributes chunks of
+combinations over a process pool. Each worker receives a pickled copy of the
+catalog snapshot once and computes its chunks without database access; the
+main process writes the results chunk by chunk (JSONL and/or BOM
+configurations saved with bulk inserts).
+"""
+import contextlib
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from configurator.services.bom_generation import GeneratedBOM, parse_configuration, save_boms
+from configurator.services.bom_space import BAUFORMEN, compute_chunk, enumerate_configurations, init_worker
+from configurator.services.catalog import get_catalog
+
+
+class Command(BaseCommand):
+    help = 'Compute (and optionally save) the BOMs of all valid configurations using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (default: number of CPUs; 1 computes in-process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Configurations per work unit and per write (default: 200)',
+        )
+        parser.add_argument(
+            '--schachttyp',
+            action='append',
+            help='Only this Schachttyp (can be given several times)',
+        )
+        parser.add_argument(
+            '--sondenabstand',
+            type=int,
+            default=100,
+            help='Sondenabstand used for all combinations (default: 100)',
+        )
+        parser.add_argument(
+            '--bauform',
+            nargs='+',
+            default=list(BAUFORMEN),
+            help='Bauformen to enumerate (default: I U)',
+        )
+        parser.add_argument(
+            '--sondenanzahl-step',
+            type=int,
+            default=1,
+            help='Step between enumerated probe counts (default: 1)',
+        )
+        parser.add_argument(
+            '--no-dfm',
+            action='store_true',
+            help='Only enumerate configurations without DFM',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Stop after this many combinations',
+        )
+        parser.add_argument(
+            '--count',
+            action='store_true',
+            help='Only count the combinations',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write one JSON line (params + BOM items or error) per combination',
+        )
+        parser.add_argument(
+            '--save',
+            action='store_true',
+            help='Save every computed BOM as configuration (one transaction per chunk)',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        chunk_size = max(1, options['chunk_size'])
+        catalog = get_catalog()
+
+        combinations = enumerate_configurations(
+            catalog,
+            schachttypen=options['schachttyp'],
+            sondenabstand=options['sondenabstand'],
+            bauformen=options['bauform'],
+            sondenanzahl_step=options['sondenanzahl_step'],
+            include_dfm=not options['no_dfm'],
+        )
+        if options['limit']:
+            combinations = itertools.islice(combinations, options['limit'])
+
+        if options['count']:
+            self.stdout.write(self.style.SUCCESS(f'{sum(1 for _ in combinations)} combinations'))
+            return
+
+        chunks = iter(lambda: list(itertools.islice(combinations, chunk_size)), [])
+        self.output = open(options['output'], 'w', encoding='utf-8') if options['output'] else None
+        self.save = options['save']
+        self.totals = {'succeeded': 0, 'failed': 0}
+        self.started = time.perf_counter()
+
+        try:
+            if workers == 1:
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    for chunk in chunks:
+                        self.write_results(compute_chunk(chunk, catalog))
+            else:
+                self.run_pool(chunks, catalog, workers)
+        finally:
+            if self.output is not None:
+                self.output.close()
+
+        seconds = time.perf_counter() - self.started
+        done = self.totals['succeeded'] + self.totals['failed']
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.totals['succeeded']} BOMs computed, {self.totals['failed']} failed in {seconds:.2f}s "
+            f"({done / seconds if seconds else 0:.1f} BOMs/s with {workers} worker(s))"
+        ))
+
+    def run_pool(self, chunks, catalog, workers):
+        """Keep at most two chunks per worker in flight and write results as they complete."""
+        catalog_bytes = pickle.dumps(catalog, protocol=pickle.HIGHEST_PROTOCOL)
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(catalog_bytes,)) as pool:
+            pending = set()
+            for chunk in chunks:
+                pending.add(pool.submit(compute_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.write_results(future.result())
+            for future in pending:
+                self.write_results(future.result())
+
+    def write_results(self, results):
+        boms = []
+        for result in results:
+            if result['success']:
+                self.totals['succeeded'] += 1
+                if self.save:
+                    config = parse_configuration(result['params'])
+                    boms.append(GeneratedBOM.from_cache(config, result['cached']))
+            else:
+                self.totals['failed'] += 1
+            if self.output is not None:
+                line = {key: value for key, value in result.items() if key != 'cached'}
+                self.output.write(json.dumps(line, ensure_ascii=False) + '\n')
+        if boms:
+            save_boms(boms)
+
+        done = self.totals['succeeded'] + self.totals['failed']
+        if done % 10000 < len(results):
+            seconds = time.perf_counter() - self.started
+            self.stdout.write(f'{done} combinations ({done / seconds:.1f} BOMs/s)')
@@ -0,0 +1,123 @@
+"""
+Generate BOMs for many configurations from a file.
+Usage: python manage.py generate_boms variants.csv [--batch-size 500] [--dry-run] [--output results.jsonl]
+
+The input is either JSONL (one generate-bom payload per line) or CSV with
+the payload field names as header (``;`` or ``,`` separated). In CSV files
+the ``gnx_articles`` and ``hvb_stuetze_articles`` columns hold JSON.
+Entries are processed in batches; each batch is saved in one transaction.
+"""
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from configurator.services.bom_generation import generate_batch
+
+# CSV columns whose cells contain JSON (lists/objects in the generate-bom payload)
+JSON_COLUMNS = ('gnx_articles', 'hvb_stuetze_articles')
+
+
+class Command(BaseCommand):
+    help = 'Generate (and save) BOMs for all configurations in a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='CSV or JSONL file with one configuration per row/line')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Configurations per batch/transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compute the BOMs without saving them',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write one JSON result per configuration to this file (JSONL)',
+        )
+
+    def read_entries(self, path, file_format):
+        if file_format == 'jsonl':
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                for line_number, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise CommandError(f'{path}:{line_number}: invalid JSON ({e})')
+            return
+
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=';,')
+            except csv.Error:
+                dialect = csv.excel
+            for row_number, row in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+                entry = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+                for column in JSON_COLUMNS:
+                    if not entry.get(column):
+                        entry.pop(column, None)
+                        continue
+                    try:
+                        entry[column] = json.loads(entry[column])
+                    except json.JSONDecodeError as e:
+                        raise CommandError(f'{path}:{row_number}: invalid JSON in {column} ({e})')
+                yield entry
+
+    def handle(self, *args, **options):
+        path = options['input']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        file_format = options['format'] or ('jsonl' if path.lower().endswith(('.jsonl', '.json')) else 'csv')
+        batch_size = max(1, options['batch_size'])
+
+        entries = list(self.read_entries(path, file_format))
+        if not entries:
+            raise CommandError(f'No configurations found in {path}')
+
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else None
+        total = {'count': 0, 'succeeded': 0, 'failed': 0, 'seconds': 0.0}
+        try:
+            for start in range(0, len(entries), batch_size):
+                results, stats = generate_batch(
+                    entries[start:start + batch_size],
+                    dry_run=options['dry_run'],
+                    include_items=output is not None,
+                )
+                for result in results:
+                    result['index'] += start
+                    if output is not None:
+                        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                    if not result['success']:
+                        self.stdout.write(self.style.WARNING(
+                            f"#{result['index'] + 1}: {result['error']}"
+                        ))
+                for key in total:
+                    total[key] += stats[key]
+                self.stdout.write(
+                    f"Batch {start // batch_size + 1}: {stats['succeeded']}/{stats['count']} BOMs, "
+                    f"{stats['boms_per_second']} BOMs/s"
+                )
+        finally:
+            if output is not None:
+                output.close()
+
+        rate = total['succeeded'] / total['seconds'] if total['seconds'] else 0
+        action = 'computed' if options['dry_run'] else 'generated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['succeeded']} BOMs {action}, {total['failed']} failed "
+            f"in {total['seconds']:.2f}s ({rate:.1f} BOMs/s)"
+        ))
@@ -1,8 +1,10 @@
-import csv
+import json
 import os
+import re
 from decimal import Decimal, InvalidOperation
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import connections, transaction
 from configurator.models import (
     Schacht, HVB, Sondengroesse, Sondenabstand, SondenDurchmesser, SondenDurchmesserPipe, Kugelhahn, DFM,
     Entlueftung, Sondenverschlusskappe, StumpfschweissEndkappe,
@@ -10,11 +12,66 @@ from configurator.models import (
     Schachtkompatibilitaet, CSVDataSource, GNXChamberArticle, HVBStuetze,
     Sondenbeschriftung,
 )
+from configurator.services.articles import ARTICLE_SOURCE_TABLES, rebuild_article_index
+from configurator.services.catalog import catalog_update
+from configurator.services.catalog_import import BULK_BATCH_SIZE, TableDiff, article_number_fields, file_hash, normalize_article_numbers
+from configurator.services.csv_reader import batched, read_dict_rows, read_rows
+from configurator.services.xlsx_reader import Sheet, Workbook
 
 
 class Command(BaseCommand):
     help = 'Import data from CSV files into the database'
 
+    # CSV file -> (parse method, model, replace). Parse methods yield unsaved
+    # rows while reading the file; all tables are updated in one transaction.
+    # Files with replace=False only add rows to their table.
+    CSV_FILES = {
+        'Schacht.csv': ('parse_schacht', Schacht, True),
+        'HVB.csv': ('parse_hvb', HVB, True),
+        'Sondengroesse - Sondenlaenge.csv': ('parse_sondengroesse', Sondengroesse, True),
+        'Schacht-Sondendurchmesser.csv': ('parse_sonden_durchmesser', SondenDurchmesser, True),
+        'Sonden-Durchmesser.csv': ('parse_sonden_durchmesser_pipe', SondenDurchmesserPipe, True),
+        'Sondenabstaende.csv': ('parse_sondenabstand', Sondenabstand, True),
+        'Kugelhaehne.csv': ('parse_kugelhahn', Kugelhahn, True),
+        'DFM.csv': ('parse_dfm', DFM, True),
+        'Entlueftung.csv': ('parse_entlueftung', Entlueftung, True),
+        'Sondenverschlusskappe.csv': ('parse_sondenverschlusskappe', Sondenverschlusskappe, True),
+        'Stumpfschweiss-Endkappen.csv': ('parse_stumpfschweiss_endkappe', StumpfschweissEndkappe, True),
+        'WP-Verschlusskappen.csv': ('parse_wp_verschlusskappe', WPVerschlusskappe, True),
+        'WPA.csv': ('parse_wpa', WPA, True),
+        'Sondenbeschriftung.csv': ('parse_sondenbeschriftung', Sondenbeschriftung, True),
+        'Verrohrung.csv': ('parse_verrohrung', Verrohrung, True),
+        'Schachtgrenze.csv': ('parse_schachtgrenze', Schachtgrenze, True),
+        'Schachtkompatibilitaet.csv': ('parse_schachtkompatibilitaet', Schachtkompatibilitaet, True),
+        'GNXChamberArticle.csv': ('parse_gnx_chamber_articles_csv', GNXChamberArticle, True),
+        'GN X - Articles.csv': ('parse_gnx_extra_articles_csv', HVBStuetze, True),
+        # Must come after the Sondengroesse file: it only adds missing combinations
+        'AdditionalProbeCombinations.csv': ('parse_additional_probe_combinations_csv', Sondengroesse, False),
+    }
+
+    # CSV file -> sheet of the main Excel file it is exported from (--excel).
+    # Files without a sheet are read from CSV_FILES_DIR in that mode as well.
+    EXCEL_SHEETS = {
+        'Schacht.csv': 'Schacht',
+        'HVB.csv': 'HVB',
+        'Sondengroesse - Sondenlaenge.csv': 'Sondengröße - Sondenlänge',
+        'Schacht-Sondendurchmesser.csv': 'Schacht-Sondendurchmesser',
+        'Sonden-Durchmesser.csv': 'Sonden-Durchmesser',
+        'Sondenabstaende.csv': 'Sondenabstaende',
+        'Kugelhaehne.csv': 'Kugelhähne',
+        'DFM.csv': 'DFM',
+        'Entlueftung.csv': 'Entlüftung',
+        'Sondenverschlusskappe.csv': 'WP & Sondenverschlusskappe ',
+        'Stumpfschweiss-Endkappen.csv': 'Stumpfschweiß-Endkappen',
+        'WP-Verschlusskappen.csv': 'WP-Verschlusskappen',
+        'WPA.csv': 'WPA',
+        'Sondenbeschriftung.csv': 'Sondenbeschriftung',
+        'Verrohrung.csv': 'Verrohrung',
+        'Schachtgrenze.csv': 'Schachtgrenze',
+        'Schachtkompatibilitaet.csv': 'Schachtkompatibilität',
+        'GN X - Articles.csv': 'GN X - Articles',
+    }
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--file',
@@ -26,138 +83,215 @@ class Command(BaseCommand):
             action='store_true',
             help='Force reimport even if file hasn\'t changed',
         )
+        parser.add_argument(
+            '--report',
+            type=str,
+            help='Write the added/changed/removed rows per table to this JSON file',
+        )
+        parser.add_argument(
+            '--excel',
+            nargs='?',
+            const=str(settings.MAIN_EXCEL_FILE),
+            help='Read the tables from the sheets of the main Excel file instead of the CSV exports '
+                 '(default: MAIN_EXCEL_FILE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='With --excel: parse the sheets in this many processes up front (default: 1, streamed)',
+        )
 
     def handle(self, *args, **options):
         csv_dir = settings.CSV_FILES_DIR
+        self.verbosity = options['verbosity']
+        self.changes = []
+        self.workbook = None
         
-        if options['file']:
-            self.import_single_file(csv_dir, options['file'], options['force'])
-        else:
-            self.import_all_files(csv_dir, options['force'])
+        if options['excel']:
+            if not os.path.exists(options['excel']):
+                self.stdout.write(
+                    self.style.ERROR(f'File not found: {options["excel"]}')
+                )
+                return
+            self.workbook = Workbook(options['excel'])
+        
+        try:
+            if options['file']:
+                filenames = [options['file']]
+            else:
+                filenames = list(self.CSV_FILES)
+            if self.workbook is not None and options['workers'] > 1:
+                sheets = [self.EXCEL_SHEETS[name] for name in filenames if name in self.EXCEL_SHEETS]
+                # Forked workers must not share the parent's database connections
+                connections.close_all()
+                self.workbook.preload([name for name in sheets if name in self.workbook.sheet_parts], options['workers'])
+            
+            if options['file']:
+                self.import_single_file(csv_dir, options['file'], options['force'])
+            else:
+                self.import_all_files(csv_dir, options['force'])
+        finally:
+            if self.workbook is not None:
+                self.workbook.close()
+        
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(self.changes, f, ensure_ascii=False, indent=2)
 
     def import_all_files(self, csv_dir, force=False):
         """Import all CSV files"""
-        csv_files = {
-            'Schacht.csv': self.import_schacht,
-            'HVB.csv': self.import_hvb,
-            'Sondengroesse - Sondenlaenge.csv': self.import_sondengroesse,
-            'Schacht-Sondendurchmesser.csv': self.import_sonden_durchmesser,
-            'Sonden-Durchmesser.csv': self.import_sonden_durchmesser_pipe,
-            'Sondenabstaende.csv': self.import_sondenabstand,
-            'Kugelhaehne.csv': self.import_kugelhahn,
-            'DFM.csv': self.import_dfm,
-            'Entlueftung.csv': self.import_entlueftung,
-            'Sondenverschlusskappe.csv': self.import_sondenverschlusskappe,
-            'Stumpfschweiss-Endkappen.csv': self.import_stumpfschweiss_endkappe,
-            'WP-Verschlusskappen.csv': self.import_wp_verschlusskappe,
-            'WPA.csv': self.import_wpa,
-            'Sondenbeschriftung.csv': self.import_sondenbeschriftung,
-            'Verrohrung.csv': self.import_verrohrung,
-            'Schachtgrenze.csv': self.import_schachtgrenze,
-            'Schachtkompatibilitaet.csv': self.import_schachtkompatibilitaet,
-            'GNXChamberArticle.csv': self.import_gnx_chamber_articles_csv,
-            'GN X - Articles.csv': self.import_gnx_extra_articles_csv,
-            'AdditionalProbeCombinations.csv': self.import_additional_probe_combinations_csv,
-        }
-
-        for filename, import_func in csv_files.items():
-            file_path = os.path.join(csv_dir, filename)
-            if os.path.exists(file_path):
-                self.import_single_file(csv_dir, filename, force, import_func)
+        sources = []
+        for filename in self.CSV_FILES:
+            source = self.find_source(csv_dir, filename)
+            if source is not None:
+                sources.append((filename, source))
             else:
                 self.stdout.write(
                     self.style.WARNING(f'File not found: {filename}')
                 )
         
-        
+        self.import_files(sources, force)
         self.stdout.write(self.style.SUCCESS('All CSV files imported successfully!'))
 
-    def import_single_file(self, csv_dir, filename, force=False, import_func=None):
+    def import_single_file(self, csv_dir, filename, force=False):
         """Import a single CSV file"""
-        file_path = os.path.join(csv_dir, filename)
+        source = self.find_source(csv_dir, filename)
         
-        if not os.path.exists(file_path):
+        if source is None:
             self.stdout.write(
-                self.style.ERROR(f'File not found: {file_path}')
+                self.style.ERROR(f'File not found: {os.path.join(csv_dir, filename)}')
             )
             return
-
-        # Check if file needs to be imported
-        if not force:
-            data_source, created = CSVDataSource.objects.get_or_create(
-                name=filename,
-                defaults={'file_path': file_path}
+        if filename not in self.CSV_FILES:
+            self.stdout.write(
+                self.style.WARNING(f'No import function for {filename}')
             )
-            
-            file_mtime = os.path.getmtime(file_path)
-            if not created and data_source.last_modified.timestamp() >= file_mtime:
+            return
+        
+        self.import_files([(filename, source)], force)
+
+    def find_source(self, csv_dir, filename):
+        """The sheet (with --excel) or file path to read ``filename`` from, None if missing"""
+        sheet_name = self.EXCEL_SHEETS.get(filename)
+        if self.workbook is not None and sheet_name in self.workbook.sheet_parts:
+            return self.workbook.sheet(sheet_name)
+        file_path = os.path.join(csv_dir, filename)
+        return file_path if os.path.exists(file_path) else None
+
+    def needs_import(self, filename, file_path, content_hash):
+        """True if the file's contents changed since its last import"""
+        data_source = CSVDataSource.objects.filter(name=filename).first()
+        return data_source is None or data_source.content_hash != content_hash
+
+    def import_files(self, sources, force=False):
+        """Update the tables of ``sources`` ((filename, path or sheet) pairs) in one transaction.
+
+        The files are streamed into their tables, which only receive the rows
+        that differ from the file (see services.catalog_import). Requests
+        running during the import keep seeing the previous catalog until the
+        transaction commits; a table whose files cannot be read is reported
+        and left untouched.
+        """
+        # Sondengroesse combinations streamed in this run (see parse_additional_probe_combinations_csv)
+        self.probe_combinations = None
+        self.row_counts = {}
+        replaced_models = set()
+        files_by_model = {}
+        filenames = [filename for filename, _ in sources]
+        for filename, file_path in sources:
+            parse_method, model, replace = self.CSV_FILES[filename]
+            content_hash = file_path.content_hash() if isinstance(file_path, Sheet) else file_hash(file_path)
+            # Files adding rows to a table must be re-applied when the table is rewritten
+            if not (force or model in replaced_models or self.needs_import(filename, file_path, content_hash)):
                 self.stdout.write(f'Skipping {filename} - no changes detected')
-                return
+                continue
 
-        self.stdout.write(f'Importing {filename}...')
-        
-        if import_func is None:
-            # Determine import function based on filename
-            import_functions = {
-                'Schacht.csv': self.import_schacht,
-                'HVB.csv': self.import_hvb,
-                'Sondengroesse - Sondenlaenge.csv': self.import_sondengroesse,
-                'Schacht-Sondendurchmesser.csv': self.import_sonden_durchmesser,
-                'Sonden-Durchmesser.csv': self.import_sonden_durchmesser_pipe,
-                'Sondenabstaende.csv': self.import_sondenabstand,
-                'Kugelhaehne.csv': self.import_kugelhahn,
-                'DFM.csv': self.import_dfm,
-                'Entlueftung.csv': self.import_entlueftung,
-                'Sondenverschlusskappe.csv': self.import_sondenverschlusskappe,
-                'Stumpfschweiss-Endkappen.csv': self.import_stumpfschweiss_endkappe,
-                'WP-Verschlusskappen.csv': self.import_wp_verschlusskappe,
-                'WPA.csv': self.import_wpa,
-                'Sondenbeschriftung.csv': self.import_sondenbeschriftung,
-                'Verrohrung.csv': self.import_verrohrung,
-                'Schachtgrenze.csv': self.import_schachtgrenze,
-                'Schachtkompatibilitaet.csv': self.import_schachtkompatibilitaet,
-                'GNXChamberArticle.csv': self.import_gnx_chamber_articles_csv,
-                'GN X - Articles.csv': self.import_gnx_extra_articles_csv,
-                'AdditionalProbeCombinations.csv': self.import_additional_probe_combinations_csv,
-            }
-            import_func = import_functions.get(filename)
-        
-        if import_func:
-            try:
-                count = import_func(file_path)
-                self.stdout.write(
-                    self.style.SUCCESS(f'Successfully imported {count} records from {filename}')
-                )
-                
-                # Update data source
-                CSVDataSource.objects.update_or_create(
-                    name=filename,
-                    defaults={'file_path': file_path}
-                )
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Error importing {filename}: {str(e)}')
-                )
-        else:
+            self.stdout.write(f'Importing {filename}...')
+            if replace:
+                replaced_models.add(model)
+            files_by_model.setdefault(model, []).append((filename, file_path, content_hash, parse_method))
+
+        if not files_by_model:
+            return
+
+        diffs = []
+        imported = []
+        # One catalog version bump for all tables, committed with them
+        with transaction.atomic(), catalog_update():
+            for model, files in files_by_model.items():
+                self.current_file = files[0][0]
+                try:
+                    # Savepoint: a failing file leaves its table as before
+                    with transaction.atomic():
+                        if model in replaced_models:
+                            diff = TableDiff(model)
+                            diff.apply(lambda: self.stream_rows(files))
+                            diffs.append(diff)
+                        else:
+                            for batch in batched(self.stream_rows(files), BULK_BATCH_SIZE):
+                                model.objects.bulk_create(batch)
+                        for filename, file_path, content_hash, _ in files:
+                            # Update data source
+                            CSVDataSource.objects.update_or_create(
+                                name=filename,
+                                defaults={'file_path': str(file_path), 'content_hash': content_hash}
+                            )
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.ERROR(f'Error importing {self.current_file}: {str(e)}')
+                    )
+                    continue
+                imported.extend(filename for filename, _, _, _ in files)
+
+            # Keep the article index in step with the component tables
+            if any(model.__name__ in ARTICLE_SOURCE_TABLES for model in files_by_model):
+                rebuild_article_index()
+
+        for filename in sorted(imported, key=filenames.index):
             self.stdout.write(
-                self.style.WARNING(f'No import function for {filename}')
+                self.style.SUCCESS(f'Successfully imported {self.row_counts[filename]} records from {filename}')
             )
+        self.report_changes(diffs)
+
+    def stream_rows(self, files):
+        """Rows parsed from ``files`` in order (article numbers normalized), counted per file"""
+        for filename, file_path, _, parse_method in files:
+            self.current_file = filename
+            self.row_counts[filename] = 0
+            number_fields = article_number_fields(self.CSV_FILES[filename][1])
+            for row in getattr(self, parse_method)(file_path):
+                normalize_article_numbers(row, number_fields)
+                self.row_counts[filename] += 1
+                yield row
+
+    def report_changes(self, diffs):
+        """Print the changed rows per table (details with -v 2) and write --report"""
+        changed = [diff for diff in diffs if diff.has_changes]
+        if not changed:
+            self.stdout.write('No catalog rows changed')
+        for diff in changed:
+            self.stdout.write(f'{diff.model.__name__}: {diff.summary()}')
+            if self.verbosity >= 2:
+                for key in diff.inserted:
+                    self.stdout.write(f'  + {key}')
+                for key, fields in diff.updated:
+                    self.stdout.write(f'  ~ {key}: {", ".join(fields)}')
+                for key in diff.deleted:
+                    self.stdout.write(f'  - {key}')
+        self.changes.extend(diff.report() for diff in changed)
 
     def read_csv_file(self, file_path):
-        """Read CSV file with multiple encoding attempts"""
-        encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    content = file.read()
-                    from io import StringIO
-                    return csv.DictReader(StringIO(content))
-            except UnicodeDecodeError:
-                continue
-        
-        raise Exception(f"Could not decode file {file_path} with any encoding")
+        """Stream the rows of a CSV file (encoding and separator are sniffed) or sheet as dicts"""
+        if isinstance(file_path, Sheet):
+            return file_path.dict_rows()
+        return read_dict_rows(file_path)
+
+    def read_rows(self, file_path, is_header=None):
+        """Stream the rows of a CSV file or sheet as lists, header first"""
+        if isinstance(file_path, Sheet):
+            return file_path.rows(is_header)
+        return read_rows(file_path, is_header)
 
     def safe_decimal(self, value):
         """Safely convert string to Decimal"""
@@ -179,65 +313,52 @@ class Command(BaseCommand):
         except (ValueError, TypeError):
             return None
 
-    def clean_row(self, row):
-        """Clean BOM and normalize row data"""
-        clean_row = {}
-        for key, value in row.items():
-            clean_key = key.lstrip('\ufeff').strip()
-            clean_row[clean_key] = value
-        return clean_row
-
-    def import_schacht(self, file_path):
-        """Import Schacht data"""
-        Schacht.objects.all().delete()
-        count = 0
-        
+    def is_duplicate(self, seen, key, label=None):
+        """True if ``key`` was seen before (unique columns would reject the whole insert), else record it"""
+        if key in seen:
+            if label:
+                self.stdout.write(self.style.WARNING(f'Skipping duplicate {label} {key}'))
+            return True
+        seen.add(key)
+        return False
+
+    def parse_schacht(self, file_path):
+        """Parse Schacht data"""
+        seen = set()
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
-            row = self.clean_row(row)
-            
             if row.get('Schachttyp') and row['Schachttyp'].strip():
-                Schacht.objects.create(
+                if self.is_duplicate(seen, row['Schachttyp'], 'Schacht'):
+                    continue
+                yield Schacht(
                     schachttyp=row['Schachttyp'],
                     artikelnummer=row.get('Artikelnummer', ''),
                     artikelbezeichnung=row.get('Artikelbezeichnung', ''),
                     menge_statisch=self.safe_decimal(row.get('Menge Statisch')),
                     menge_formel=row.get('Menge Formel', '')
                 )
-                count += 1
-        return count
 
-    def import_hvb(self, file_path):
-        """Import HVB data"""
-        HVB.objects.all().delete()
-        count = 0
-        
+    def parse_hvb(self, file_path):
+        """Parse HVB data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
-            row = self.clean_row(row)
             if row.get('Hauptverteilerbalken') and row['Hauptverteilerbalken'].strip():
-                HVB.objects.create(
+                yield HVB(
                     hauptverteilerbalken=row['Hauptverteilerbalken'],
                     artikelnummer=row.get('Artikelnummer', ''),
                     artikelbezeichnung=row.get('Artikelbezeichnung', ''),
                     menge_statisch=self.safe_decimal(row.get('Menge Statisch')),
                     menge_formel=row.get('Menge Formel', '')
                 )
-                count += 1
-        return count
 
-    def import_sondengroesse(self, file_path):
-        """Import Sondengroesse data"""
-        Sondengroesse.objects.all().delete()
-        count = 0
-        
+    def parse_sondengroesse(self, file_path):
+        """Parse Sondengroesse data"""
+        self.probe_combinations = set()
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if row.get('Durchmesser Sonde') and row['Durchmesser Sonde'].strip():
-                Sondengroesse.objects.create(
+                self.probe_combinations.add((row['Durchmesser Sonde'], row.get('Schachttyp', ''), row.get('HVB', '')))
+                yield Sondengroesse(
                     durchmesser_sonde=row['Durchmesser Sonde'],
                     artikelnummer=row.get('Artikelnummer', ''),
                     artikelbezeichnung=row.get('Artikelbezeichnung', ''),
@@ -252,63 +373,38 @@ class Command(BaseCommand):
                     ruecklauf_formel=row.get('(opt.) Rücklauf Formel', ''),
                     hinweis=row.get('Hinweis', '')
                 )
-                count += 1
-        return count
 
-    def import_sonden_durchmesser(self, file_path):
-        """Import Sonden Durchmesser data - matrix format where columns are schacht types and rows are diameters"""
-        SondenDurchmesser.objects.all().delete()
-        count = 0
-        
-        # Read CSV file manually to handle matrix format
-        import csv
-        encodings = ['utf-8-sig', 'utf-8', 'latin1', 'cp1252']
-        reader = None
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding, newline='') as f:
-                    reader = list(csv.reader(f))
-                    break
-            except UnicodeDecodeError:
-                continue
-        
-        if not reader:
-            self.stdout.write(self.style.ERROR(f'Could not read file: {file_path}'))
-            return 0
-        
+    def parse_sonden_durchmesser(self, file_path):
+        """Parse Sonden Durchmesser data - matrix format where columns are schacht types and rows are diameters"""
+        rows = self.read_rows(file_path)
         # First row contains schacht types (columns)
-        if len(reader) == 0:
-            return 0
+        header = next(rows, None)
+        if header is None:
+            return
         
-        schacht_types = [col.strip() for col in reader[0] if col.strip()]
+        schacht_types = [col.strip() for col in header if col.strip()]
         
+        # Each (schachttyp, durchmesser) pair once
+        seen = set()
         # Subsequent rows contain probe diameters for each schacht type
-        for row_idx in range(1, len(reader)):
-            row = reader[row_idx]
+        for row in rows:
             for col_idx, durchmesser in enumerate(row):
                 if col_idx < len(schacht_types) and durchmesser and durchmesser.strip():
                     schachttyp = schacht_types[col_idx]
                     durchmesser_value = durchmesser.strip()
                     # Only create if diameter is not empty
-                    if durchmesser_value:
-                        SondenDurchmesser.objects.get_or_create(
+                    if durchmesser_value and not self.is_duplicate(seen, (schachttyp, durchmesser_value)):
+                        yield SondenDurchmesser(
                             schachttyp=schachttyp,
                             durchmesser=durchmesser_value,
-                            defaults={}
                         )
-                        count += 1
-        
-        return count
 
-    def import_sonden_durchmesser_pipe(self, file_path):
-        """Import pipe articles for probe diameters from Sonden-Durchmesser.csv"""
-        SondenDurchmesserPipe.objects.all().delete()
-        count = 0
-        
+    def parse_sonden_durchmesser_pipe(self, file_path):
+        """Parse pipe articles for probe diameters from Sonden-Durchmesser.csv"""
+        # The first article per diameter wins
+        seen = set()
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             durchmesser = row.get('Durchmesser Sonde', '').strip()
             artikelnummer = row.get('Artikelnummer', '').strip()
             artikelbezeichnung = row.get('Artikelbezeichnung', '').strip()
@@ -317,47 +413,34 @@ class Command(BaseCommand):
                 # Remove 'mm' suffix if present in durchmesser
                 if durchmesser.lower().endswith('mm'):
                     durchmesser = durchmesser[:-2].strip()
+                if self.is_duplicate(seen, durchmesser):
+                    continue
                 
-                SondenDurchmesserPipe.objects.get_or_create(
+                yield SondenDurchmesserPipe(
                     durchmesser=durchmesser,
-                    defaults={
-                        'artikelnummer': artikelnummer,
-                        'artikelbezeichnung': artikelbezeichnung
-                    }
+                    artikelnummer=artikelnummer,
+                    artikelbezeichnung=artikelbezeichnung
                 )
-                count += 1
-        
-        return count
 
-    def import_sondenabstand(self, file_path):
-        """Import Sondenabstand data"""
-        Sondenabstand.objects.all().delete()
-        count = 0
-        
+    def parse_sondenabstand(self, file_path):
+        """Parse Sondenabstand data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if row.get('Sondenabstand') and row['Sondenabstand'].strip():
-                Sondenabstand.objects.create(
+                yield Sondenabstand(
                     sondenabstand=self.safe_int(row['Sondenabstand']) or 0,
                     anschlussart=row.get('Anschlussart', ''),
                     zuschlag_links=self.safe_int(row.get('Zuschlag_links in mm')) or 0,
                     zuschlag_rechts=self.safe_int(row.get('Zuschlag_rechts in mm')) or 0,
                     hinweis=row.get('Hinweis', '')
                 )
-                count += 1
-        return count
 
-    def import_kugelhahn(self, file_path):
-        """Import Kugelhahn data"""
-        Kugelhahn.objects.all().delete()
-        count = 0
-        
+    def parse_kugelhahn(self, file_path):
+        """Parse Kugelhahn data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if row.get('Kugelhahn') and row['Kugelhahn'].strip():
-                Kugelhahn.objects.create(
+                yield Kugelhahn(
                     kugelhahn=row['Kugelhahn'],
                     artikelnummer=row.get('Artikelnummer', ''),
                     artikelbezeichnung=row.get('Artikelbezeichnung', ''),
@@ -367,19 +450,13 @@ class Command(BaseCommand):
                     et_sonden=row.get('ET-Sonden', ''),
                     kh_hvb=row.get('KH-HVB', '')
                 )
-                count += 1
-        return count
 
-    def import_dfm(self, file_path):
-        """Import DFM data"""
-        DFM.objects.all().delete()
-        count = 0
-        
+    def parse_dfm(self, file_path):
+        """Parse DFM data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if row.get('Durchflussarmatur') and row['Durchflussarmatur'].strip():
-                DFM.objects.create(
+                yield DFM(
                     durchflussarmatur=row['Durchflussarmatur'],
                     artikelnummer=row.get('Artikelnummer', ''),
                     artikelbezeichnung=row.get('Artikelbezeichnung', ''),
@@ -389,21 +466,15 @@ class Command(BaseCommand):
                     et_sonden=row.get('ET-Sonden', ''),
                     dfm_hvb=row.get('DFM-HVB', '')
                 )
-                count += 1
-        return count
 
-    def import_entlueftung(self, file_path):
-        """Import Entlueftung data"""
-        Entlueftung.objects.all().delete()
-        count = 0
-        
+    def parse_entlueftung(self, file_path):
+        """Parse Entlueftung data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):  # If any field has data
                 name = row.get(list(row.keys())[0], '')  # First column as name
                 if name and name.strip():
-                    Entlueftung.objects.create(
+                    yield Entlueftung(
                         name=name,
                         artikelnummer=row.get('Artikelnummer', ''),
                         artikelbezeichnung=row.get('Artikelbezeichnung', ''),
@@ -411,22 +482,16 @@ class Command(BaseCommand):
                         menge_formel=row.get('Menge Formel', ''),
                         et_hvb=row.get('ET-HVB', '')
                     )
-                    count += 1
-        return count
 
-    def import_sondenverschlusskappe(self, file_path):
-        """Import Sondenverschlusskappe data"""
-        Sondenverschlusskappe.objects.all().delete()
-        count = 0
-        
+    def parse_sondenverschlusskappe(self, file_path):
+        """Parse Sondenverschlusskappe data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):
                 name = row.get(list(row.keys())[0], '')
                 if name and name.strip():
                     durchmesser = row.get('Sondenverschlusskappe') or name
-                    Sondenverschlusskappe.objects.create(
+                    yield Sondenverschlusskappe(
                         name=name,
                         artikelnummer=row.get('Artikelnummer', ''),
                         artikelbezeichnung=row.get('Artikelbezeichnung', ''),
@@ -434,23 +499,17 @@ class Command(BaseCommand):
                         menge_formel=row.get('Menge Formel', ''),
                         sonden_durchmesser=str(durchmesser).strip()
                     )
-                    count += 1
-        return count
 
-    def import_stumpfschweiss_endkappe(self, file_path):
-        """Import Stumpfschweiss-Endkappe data"""
-        StumpfschweissEndkappe.objects.all().delete()
-        count = 0
-        
+    def parse_stumpfschweiss_endkappe(self, file_path):
+        """Parse Stumpfschweiss-Endkappe data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):
                 name = row.get(list(row.keys())[0], '')
                 if name and name.strip():
                     hvb_size = row.get('HVB')
                     artikelbezeichnung = row.get('Artikelbezeichnung', '')
-                    StumpfschweissEndkappe.objects.create(
+                    yield StumpfschweissEndkappe(
                         name=name,
                         artikelnummer=row.get('Artikelnummer', ''),
                         artikelbezeichnung=artikelbezeichnung,
@@ -459,65 +518,47 @@ class Command(BaseCommand):
                         hvb_durchmesser=str(hvb_size).strip() if hvb_size else None,
                         is_short_version='kurz' in artikelbezeichnung.lower()
                     )
-                    count += 1
-        return count
-
-    def import_sondenbeschriftung(self, file_path):
-        """Import Sondenbeschriftung data"""
-        Sondenbeschriftung.objects.all().delete()
-        count = 0
 
+    def parse_sondenbeschriftung(self, file_path):
+        """Parse Sondenbeschriftung data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):
                 nummer = row.get('Nummer', '') or row.get(list(row.keys())[0], '')
                 if nummer and nummer.strip():
-                    Sondenbeschriftung.objects.create(
+                    yield Sondenbeschriftung(
                         nummer=str(nummer).strip(),
                         artikel=row.get('Artikel', ''),
                         menge_statisch=self.safe_decimal(row.get('Menge - Statisch')),
                         menge_formel=row.get('Menge - Statisch') if str(row.get('Menge - Statisch', '')).startswith('=') else '',
                         schaechte=row.get('Schächte', ''),
                     )
-                    count += 1
-        return count
 
-    def import_wp_verschlusskappe(self, file_path):
-        """Import WP-Verschlusskappe data"""
-        WPVerschlusskappe.objects.all().delete()
-        count = 0
-        
+    def parse_wp_verschlusskappe(self, file_path):
+        """Parse WP-Verschlusskappe data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):
                 name = row.get(list(row.keys())[0], '')
                 if name and name.strip():
-                    WPVerschlusskappe.objects.create(
+                    yield WPVerschlusskappe(
                         name=name,
                         artikelnummer=row.get('Artikelnummer', ''),
                         artikelbezeichnung=row.get('Artikelbezeichnung', ''),
                         menge_statisch=self.safe_decimal(row.get('Menge Statisch')),
                         menge_formel=row.get('Menge Formel', '')
                     )
-                    count += 1
-        return count
 
-    def import_wpa(self, file_path):
-        """Import WPA data"""
-        WPA.objects.all().delete()
-        count = 0
-        
+    def parse_wpa(self, file_path):
+        """Parse WPA data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):
                 # New structure: Durchmesser HVB, Durchmesser WP, Artikelnummer, Artikelbezeichnung, Menge Statisch
                 hvb_durchmesser = row.get('Durchmesser HVB', '') or row.get(list(row.keys())[0], '')
                 wp_durchmesser = row.get('Durchmesser WP', '')
                 if hvb_durchmesser and str(hvb_durchmesser).strip():
-                    WPA.objects.create(
+                    yield WPA(
                         name=str(hvb_durchmesser).strip(),
                         wp_durchmesser=str(wp_durchmesser).strip() if wp_durchmesser is not None else '',
                         artikelnummer=row.get('Artikelnummer', ''),
@@ -525,211 +566,182 @@ class Command(BaseCommand):
                         menge_statisch=self.safe_decimal(row.get('Menge Statisch')),
                         menge_formel=row.get('Menge Formel', '')
                     )
-                    count += 1
-        return count
 
-    def import_verrohrung(self, file_path):
-        """Import Verrohrung data"""
-        Verrohrung.objects.all().delete()
-        count = 0
-        
+    def parse_verrohrung(self, file_path):
+        """Parse Verrohrung data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if row.get('Verrohrung') and row['Verrohrung'].strip():
-                Verrohrung.objects.create(
+                yield Verrohrung(
                     verrohrung=row['Verrohrung'],
                     artikelnummer=row.get('Artikelnummer', ''),
                     artikelbezeichnung=row.get('Artikelbezeichnung', ''),
                     menge_statisch=self.safe_decimal(row.get('Menge Statisch')),
                     menge_formel=row.get('Menge Formel', '')
                 )
-                count += 1
-        return count
 
-    def import_schachtgrenze(self, file_path):
-        """Import Schachtgrenze data"""
-        Schachtgrenze.objects.all().delete()
-        count = 0
-        
+    def parse_schachtgrenze(self, file_path):
+        """Parse Schachtgrenze data"""
+        seen = set()
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             schachttyp = row.get('Schachttyp', '').strip()
             if schachttyp:
                 max_sondenanzahl = self.safe_int(row.get('Max Sondenanzahl'))
                 erlaubte_hvb = row.get('Erlaubte HVB', '').strip()
                 hinweis = row.get('Hinweis', '').strip()
+                if self.is_duplicate(seen, schachttyp, 'Schachtgrenze'):
+                    continue
                 
-                Schachtgrenze.objects.create(
+                yield Schachtgrenze(
                     schachttyp=schachttyp,
                     max_sondenanzahl=max_sondenanzahl,
                     erlaubte_hvb=erlaubte_hvb,
                     hinweis=hinweis
                 )
-                count += 1
-        return count
 
-    def import_schachtkompatibilitaet(self, file_path):
-        """Import Schachtkompatibilitaet data"""
-        Schachtkompatibilitaet.objects.all().delete()
-        count = 0
-        
+    def parse_schachtkompatibilitaet(self, file_path):
+        """Parse Schachtkompatibilitaet data"""
         reader = self.read_csv_file(file_path)
         for row in reader:
-            row = self.clean_row(row)
             if any(row.values()):
                 name = row.get(list(row.keys())[0], '')
                 if name and name.strip():
-                    Schachtkompatibilitaet.objects.create(
+                    yield Schachtkompatibilitaet(
                         name=name,
                         artikelnummer=row.get('Artikelnummer', ''),
                         artikelbezeichnung=row.get('Artikelbezeichnung', ''),
                         menge_statisch=self.safe_decimal(row.get('Menge Statisch')),
                         menge_formel=row.get('Menge Formel', '')
                     )
-                    count += 1
-        return count
 
-    def import_gnx_chamber_articles_csv(self, file_path):
-        """Import GN X chamber articles from CSV file"""
-        GNXChamberArticle.objects.all().delete()
-        
-        count = 0
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    GNXChamberArticle.objects.create(
-                        hvb_size_min=int(row['hvb_size_min']),
-                        hvb_size_max=int(row['hvb_size_max']),
-                        artikelnummer=row['artikelnummer'].strip(),
-                        artikelbezeichnung=row['artikelbezeichnung'].strip()
-                    )
-                    count += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(f'Error importing GN X chamber article {row.get("artikelnummer", "unknown")}: {e}')
-                    )
+    def parse_gnx_chamber_articles_csv(self, file_path):
+        """Parse GN X chamber articles from CSV file"""
         
-        return count
+        for row in self.read_csv_file(file_path):
+            try:
+                article = GNXChamberArticle(
+                    hvb_size_min=int(row['hvb_size_min']),
+                    hvb_size_max=int(row['hvb_size_max']),
+                    artikelnummer=row['artikelnummer'].strip(),
+                    artikelbezeichnung=row['artikelbezeichnung'].strip()
+                )
+            except Exception as e:
+                self.stdout.write(
+                    self.style.WARNING(f'Error importing GN X chamber article {row.get("artikelnummer", "unknown")}: {e}')
+                )
+                continue
+            yield article
 
-    def import_additional_probe_combinations_csv(self, file_path):
-        """Import additional probe combinations from CSV file (only adds if combination doesn't exist)"""
-        from decimal import Decimal
-        
-        added_count = 0
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    # Check if combination already exists
-                    existing = Sondengroesse.objects.filter(
-                        durchmesser_sonde=row['durchmesser_sonde'].strip(),
-                        schachttyp=row['schachttyp'].strip(),
-                        hvb=row['hvb_size'].strip()
-                    ).first()
-                    
-                    if not existing:
-                        Sondengroesse.objects.create(
-                            durchmesser_sonde=row['durchmesser_sonde'].strip(),
-                            artikelnummer=row['artikelnummer'].strip(),
-                            artikelbezeichnung=row['artikelbezeichnung'].strip(),
-                            schachttyp=row['schachttyp'].strip(),
-                            hvb=row['hvb_size'].strip(),
-                            bauform='',
-                            sondenanzahl_min=int(row['sondenanzahl_min']),
-                            sondenanzahl_max=int(row['sondenanzahl_max']),
-                            vorlauf_laenge=Decimal(row['vorlauf_laenge']),
-                            ruecklauf_laenge=Decimal(row['ruecklauf_laenge']),
-                            vorlauf_formel='',
-                            ruecklauf_formel='',
-                            hinweis=''
-                        )
-                        added_count += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(f'Error importing additional probe combination: {e}')
-                    )
-        
-        return added_count
-    
-    def import_gnx_extra_articles_csv(self, file_path):
-        """Import GN X-Series Extra Articles (HVB Stütze) from CSV file"""
-        import re
-        HVBStuetze.objects.all().delete()
+    def parse_additional_probe_combinations_csv(self, file_path):
+        """Parse additional probe combinations from CSV file (only adds if combination doesn't exist)"""
+        # Combinations of the Sondengroesse rows imported in this run, else of the database
+        if self.probe_combinations is not None:
+            existing = self.probe_combinations
+        else:
+            existing = set(Sondengroesse.objects.values_list('durchmesser_sonde', 'schachttyp', 'hvb'))
         
-        count = 0
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            lines = f.readlines()
-            # Skip first line if it's not a proper header
-            start_line = 0
-            if lines and 'Xentral' in lines[0]:
-                start_line = 1
-            
-            # Find the header line (should contain "Nummer" and "Artikel")
-            header_line = None
-            for i in range(start_line, len(lines)):
-                if 'Nummer' in lines[i] and 'Artikel' in lines[i]:
-                    header_line = i
-                    break
-            
-            if header_line is None:
+        for row in self.read_csv_file(file_path):
+            try:
+                # Check if combination already exists
+                combination = (
+                    row['durchmesser_sonde'].strip(),
+                    row['schachttyp'].strip(),
+                    row['hvb_size'].strip(),
+                )
+                if combination in existing:
+                    continue
+                
+                probe = Sondengroesse(
+                    durchmesser_sonde=row['durchmesser_sonde'].strip(),
+                    artikelnummer=row['artikelnummer'].strip(),
+                    artikelbezeichnung=row['artikelbezeichnung'].strip(),
+                    schachttyp=row['schachttyp'].strip(),
+                    hvb=row['hvb_size'].strip(),
+                    bauform='',
+                    sondenanzahl_min=int(row['sondenanzahl_min']),
+                    sondenanzahl_max=int(row['sondenanzahl_max']),
+                    vorlauf_laenge=Decimal(row['vorlauf_laenge']),
+                    ruecklauf_laenge=Decimal(row['ruecklauf_laenge']),
+                    vorlauf_formel='',
+                    ruecklauf_formel='',
+                    hinweis=''
+                )
+            except Exception as e:
                 self.stdout.write(
-                    self.style.ERROR('Could not find header line in GN X-Series Extra Articles CSV')
+                    self.style.WARNING(f'Error importing additional probe combination: {e}')
                 )
-                return 0
-            
-            # Read from the line after the header
-            reader = csv.DictReader(lines[header_line:])
-            for row in reader:
-                try:
-                    artikelnummer = row.get('Nummer', '').strip()
-                    artikel = row.get('Artikel', '').strip()
-                    
-                    if not artikelnummer or not artikel:
-                        continue
-                    
-                    # Skip header rows or invalid entries
-                    if not artikelnummer.isdigit():
-                        continue
-                    
-                    # Parse the Artikel column to extract diameter and position
-                    # Pattern: "GN X - ZUB - Verteiler - Stütze - Oben/Unten - [diameter]"
-                    # Handle both "Oben" and "Unten" (some files use "Unter" but this CSV uses "Unten")
-                    match = re.search(r'Stütze\s*-\s*(Oben|Unten|Unter)\s*-\s*(\d+)', artikel, re.IGNORECASE)
-                    if not match:
-                        self.stdout.write(
-                            self.style.WARNING(f'Could not parse Artikel for {artikelnummer}: {artikel}')
-                        )
-                        continue
-                    
-                    position = match.group(1).strip()
-                    diameter = match.group(2).strip()
-                    
-                    # Normalize position: "Unten" -> "Unter" for consistency
-                    if position.lower() == 'unten':
-                        position = 'Unter'
-                    elif position.lower() == 'oben':
-                        position = 'Oben'
-                    
-                    # Create or update the entry
-                    HVBStuetze.objects.update_or_create(
+                continue
+            existing.add(combination)
+            yield probe
+    
+    def parse_gnx_extra_articles_csv(self, file_path):
+        """Parse GN X-Series Extra Articles (HVB Stütze) from CSV file"""
+        
+        def is_header(line_number, line):
+            # Skip first line if it's not a proper header ("Xentral" export line);
+            # the header line should contain "Nummer" and "Artikel"
+            if line_number == 0 and 'Xentral' in line:
+                return False
+            return 'Nummer' in line and 'Artikel' in line
+        
+        # (hvb_durchmesser, position) -> row; later rows update earlier ones
+        rows = {}
+        lines = self.read_rows(file_path, is_header)
+        header = next(lines, None)
+        if header is None:
+            self.stdout.write(
+                self.style.ERROR('Could not find header line in GN X-Series Extra Articles CSV')
+            )
+            return
+        
+        for values in lines:
+            row = dict(zip(header, values))
+            try:
+                artikelnummer = row.get('Nummer', '').strip()
+                artikel = row.get('Artikel', '').strip()
+                
+                if not artikelnummer or not artikel:
+                    continue
+                
+                # Skip header rows or invalid entries
+                if not artikelnummer.isdigit():
+                    continue
+                
+                # Parse the Artikel column to extract diameter and position
+                # Pattern: "GN X - ZUB - Verteiler - Stütze - Oben/Unten - [diameter]"
+                # Handle both "Oben" and "Unten" (some files use "Unter" but this CSV uses "Unten")
+                match = re.search(r'Stütze\s*-\s*(Oben|Unten|Unter)\s*-\s*(\d+)', artikel, re.IGNORECASE)
+                if not match:
+                    self.stdout.write(
+                        self.style.WARNING(f'Could not parse Artikel for {artikelnummer}: {artikel}')
+                    )
+                    continue
+                
+                position = match.group(1).strip()
+                diameter = match.group(2).strip()
+                
+                # Normalize position: "Unten" -> "Unter" for consistency
+                if position.lower() == 'unten':
+                    position = 'Unter'
+                elif position.lower() == 'oben':
+                    position = 'Oben'
+                
+                # Create or update the entry
+                key = (diameter, position)
+                if key in rows:
+                    rows[key].artikelnummer = artikelnummer
+                    rows[key].artikelbezeichnung = artikel
+                else:
+                    rows[key] = HVBStuetze(
                         hvb_durchmesser=diameter,
                         position=position,
-                        defaults={
-                            'artikelnummer': artikelnummer,
-                            'artikelbezeichnung': artikel
-                        }
+                        artikelnummer=artikelnummer,
+                        artikelbezeichnung=artikel
                     )
-                    count += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(f'Error importing GN X Extra Article {row.get("Nummer", "unknown")}: {e}')
-                    )
-        
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {count} GN X-Series Extra Articles (HVB Stütze)')
-        )
+            except Exception as e:
+                self.stdout.write(
+                    self.style.WARNING(f'Error importing GN X Extra Article {row.get("Nummer", "unknown")}: {e}')
+                )
         
-        return count
\ No newline at end of file
+        yield from rows.values()
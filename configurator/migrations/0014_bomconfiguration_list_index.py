@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0013_bomconfiguration_hvb_stuetze_quantities_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bomconfiguration',
+            index=models.Index(fields=['-created_at', '-id'], name='bomconfig_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:40
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+# Fingerprint fields and hash as of this migration (see models.compute_fingerprint)
+FINGERPRINT_FIELDS = (
+    'schachttyp', 'hvb_size', 'sonden_durchmesser', 'sondenanzahl', 'sondenabstand', 'anschlussart',
+    'bauform', 'kugelhahn_type', 'dfm_type', 'dfm_category', 'dfm_kugelhahn_type',
+)
+BASE_FINGERPRINT_FIELDS = ('schachttyp', 'hvb_size', 'sonden_durchmesser')
+
+
+def compute_fingerprint(values, fields=FINGERPRINT_FIELDS):
+    normalized = []
+    for field in fields:
+        value = values.get(field)
+        if field == 'bauform':
+            value = value or 'I'
+        if field in ('sondenanzahl', 'sondenabstand'):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                pass
+        normalized.append('' if value is None else str(value).strip())
+    return hashlib.sha256(json.dumps(normalized).encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    BOMConfiguration = apps.get_model('configurator', 'BOMConfiguration')
+    batch = []
+    for config in BOMConfiguration.objects.only('id', *FINGERPRINT_FIELDS).iterator(chunk_size=1000):
+        values = {field: getattr(config, field) for field in FINGERPRINT_FIELDS}
+        config.fingerprint = compute_fingerprint(values)
+        config.base_fingerprint = compute_fingerprint(values, BASE_FINGERPRINT_FIELDS)
+        batch.append(config)
+        if len(batch) >= 1000:
+            BOMConfiguration.objects.bulk_update(batch, ['fingerprint', 'base_fingerprint'])
+            batch = []
+    if batch:
+        BOMConfiguration.objects.bulk_update(batch, ['fingerprint', 'base_fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0014_bomconfiguration_list_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bomconfiguration',
+            name='base_fingerprint',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='bomconfiguration',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0015_bomconfiguration_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChildArticleCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mother_article_number', models.CharField(max_length=50, unique=True)),
+                ('last_child_number', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Child Article Counters',
+            },
+        ),
+    ]
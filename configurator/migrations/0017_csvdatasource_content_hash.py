@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0016_childarticlecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatasource',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0018_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bomitem',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bomitem',
+            index=models.Index(fields=['configuration', 'position', 'id'], name='bomitem_config_position_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+# Component tables indexed in the Article table (as of this migration)
+ARTICLE_SOURCE_TABLES = (
+    'Kugelhahn',
+    'DFM',
+    'Entlueftung',
+    'HVBStuetze',
+    'Sondenverschlusskappe',
+    'StumpfschweissEndkappe',
+)
+
+
+def normalize(artikelnummer):
+    # Only the trailing '.0' of Excel float exports is dropped
+    artikelnummer = str(artikelnummer or '').strip()
+    if artikelnummer.endswith('.0'):
+        artikelnummer = artikelnummer[:-2]
+    return artikelnummer
+
+
+def build_article_index(apps, schema_editor):
+    Article = apps.get_model('configurator', 'Article')
+    articles = {}
+    for table in ARTICLE_SOURCE_TABLES:
+        rows = apps.get_model('configurator', table).objects.order_by('pk')
+        for artikelnummer, artikelbezeichnung in rows.values_list('artikelnummer', 'artikelbezeichnung'):
+            number = normalize(artikelnummer)
+            if not number:
+                continue
+            article = articles.get(number)
+            if article is None:
+                articles[number] = Article(
+                    artikelnummer=number,
+                    artikelbezeichnung=artikelbezeichnung or '',
+                    source_tables=table,
+                )
+            elif table not in article.source_tables.split('|'):
+                article.source_tables += f'|{table}'
+    Article.objects.bulk_create(articles.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0019_bomitem_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Article',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artikelnummer', models.CharField(max_length=50, unique=True)),
+                ('artikelbezeichnung', models.CharField(blank=True, default='', max_length=200)),
+                ('source_tables', models.CharField(max_length=200)),
+            ],
+            options={
+                'verbose_name_plural': 'Articles',
+            },
+        ),
+        migrations.RunPython(build_article_index, migrations.RunPython.noop),
+    ]
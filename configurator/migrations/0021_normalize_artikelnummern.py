@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:11
+
+from django.db import migrations
+from django.db.models import F
+
+# Models and their article number fields (as of this migration); the article
+# index is built from normalized numbers already
+ARTICLE_NUMBER_FIELDS = {
+    'Schacht': ('artikelnummer',),
+    'HVB': ('artikelnummer',),
+    'Sondengroesse': ('artikelnummer',),
+    'SondenDurchmesserPipe': ('artikelnummer',),
+    'Kugelhahn': ('artikelnummer',),
+    'DFM': ('artikelnummer',),
+    'Entlueftung': ('artikelnummer',),
+    'Sondenverschlusskappe': ('artikelnummer',),
+    'StumpfschweissEndkappe': ('artikelnummer',),
+    'WPVerschlusskappe': ('artikelnummer',),
+    'WPA': ('artikelnummer',),
+    'Sondenbeschriftung': ('nummer',),
+    'Verrohrung': ('artikelnummer',),
+    'Schachtkompatibilitaet': ('artikelnummer',),
+    'BOMItem': ('artikelnummer',),
+    'GNXChamberArticle': ('artikelnummer',),
+    'HVBStuetze': ('artikelnummer',),
+}
+
+
+def normalize(artikelnummer):
+    # Only the trailing '.0' of Excel float exports is dropped
+    artikelnummer = str(artikelnummer).strip()
+    if artikelnummer.endswith('.0'):
+        artikelnummer = artikelnummer[:-2]
+    return artikelnummer
+
+
+def normalize_artikelnummern(apps, schema_editor):
+    for model_name, fields in ARTICLE_NUMBER_FIELDS.items():
+        model = apps.get_model('configurator', model_name)
+        batch = []
+        for row in model.objects.only('pk', *fields).iterator(chunk_size=1000):
+            changed = False
+            for field in fields:
+                value = getattr(row, field)
+                # Empty values (None or '') stay as they are
+                if value and normalize(value) != value:
+                    setattr(row, field, normalize(value))
+                    changed = True
+            if changed:
+                batch.append(row)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+
+    # Cached catalog snapshots still hold the old numbers
+    CatalogVersion = apps.get_model('configurator', 'CatalogVersion')
+    CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0020_article'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_artikelnummern, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0021_normalize_artikelnummern'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bomitem',
+            index=models.Index(fields=['artikelnummer', 'configuration'], name='bomitem_artikelnummer_idx'),
+        ),
+    ]
@@ -1,20 +1,51 @@
 from django.db import models
+import hashlib
 import json
 import re
 from decimal import Decimal
 
 
 class CSVDataSource(models.Model):
-    """Model to track CSV files and their last modification times"""
+    """Model to track CSV files, their content and last import times"""
     name = models.CharField(max_length=100, unique=True)
     file_path = models.CharField(max_length=500)
     last_modified = models.DateTimeField(auto_now=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # SHA-256 of the imported file
     is_active = models.BooleanField(default=True)
     
     def __str__(self):
         return self.name
 
 
+class CatalogVersion(models.Model):
+    """Single row counting catalog changes (bumped by imports and admin edits)"""
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Katalog v{self.version}"
+    
+    class Meta:
+        verbose_name_plural = "Catalog Version"
+
+
+class Article(models.Model):
+    """Article numbers of all component tables (rebuilt by the CSV import)"""
+    artikelnummer = models.CharField(max_length=50, unique=True)  # Normalized (no '.0' suffix)
+    artikelbezeichnung = models.CharField(max_length=200, blank=True, default='')
+    source_tables = models.CharField(max_length=200)  # e.g. 'Kugelhahn|Entlueftung'
+    
+    def __str__(self):
+        return f"{self.artikelnummer} - {self.artikelbezeichnung}"
+    
+    @property
+    def tables(self):
+        return tuple(self.source_tables.split('|')) if self.source_tables else ()
+    
+    class Meta:
+        verbose_name_plural = "Articles"
+
+
 class Schacht(models.Model):
     """Schacht (Shaft) types from Schacht.csv"""
     schachttyp = models.CharField(max_length=100, unique=True)
@@ -285,6 +316,35 @@ class Schachtkompatibilitaet(models.Model):
         verbose_name_plural = "Schachtkompatibilitäten"
 
 
+# Parameters that define a configuration (two configurations with the same
+# values are the same product) and the subset that defines its mother article
+FINGERPRINT_FIELDS = (
+    'schachttyp', 'hvb_size', 'sonden_durchmesser', 'sondenanzahl', 'sondenabstand', 'anschlussart',
+    'bauform', 'kugelhahn_type', 'dfm_type', 'dfm_category', 'dfm_kugelhahn_type',
+)
+BASE_FINGERPRINT_FIELDS = ('schachttyp', 'hvb_size', 'sonden_durchmesser')
+
+
+def compute_fingerprint(values, fields=FINGERPRINT_FIELDS):
+    """Hash of the normalized ``fields`` of ``values`` (a dict of request data or field values).
+
+    Empty values and None are equal, strings are stripped, counts compare as
+    numbers and a missing bauform is 'I' (the model default).
+    """
+    normalized = []
+    for field in fields:
+        value = values.get(field)
+        if field == 'bauform':
+            value = value or 'I'
+        if field in ('sondenanzahl', 'sondenabstand'):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                pass
+        normalized.append('' if value is None else str(value).strip())
+    return hashlib.sha256(json.dumps(normalized).encode('utf-8')).hexdigest()
+
+
 class BOMConfiguration(models.Model):
     """Main BOM Configuration model"""
     name = models.CharField(max_length=200)
@@ -323,9 +383,29 @@ class BOMConfiguration(models.Model):
     vorlauf_length_per_probe = models.DecimalField(max_digits=10, decimal_places=3, blank=True, null=True)
     ruecklauf_length_per_probe = models.DecimalField(max_digits=10, decimal_places=3, blank=True, null=True)
     hvb_stuetze_quantities = models.JSONField(blank=True, null=True)
+
+    # Hashes of FINGERPRINT_FIELDS / BASE_FINGERPRINT_FIELDS for duplicate and mother article lookups
+    fingerprint = models.CharField(max_length=64, blank=True, default='', db_index=True, editable=False)
+    base_fingerprint = models.CharField(max_length=64, blank=True, default='', db_index=True, editable=False)
     
     def __str__(self):
         return f"{self.name} - {self.schachttyp}"
+
+    @staticmethod
+    def fingerprints_for(values):
+        """(fingerprint, base_fingerprint) of configuration parameters, e.g. request data."""
+        return compute_fingerprint(values), compute_fingerprint(values, BASE_FINGERPRINT_FIELDS)
+
+    def update_fingerprints(self):
+        values = {field: getattr(self, field) for field in FINGERPRINT_FIELDS}
+        self.fingerprint, self.base_fingerprint = self.fingerprints_for(values)
+
+    def save(self, *args, **kwargs):
+        self.update_fingerprints()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'fingerprint', 'base_fingerprint'}
+        super().save(*args, **kwargs)
     
     def calculate_quantities(self):
         """Calculate quantities based on formulas"""
@@ -350,6 +430,22 @@ class BOMConfiguration(models.Model):
     
     class Meta:
         verbose_name_plural = "BOM Configurations"
+        indexes = [
+            # Keyset pagination of the configuration list (newest first)
+            models.Index(fields=['-created_at', '-id'], name='bomconfig_created_id_idx'),
+        ]
+
+
+class ChildArticleCounter(models.Model):
+    """Highest child article number handed out per mother article"""
+    mother_article_number = models.CharField(max_length=50, unique=True)
+    last_child_number = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.mother_article_number}-{self.last_child_number:03d}"
+    
+    class Meta:
+        verbose_name_plural = "Child Article Counters"
 
 
 class BOMItem(models.Model):
@@ -360,12 +456,19 @@ class BOMItem(models.Model):
     menge = models.DecimalField(max_digits=10, decimal_places=3)
     calculated_quantity = models.DecimalField(max_digits=10, decimal_places=3, blank=True, null=True)
     source_table = models.CharField(max_length=50)  # Which CSV/model this item came from
+    position = models.PositiveIntegerField(blank=True, null=True)  # Display order, set when the BOM is generated
     
     def __str__(self):
         return f"{self.artikelnummer} - {self.menge}"
     
     class Meta:
         verbose_name_plural = "BOM Items"
+        indexes = [
+            # Items of a configuration in display order (items added later have no position)
+            models.Index(fields=['configuration', 'position', 'id'], name='bomitem_config_position_idx'),
+            # Where-used lookups: configurations containing an article
+            models.Index(fields=['artikelnummer', 'configuration'], name='bomitem_artikelnummer_idx'),
+        ]
 
 
 class GNXChamberArticle(models.Model):
@@ -0,0 +1,109 @@
+"""Child article numbers per mother article.
+
+``ChildArticleCounter`` holds the highest child number handed out or saved
+for every mother article, so the next number is one row update instead of
+parsing all children of the mother. The counter row is changed with a
+single ``UPDATE ... SET last_child_number = last_child_number + 1`` inside
+a transaction: on PostgreSQL that takes the row lock (like
+``SELECT ... FOR UPDATE``), on SQLite the database write lock, so
+concurrent configurator sessions are serialized and never receive the same
+number.
+
+Numbers are only reserved when a configuration is saved
+(``claim_child_article_number``); the configuration check merely suggests
+the next one with ``peek_child_number``.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from ..models import BOMConfiguration, ChildArticleCounter
+
+
+def parse_child_number(child_article_number):
+    """Numeric part of a child number ('002' or '1000089-002' -> 2), None if not numeric."""
+    child_article_number = (child_article_number or '').strip()
+    try:
+        return int(child_article_number.split('-')[-1])
+    except ValueError:
+        return None
+
+
+def format_child_number(mother_article_number, child_number) -> str:
+    return f"{mother_article_number}-{child_number:03d}"
+
+
+def _highest_saved_child_number(mother_article_number) -> int:
+    numbers = (
+        BOMConfiguration.objects
+        .filter(mother_article_number=mother_article_number)
+        .exclude(child_article_number__isnull=True).exclude(child_article_number='')
+        .values_list('child_article_number', flat=True)
+    )
+    return max((n for n in map(parse_child_number, numbers) if n is not None), default=0)
+
+
+def _update_counter(mother_article_number, value) -> int:
+    """Apply ``value`` (an expression over ``last_child_number``) and return the new number.
+
+    Creates the counter on first use, starting from the highest child number
+    saved before counters existed.
+    """
+    with transaction.atomic():
+        counters = ChildArticleCounter.objects.filter(mother_article_number=mother_article_number)
+        if not counters.update(last_child_number=value):
+            try:
+                with transaction.atomic():
+                    ChildArticleCounter.objects.create(
+                        mother_article_number=mother_article_number,
+                        last_child_number=_highest_saved_child_number(mother_article_number),
+                    )
+            except IntegrityError:
+                # Created concurrently; the update below waits for that transaction
+                pass
+            counters.update(last_child_number=value)
+        return counters.values_list('last_child_number', flat=True).get()
+
+
+def peek_child_number(mother_article_number) -> int:
+    """Next child number of a mother article, without reserving it (read-only)."""
+    last_child_number = (
+        ChildArticleCounter.objects
+        .filter(mother_article_number=mother_article_number)
+        .values_list('last_child_number', flat=True)
+        .first()
+    )
+    if last_child_number is None:
+        last_child_number = _highest_saved_child_number(mother_article_number)
+    return last_child_number + 1
+
+
+def allocate_child_number(mother_article_number) -> int:
+    """Reserve and return the next child number of a mother article."""
+    return _update_counter(mother_article_number, F('last_child_number') + 1)
+
+
+def register_child_number(mother_article_number, child_number) -> int:
+    """Make sure ``child_number`` (e.g. entered by hand) is never allocated again."""
+    return _update_counter(mother_article_number, Greatest(F('last_child_number'), child_number))
+
+
+def claim_child_article_number(config):
+    """Keep the counter in sync with a configuration that is about to be saved.
+
+    A configuration of an existing mother article without child number gets
+    the next free one; a given child number is registered with the counter.
+    """
+    mother_article_number = config.mother_article_number
+    if not mother_article_number:
+        return
+    if not config.child_article_number:
+        child_number = allocate_child_number(mother_article_number)
+        config.child_article_number = f"{child_number:03d}"
+        config.full_article_number = config.full_article_number or format_child_number(
+            mother_article_number, child_number
+        )
+        return
+    child_number = parse_child_number(config.child_article_number)
+    if child_number is not None:
+        register_child_number(mother_article_number, child_number)
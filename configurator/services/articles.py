@@ -0,0 +1,78 @@
+"""Materialized index of the article numbers in the component tables.
+
+GN X chamber articles are only offered and added to a BOM if their number
+exists in one of the component tables (Kugelhahn, DFM, Entlüftung, HVB
+Stütze, Sondenverschlusskappe, Stumpfschweiß-Endkappe). Instead of collecting
+and normalizing the numbers of all six tables for these checks,
+``rebuild_article_index()`` writes them into the ``Article`` table once: one
+row per number (normalized with ``utils.format_artikelnummer``, like the
+stored numbers) with its description and source tables. The CSV
+import rebuilds it after importing any of these tables, admin edits through
+``configurator.signals``.
+
+The catalog snapshot keeps the index in memory (``CatalogSnapshot.article``
+and ``is_article``), so validating a number costs no query.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from django.apps import apps
+
+from ..models import Article
+from ..utils import format_artikelnummer
+from .catalog import get_catalog
+from .catalog_import import BULK_BATCH_SIZE
+
+# Component tables (model names) whose article numbers are indexed
+ARTICLE_SOURCE_TABLES = (
+    'Kugelhahn',
+    'DFM',
+    'Entlueftung',
+    'HVBStuetze',
+    'Sondenverschlusskappe',
+    'StumpfschweissEndkappe',
+)
+
+
+def rebuild_article_index() -> int:
+    """Rewrite the ``Article`` table from the component tables and return its size.
+
+    The first description found for a number is kept (tables in
+    ``ARTICLE_SOURCE_TABLES`` order, rows by pk).
+    """
+    articles: Dict[str, Article] = {}
+    for table in ARTICLE_SOURCE_TABLES:
+        rows = apps.get_model('configurator', table).objects.order_by('pk')
+        for artikelnummer, artikelbezeichnung in rows.values_list('artikelnummer', 'artikelbezeichnung'):
+            number = format_artikelnummer(artikelnummer)
+            if not number:
+                continue
+            article = articles.get(number)
+            if article is None:
+                articles[number] = Article(
+                    artikelnummer=number,
+                    artikelbezeichnung=artikelbezeichnung or '',
+                    source_tables=table,
+                )
+            elif table not in article.source_tables.split('|'):
+                article.source_tables += f'|{table}'
+
+    Article.objects.all().delete()
+    Article.objects.bulk_create(articles.values(), batch_size=BULK_BATCH_SIZE)
+    return len(articles)
+
+
+def validate_articles(numbers: Iterable[str], tables: Optional[Iterable[str]] = None, catalog=None) -> List[dict]:
+    """Index entry and validity of each article number (limited to ``tables`` when given)."""
+    catalog = catalog or get_catalog()
+    tables = tuple(tables) if tables else None
+    results = []
+    for number in numbers:
+        article = catalog.article(number)
+        results.append({
+            'artikelnummer': number,
+            'valid': catalog.is_article(number, tables),
+            'normalized': article.artikelnummer if article else format_artikelnummer(number),
+            'artikelbezeichnung': article.artikelbezeichnung if article else None,
+            'source_tables': list(article.tables) if article else [],
+        })
+    return results
@@ -0,0 +1,834 @@
+"""BOM generation pipeline shared by the generate, preview and batch endpoints.
+
+``parse_configuration`` turns request data into an unsaved ``BOMConfiguration``,
+``build_bom`` runs all BOM rules against the catalog snapshot entirely in
+memory and returns a ``GeneratedBOM``; nothing touches the database until
+``GeneratedBOM.save()`` is called. ``build_bom_cached`` wraps ``build_bom``
+with a result cache (Django cache framework) keyed by the normalized BOM
+inputs and the catalog version.
+"""
+import hashlib
+import json
+import logging
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.functions import Lower
+
+from ..models import BOMConfiguration, BOMItem, GNXChamberArticle, GNXChamberConfiguration
+from ..utils import calculate_formula
+from . import bom_rules
+from .article_numbers import claim_child_article_number
+from .catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+
+class BOMRequestError(Exception):
+    """Invalid BOM request; ``error``/``message`` are returned to the client as-is."""
+
+    def __init__(self, error, message, status=200):
+        super().__init__(error)
+        self.error = error
+        self.message = message
+        self.status = status
+
+
+BOM_SOURCE_SORT_PRIORITY = {
+    'Schacht': 0,
+    'HVB': 1,
+    'Sondengroesse': 2,
+    'Sonden-Durchmesser': 2,
+    'WP-Rohr': 98,
+    'Entlüftung': 99,
+}
+BOM_DEFAULT_PRIORITY = 50
+
+
+def bom_sort_key(source_table, original_index, artikelnummer=None, schachttyp=None):
+    """
+    Return a tuple for stable sorting of BOM items by source_table priority.
+
+    Special rule for Sondenbeschriftung article 2002024 (Schilder Ø 80 mm Erdwärmesonde):
+    - If Schachttyp == \"Verteiler\": always first position (priority -1).
+    - If a chamber/manhole is selected (any other Schachttyp): always directly
+      after the Schacht article (priority 0.5, between Schacht (0) and HVB (1)).
+    """
+    priority = float(BOM_SOURCE_SORT_PRIORITY.get(source_table, BOM_DEFAULT_PRIORITY))
+
+    if artikelnummer == '2002024' and source_table == 'Sondenbeschriftung':
+        if schachttyp == 'Verteiler':
+            priority = -1.0
+        else:
+            priority = 0.5
+
+    return (priority, original_index)
+
+
+def order_bom_items(items, schachttyp, fields):
+    """Return ``items`` in display order.
+
+    ``fields(item)`` returns ``(source_table, artikelnummer, artikelbezeichnung)``
+    so the same ordering applies to BOMItem rows and to JSON dicts.
+
+    Sort: Schacht → (optional) Sondenbeschriftung 2002024 → HVB → Sonden →
+    middle articles → WP-Rohr/Entlüftung, then block ordering:
+    - GNX (HVB Stütze / GNXChamberArticle) directly before the Rohr block.
+    - Rohr - PE 100-RC (from HVB/Sonden*) directly before WP-Rohr (if present),
+      otherwise it is the last block.
+    - WP-Rohr is always the last group.
+    """
+    keyed = []
+    for idx, item in enumerate(items):
+        source, artikelnummer, _ = fields(item)
+        keyed.append((bom_sort_key(source, idx, artikelnummer=artikelnummer, schachttyp=schachttyp), item))
+    keyed.sort(key=lambda pair: pair[0])
+
+    rohr_items = []
+    wp_rohr_items = []
+    gnx_items = []
+    other_items = []
+    for _, item in keyed:
+        source, _, bezeichnung = fields(item)
+        source = source or ''
+        bezeichnung = bezeichnung or ''
+        if source in ['HVB', 'Sondengroesse', 'Sonden-Durchmesser'] and bezeichnung.startswith('Rohr - PE 100-RC'):
+            rohr_items.append(item)
+        elif source == 'WP-Rohr':
+            wp_rohr_items.append(item)
+        elif source in ['HVB Stütze', 'GNXChamberArticle']:
+            gnx_items.append(item)
+        else:
+            other_items.append(item)
+    return other_items + gnx_items + rohr_items + wp_rohr_items
+
+
+def bom_item_fields(item):
+    """``order_bom_items`` accessor for BOMItem rows."""
+    return item.source_table, item.artikelnummer, item.artikelbezeichnung
+
+
+def assign_positions(items, schachttyp):
+    """Set ``position`` on BOMItem rows to their display order."""
+    for position, item in enumerate(order_bom_items(items, schachttyp, bom_item_fields)):
+        item.position = position
+
+
+def ordered_bom_items(items, schachttyp):
+    """BOMItem rows read in ``(position, id)`` order, in display order.
+
+    Items saved before positions existed or added by hand have no position;
+    if there are any, the rows are sorted as at generation time instead.
+    """
+    items = list(items)
+    if any(item.position is None for item in items):
+        items.sort(key=lambda item: item.id)
+        return order_bom_items(items, schachttyp, bom_item_fields)
+    return items
+
+
+def calculate_hvb_length(config):
+    """Calculate HVB length using correct formulas:
+    Einseitig (one-sided): ((X-1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
+    Beidseitig (two-sided): ((X/2 - 1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
+
+    Where:
+    - X = sondenanzahl (number of probes)
+    - 100 = constant (NOT sondenabstand)
+    - Zuschlag 1 = zuschlag_links
+    - Zuschlag 2 = zuschlag_rechts
+    """
+    try:
+        sondenanzahl = Decimal(config.sondenanzahl)
+        zuschlag_links = Decimal(config.zuschlag_links or 100)
+        zuschlag_rechts = Decimal(config.zuschlag_rechts or 100)
+        anschlussart = str(config.anschlussart or 'einseitig').strip().lower()
+    except Exception:
+        return None
+
+    if sondenanzahl <= 1:
+        return None
+
+    # Constant value: 100 (NOT sondenabstand)
+    constant = Decimal('100')
+
+    # Apply formula based on anschlussart
+    if anschlussart == 'einseitig':
+        # Einseitig: ((X-1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
+        base = (sondenanzahl - 1) * constant
+        total_mm = (base + zuschlag_links + zuschlag_rechts) * Decimal('2')
+    elif anschlussart == 'beidseitig':
+        # Beidseitig: ((X/2 - 1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
+        half_probes = sondenanzahl / Decimal('2')
+        base = (half_probes - 1) * constant
+        total_mm = (base + zuschlag_links + zuschlag_rechts) * Decimal('2')
+    else:
+        # Default to einseitig if unknown
+        base = (sondenanzahl - 1) * constant
+        total_mm = (base + zuschlag_links + zuschlag_rechts) * Decimal('2')
+
+    if total_mm <= 0:
+        return None
+    return total_mm / Decimal('1000')
+
+
+
+def parse_configuration(data):
+    """Validate request data and return an unsaved BOMConfiguration.
+
+    Raises BOMRequestError for missing or invalid fields.
+    """
+    # Validate required fields (check for None, not falsy values, since 0 is valid)
+    required_fields = ['schachttyp', 'hvb_size', 'sonden_durchmesser', 'sondenanzahl', 'sondenabstand', 'anschlussart']
+    missing_fields = [field for field in required_fields if data.get(field) is None or data.get(field) == '']
+    if missing_fields:
+        raise BOMRequestError(
+            f'Fehlende Pflichtfelder: {", ".join(missing_fields)}',
+            f'Bitte füllen Sie alle Pflichtfelder aus: {", ".join(missing_fields)}',
+        )
+
+    # Safely convert to int with defaults
+    sondenanzahl = data.get('sondenanzahl', 0)
+    sondenabstand = data.get('sondenabstand', 0)
+    zuschlag_links = data.get('zuschlag_links', 100)
+    zuschlag_rechts = data.get('zuschlag_rechts', 100)
+    wp_pipe_length_raw = data.get('wp_pipe_length')
+
+    try:
+        sondenanzahl = int(sondenanzahl) if sondenanzahl else 0
+        sondenabstand = int(sondenabstand) if sondenabstand else 0
+        zuschlag_links = int(zuschlag_links) if zuschlag_links else 100
+        zuschlag_rechts = int(zuschlag_rechts) if zuschlag_rechts else 100
+    except (ValueError, TypeError) as e:
+        raise BOMRequestError(
+            f'Ungültige Zahlenwerte: {str(e)}',
+            'Bitte überprüfen Sie die eingegebenen Zahlenwerte.',
+        )
+
+    # Handle article number logic
+    mother_article_number = (data.get('mother_article_number', '') or '').strip()
+    child_article_number = (data.get('child_article_number', '') or '').strip()
+    full_article_number = (data.get('full_article_number', '') or '').strip()
+
+    # If child_article_number is provided in format "1000089-002", extract mother and child
+    if child_article_number and '-' in child_article_number:
+        parts = child_article_number.split('-', 1)
+        if not mother_article_number:
+            mother_article_number = parts[0]
+        if len(parts) > 1:
+            child_article_number = parts[1]
+        if not full_article_number:
+            full_article_number = child_article_number  # Use the full format provided
+
+    # If full_article_number is provided in format "1000089-002", extract mother and child
+    if full_article_number and '-' in full_article_number and not mother_article_number:
+        parts = full_article_number.split('-', 1)
+        mother_article_number = parts[0]
+        if len(parts) > 1:
+            child_article_number = parts[1]
+
+    # If we have mother and child, construct full_article_number
+    if mother_article_number and child_article_number and not full_article_number:
+        full_article_number = f"{mother_article_number}-{child_article_number}"
+
+    # Parse optional per-probe lengths
+    vorlauf_raw = data.get('vorlauf_length_per_probe')
+    ruecklauf_raw = data.get('ruecklauf_length_per_probe')
+    vorlauf_val = None
+    ruecklauf_val = None
+    if vorlauf_raw not in (None, '', 'null'):
+        try:
+            vorlauf_val = Decimal(str(vorlauf_raw))
+        except Exception:
+            pass
+    if ruecklauf_raw not in (None, '', 'null'):
+        try:
+            ruecklauf_val = Decimal(str(ruecklauf_raw))
+        except Exception:
+            pass
+
+    # Parse WP diameter and pipe length
+    wp_diameter_str = (data.get('wp_diameter') or '').strip()
+    wp_pipe_length = None
+    if wp_diameter_str:
+        if wp_pipe_length_raw in (None, '', 'null'):
+            wp_pipe_length = Decimal('1')
+        else:
+            try:
+                wp_pipe_length = Decimal(str(wp_pipe_length_raw))
+            except Exception:
+                wp_pipe_length = Decimal('1')
+
+    # Parse HVB Stütze custom quantities
+    hvb_stuetze_data = data.get('hvb_stuetze_articles') or None
+
+    # Build BOM configuration (not saved yet)
+    config = BOMConfiguration(
+        name=data.get('configuration_name', 'Neue Konfiguration'),
+        schachttyp=data.get('schachttyp'),
+        hvb_size=data.get('hvb_size'),
+        sonden_durchmesser=data.get('sonden_durchmesser'),
+        sondenanzahl=sondenanzahl,
+        sondenabstand=sondenabstand,
+        anschlussart=data.get('anschlussart'),
+        kugelhahn_type=data.get('kugelhahn_type', '') or None,
+        dfm_type=data.get('dfm_type', '') or None,
+        dfm_category=data.get('dfm_category', '') or None,
+        dfm_kugelhahn_type=data.get('dfm_kugelhahn_type', '') or None,
+        bauform=data.get('bauform', 'I') or 'I',
+        mother_article_number=mother_article_number or None,
+        child_article_number=child_article_number or None,
+        full_article_number=full_article_number or None,
+        zuschlag_links=zuschlag_links,
+        zuschlag_rechts=zuschlag_rechts,
+        wp_diameter_value=wp_diameter_str or None,
+        wp_pipe_length_value=wp_pipe_length,
+        vorlauf_length_per_probe=vorlauf_val,
+        ruecklauf_length_per_probe=ruecklauf_val,
+        hvb_stuetze_quantities=hvb_stuetze_data,
+    )
+    # Attach runtime attributes for BOM rule processing
+    config.wp_diameter = wp_diameter_str
+    config.wp_pipe_length = wp_pipe_length
+    return config
+
+
+def _duplicate_article_number_error(full_article_number):
+    return BOMRequestError(
+        'Artikelnummer bereits vergeben',
+        f'Diese Artikelnummer \"{full_article_number}\" wird bereits von einer anderen Konfiguration verwendet. '
+        'Bitte wählen Sie eine andere Artikelnummer.',
+        status=400,
+    )
+
+
+def ensure_article_number_available(config):
+    """Raise BOMRequestError if the configuration's article number is already taken."""
+    full_article_number = config.full_article_number
+    # Enforce uniqueness of article numbers across all BOM configurations
+    # Double article numbers cause problems in downstream ERP systems, so we block them here.
+    if full_article_number:
+        # Case-insensitive check to avoid duplicates that differ only by casing/whitespace
+        if BOMConfiguration.objects.filter(full_article_number__iexact=full_article_number).exists():
+            raise _duplicate_article_number_error(full_article_number)
+
+
+class GeneratedBOM:
+    """Result of ``build_bom``: the configuration with its unsaved items."""
+
+    def __init__(self, config, items, gnx_configurations):
+        self.config = config
+        self.items = items
+        self.gnx_configurations = gnx_configurations
+        # Display order is stored with the items, so views and exports read them sorted
+        assign_positions(items, config.schachttyp)
+
+    def to_cache(self):
+        """Plain, picklable representation of the items for the result cache."""
+        return {
+            'items': [
+                (
+                    item.artikelnummer,
+                    item.artikelbezeichnung,
+                    item.menge,
+                    item.calculated_quantity,
+                    item.source_table,
+                    getattr(item, '_is_finalized', None),
+                )
+                for item in self.items
+            ],
+            'gnx_configurations': [
+                (gnx.gnx_article_id, gnx.custom_quantity) for gnx in self.gnx_configurations
+            ],
+        }
+
+    @classmethod
+    def from_cache(cls, config, cached):
+        """Rebuild unsaved items for ``config`` from ``to_cache()`` output."""
+        items = []
+        for artikelnummer, artikelbezeichnung, menge, calculated, source_table, is_finalized in cached['items']:
+            item = BOMItem(
+                configuration=config,
+                artikelnummer=artikelnummer,
+                artikelbezeichnung=artikelbezeichnung,
+                menge=menge,
+                calculated_quantity=calculated,
+                source_table=source_table,
+            )
+            if is_finalized is not None:
+                item._is_finalized = is_finalized
+            items.append(item)
+        gnx_configurations = [
+            GNXChamberConfiguration(bom_configuration=config, gnx_article_id=article_id, custom_quantity=quantity)
+            for article_id, quantity in cached['gnx_configurations']
+        ]
+        return cls(config, items, gnx_configurations)
+
+    def save(self):
+        """Persist configuration, GN X selections and all BOM items in one transaction."""
+        with transaction.atomic():
+            claim_child_article_number(self.config)
+            self.config.save()
+            GNXChamberConfiguration.objects.bulk_create(self.gnx_configurations)
+            BOMItem.objects.bulk_create(self.items)
+
+    def bom_data(self):
+        """BOM items as JSON-serializable dicts, in display order."""
+        # Prepare response data
+        bom_data = []
+        for item in sorted(self.items, key=lambda item: item.position):
+            # Convert Decimal to float for JSON serialization to avoid any scaling issues
+            menge_value = float(item.menge)
+            logger.debug(
+                'JSON: Article %s, Menge in DB: %s, Float: %s, Source: %s',
+                item.artikelnummer, item.menge, menge_value, item.source_table,
+            )
+
+            # Check if item is finalized
+            is_finalized = False
+            if hasattr(item, '_is_finalized'):
+                is_finalized = item._is_finalized
+            elif item.source_table in ['Schacht', 'HVB', 'HVB Stütze']:
+                # Schacht, HVB, and HVB Stütze are finalized (correct based on selections)
+                is_finalized = True
+
+            bom_data.append({
+                'artikelnummer': item.artikelnummer,
+                'artikelbezeichnung': item.artikelbezeichnung,
+                'menge': menge_value,  # Use float instead of string to ensure correct serialization
+                'source': item.source_table,
+                'is_finalized': is_finalized
+            })
+        return bom_data
+
+
+def build_bom(config, data, catalog=None):
+    """Run the complete BOM pipeline for ``config`` without writing to the database.
+
+    ``data`` is the request payload (probe length overrides, GN X articles and
+    HVB Stütze quantities are read from it).
+    """
+    # Calculate context for formulas
+    calc_context = config.calculate_quantities()
+
+    # All catalog lookups below read from the in-memory snapshot
+    catalog = catalog or get_catalog()
+
+    bom_items = []
+    gnx_configurations = []
+
+    # Add Schacht item (FINALIZED - correct based on Schachttyp selection)
+    schacht = catalog.schacht(config.schachttyp)
+    # Skip placeholder rows without a real article number (e.g. "-" in CSV)
+    if schacht and schacht.artikelnummer and str(schacht.artikelnummer).strip() not in ('', '-'):
+        quantity = schacht.menge_statisch or Decimal('1')
+        if schacht.menge_formel:
+            calculated = calculate_formula(schacht.menge_formel, calc_context)
+            if calculated is not None:
+                quantity = calculated
+
+        bom_item = BOMItem(
+            configuration=config,
+            artikelnummer=schacht.artikelnummer or '',
+            artikelbezeichnung=schacht.artikelbezeichnung,
+            menge=quantity,
+            source_table='Schacht'
+        )
+        bom_items.append(bom_item)
+
+    # Add HVB item (FINALIZED - correct based on HVB-Größe selection)
+    hvb = catalog.hvb(config.hvb_size)
+    if hvb:
+        quantity = hvb.menge_statisch or Decimal('1')
+        calculated = None
+        length = calculate_hvb_length(config)
+        if length is not None:
+            quantity = length
+            calculated = length * Decimal('1000')
+        elif hvb.menge_formel:
+            calculated_value = calculate_formula(hvb.menge_formel, calc_context)
+            if calculated_value is not None:
+                quantity = calculated_value / Decimal('1000')
+                calculated = calculated_value
+
+        # Use plain artikelbezeichnung without dimension information
+        artikelbezeichnung = hvb.artikelbezeichnung
+
+        bom_item = BOMItem(
+            configuration=config,
+            artikelnummer=hvb.artikelnummer,
+            artikelbezeichnung=artikelbezeichnung,
+            menge=quantity,
+            calculated_quantity=calculated if hvb.menge_formel else None,
+            source_table='HVB'
+        )
+        bom_items.append(bom_item)
+
+    # Add Sonden items (probe pipes)
+    # Dynamic selection: Match by probe diameter and schachttyp/HVB/bauform/sondenanzahl range
+    # Step 1: Try to find a record that matches ALL criteria (schachttyp, HVB, bauform, sondenanzahl range)
+    # Step 2: Fall back to just probe diameter + schachttyp if no full match
+    sondenanzahl = config.sondenanzahl or 0
+    bauform_raw = str(config.bauform or '').strip()
+    # Normalize bauform: extract just the letter (e.g. "I-Form (einseitig)" -> "I", "U" -> "U")
+    bauform_letter = ''
+    if bauform_raw:
+        bauform_letter = bauform_raw[0].upper() if bauform_raw else ''
+
+    # Best match: sondenanzahl within the allowed range, else the first row
+    # with an article number (see CompatibilityMatrix.probe_article)
+    best_match = catalog.compatibility.probe_article(
+        config.schachttyp, str(config.sonden_durchmesser), str(config.hvb_size), bauform_letter, sondenanzahl,
+    )
+
+    # If we found a match, add it to BOM
+    if best_match and best_match.artikelnummer:
+        # Calculate quantities based on Vorlauf/Rücklauf
+        # These are per-sonde lengths, so multiply by sondenanzahl
+        vorlauf_qty = best_match.vorlauf_laenge or Decimal('0')
+        ruecklauf_qty = best_match.ruecklauf_laenge or Decimal('0')
+
+        # Optional overrides from UI (per-probe lengths in meters)
+        user_vorlauf = data.get('vorlauf_length_per_probe')
+        user_ruecklauf = data.get('ruecklauf_length_per_probe')
+
+        if user_vorlauf not in (None, '', 'null'):
+            try:
+                vorlauf_qty = Decimal(str(user_vorlauf))
+            except Exception:
+                pass
+
+        if user_ruecklauf not in (None, '', 'null'):
+            try:
+                ruecklauf_qty = Decimal(str(user_ruecklauf))
+            except Exception:
+                pass
+
+        # If no UI override, still allow CSV formulas
+        if best_match.vorlauf_formel and (user_vorlauf in (None, '', 'null')):
+            calculated = calculate_formula(best_match.vorlauf_formel, calc_context)
+            if calculated is not None:
+                vorlauf_qty = calculated
+
+        if best_match.ruecklauf_formel and (user_ruecklauf in (None, '', 'null')):
+            calculated = calculate_formula(best_match.ruecklauf_formel, calc_context)
+            if calculated is not None:
+                ruecklauf_qty = calculated
+
+        # Multiply by sondenanzahl to get total length for all sonden
+        total_qty = (vorlauf_qty + ruecklauf_qty) * Decimal(str(config.sondenanzahl))
+        logger.debug(
+            'Sonden: Artikel=%s, Vorlauf=%s, Ruecklauf=%s, Sondenanzahl=%s, Total=%s',
+            best_match.artikelnummer, vorlauf_qty, ruecklauf_qty, config.sondenanzahl, total_qty,
+        )
+
+        if total_qty > 0:
+            bom_item = BOMItem(
+                configuration=config,
+                artikelnummer=best_match.artikelnummer,
+                artikelbezeichnung=best_match.artikelbezeichnung,
+                menge=total_qty,
+                source_table='Sondengroesse'
+            )
+            logger.debug('BOMItem built: Menge=%s, Type=%s', bom_item.menge, type(bom_item.menge))
+            bom_items.append(bom_item)
+
+    # Fallback: If no match found in Sondengroesse (or match has no artikelnummer), use Sonden-Durchmesser.csv pipe articles
+    if not best_match or not best_match.artikelnummer:
+        sonden_durchmesser_clean = str(config.sonden_durchmesser or "").strip()
+        if sonden_durchmesser_clean:
+            # Remove 'mm' suffix if present
+            if sonden_durchmesser_clean.lower().endswith('mm'):
+                sonden_durchmesser_clean = sonden_durchmesser_clean[:-2].strip()
+
+            pipe = catalog.sonden_pipe(sonden_durchmesser_clean)
+            if pipe and pipe.artikelnummer:
+                # Calculate quantity: use sondenanzahl * default length per probe
+                # Default: assume 0.5m per probe (vorlauf + ruecklauf combined)
+                sondenanzahl = config.sondenanzahl or 0
+                if sondenanzahl > 0:
+                    default_length_per_probe = Decimal('0.5')  # meters
+                    total_qty = default_length_per_probe * Decimal(str(sondenanzahl))
+
+                    if total_qty > 0:
+                        bom_item = BOMItem(
+                            configuration=config,
+                            artikelnummer=pipe.artikelnummer,
+                            artikelbezeichnung=pipe.artikelbezeichnung,
+                            menge=total_qty,
+                            source_table='Sonden-Durchmesser'
+                        )
+                        bom_items.append(bom_item)
+
+    # Handle GN X chamber articles if applicable
+    if config.schachttyp in ['GN X1', 'GN X2', 'GN X3', 'GN X4']:
+        gnx_articles_data = data.get('gnx_articles', [])
+        for article_data in gnx_articles_data:
+            article_id = article_data.get('id')
+            custom_quantity = Decimal(str(article_data.get('quantity', 1)))
+
+            try:
+                gnx_article = catalog.gnx_article(article_id)
+                if gnx_article is None:
+                    raise GNXChamberArticle.DoesNotExist
+
+                # Validate article number exists in product data (article index)
+                if not catalog.is_article(gnx_article.artikelnummer):
+                    # Skip invalid articles - they don't exist in product data
+                    continue
+
+                # Create GN X chamber configuration
+                gnx_configurations.append(GNXChamberConfiguration(
+                    bom_configuration=config,
+                    gnx_article=gnx_article,
+                    custom_quantity=custom_quantity
+                ))
+
+                # Add to BOM items
+                bom_item = BOMItem(
+                    configuration=config,
+                    artikelnummer=gnx_article.artikelnummer,
+                    artikelbezeichnung=gnx_article.artikelbezeichnung,
+                    menge=custom_quantity,
+                    source_table='GNXChamberArticle'
+                )
+                bom_items.append(bom_item)
+            except GNXChamberArticle.DoesNotExist:
+                # Skip if article doesn't exist
+                continue
+
+    # Use rule-based builders for all configurations
+    additional_components = []
+    # Get custom HVB Stuetze quantities from request
+    hvb_stuetze_quantities = data.get('hvb_stuetze_articles', {})
+    additional_components.extend(bom_rules.build_hvb_stuetze_components(config, hvb_stuetze_quantities, catalog=catalog))
+    additional_components.extend(bom_rules.build_kugelhahn_components(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_dfm_kugelhahn_components(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_plastic_dfm_components(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_sondenverschlusskappen(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_sondenbeschriftung(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_stumpfschweiss_endkappen(config, catalog=catalog))
+    additional_components.extend(bom_rules.build_wp_components(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_entlueftung_components(config, calc_context, catalog=catalog))
+    additional_components.extend(bom_rules.build_manifold_components(config))
+
+    component_map = {}
+    for component in additional_components:
+        # Use both artikelnummer and source_table as key to keep different sources separate
+        # This ensures "Kugelhahn" and "D-Kugelhahn" items are distinguished even if same article
+        source = component.get('source_table', component.get('source', 'Unknown'))
+        key = f"{component['artikelnummer']}::{source}"
+
+        if key in component_map:
+            component_map[key]['menge'] += component['menge']
+            # Preserve finalized flag if any component is finalized
+            if component.get('is_finalized', False):
+                component_map[key]['is_finalized'] = True
+        else:
+            component_map[key] = {
+                'artikelnummer': component['artikelnummer'],
+                'artikelbezeichnung': component['artikelbezeichnung'],
+                'menge': component['menge'],
+                'source_table': source,
+                'is_finalized': component.get('is_finalized', False)
+            }
+
+    # Ensure certain component groups always appear at the bottom of the BOM (and exports).
+    # This preserves the relative order within each group.
+    bottom_sources = {
+        "HVB Stütze",
+        "Sondenbeschriftung",
+    }
+    components_in_order = list(component_map.values())
+    components_in_order.sort(key=lambda c: (c.get("source_table") in bottom_sources))
+
+    for component in components_in_order:
+        bom_item = BOMItem(
+            configuration=config,
+            artikelnummer=component['artikelnummer'],
+            artikelbezeichnung=component['artikelbezeichnung'],
+            menge=component['menge'],
+            source_table=component['source_table']
+        )
+        bom_items.append(bom_item)
+        # Store is_finalized flag for JSON response (we'll add it to bom_data later)
+        bom_item._is_finalized = component.get('is_finalized', False)
+
+    return GeneratedBOM(config, bom_items, gnx_configurations)
+
+
+BOM_CACHE_PREFIX = 'bom-result:v1:'
+
+
+def _raw_length(value):
+    """Probe length override as the pipeline sees it (unset or its string form)."""
+    if value in (None, '', 'null'):
+        return None
+    return str(value)
+
+
+def bom_cache_key(config, data, catalog_version):
+    """Canonical hash of everything the BOM depends on, plus the catalog version.
+
+    Name and article numbers are deliberately left out: they don't change the
+    BOM items, so configurations that differ only there share one entry.
+    """
+    params = {
+        'schachttyp': config.schachttyp,
+        'hvb_size': config.hvb_size,
+        'sonden_durchmesser': config.sonden_durchmesser,
+        'sondenanzahl': config.sondenanzahl,
+        'sondenabstand': config.sondenabstand,
+        'anschlussart': config.anschlussart,
+        'kugelhahn_type': config.kugelhahn_type,
+        'dfm_type': config.dfm_type,
+        'dfm_category': config.dfm_category,
+        'dfm_kugelhahn_type': config.dfm_kugelhahn_type,
+        'bauform': config.bauform,
+        'zuschlag_links': config.zuschlag_links,
+        'zuschlag_rechts': config.zuschlag_rechts,
+        'wp_diameter': config.wp_diameter,
+        'wp_pipe_length': config.wp_pipe_length,
+        'vorlauf_length_per_probe': _raw_length(data.get('vorlauf_length_per_probe')),
+        'ruecklauf_length_per_probe': _raw_length(data.get('ruecklauf_length_per_probe')),
+        'gnx_articles': [
+            (str(article.get('id')), str(article.get('quantity', 1)))
+            for article in (data.get('gnx_articles') or [])
+        ],
+        'hvb_stuetze_articles': data.get('hvb_stuetze_articles') or {},
+    }
+    payload = json.dumps([catalog_version, params], sort_keys=True, default=str)
+    return BOM_CACHE_PREFIX + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_bom_cached(config, data, catalog=None):
+    """``build_bom`` with a result cache.
+
+    A catalog re-import changes the catalog version and therefore every key,
+    so stale entries are never read and simply expire.
+    """
+    catalog = catalog or get_catalog()
+    key = bom_cache_key(config, data, catalog.version)
+    cached = cache.get(key)
+    if cached is not None:
+        return GeneratedBOM.from_cache(config, cached)
+
+    bom = build_bom(config, data, catalog=catalog)
+    cache.set(key, bom.to_cache())
+    return bom
+
+
+# -- batch generation ---------------------------------------------------------
+
+def taken_article_numbers(full_article_numbers):
+    """Lowercased article numbers from ``full_article_numbers`` that are already in use."""
+    lowered = {number.lower() for number in full_article_numbers if number}
+    if not lowered:
+        return set()
+    return set(
+        BOMConfiguration.objects
+        .annotate(article_number_lower=Lower('full_article_number'))
+        .filter(article_number_lower__in=lowered)
+        .values_list('article_number_lower', flat=True)
+    )
+
+
+def save_boms(boms):
+    """Persist many generated BOMs in one transaction with bulk inserts."""
+    with transaction.atomic():
+        configs = [bom.config for bom in boms]
+        for config in configs:
+            claim_child_article_number(config)
+        if connection.features.can_return_rows_from_bulk_insert:
+            # bulk_create() bypasses BOMConfiguration.save()
+            for config in configs:
+                config.update_fingerprints()
+            BOMConfiguration.objects.bulk_create(configs)
+        else:
+            # Primary keys are needed for the items below
+            for config in configs:
+                config.save()
+        GNXChamberConfiguration.objects.bulk_create(
+            [gnx for bom in boms for gnx in bom.gnx_configurations]
+        )
+        BOMItem.objects.bulk_create([item for bom in boms for item in bom.items])
+
+
+def generate_batch(entries, dry_run=False, include_items=True, catalog=None):
+    """Generate BOMs for many request payloads in one pass.
+
+    All entries share one catalog snapshot (and the formula and result
+    caches). Article numbers are checked against the database with a single
+    query and against each other; entries that fail are reported and skipped.
+    Unless ``dry_run`` is set, the successful BOMs are saved together with
+    ``save_boms``.
+
+    Returns ``(results, stats)``: one result dict per entry (in input order,
+    shaped like the ``generate_bom`` response plus ``index``) and the totals
+    with the measured throughput in BOMs per second.
+    """
+    started = time.perf_counter()
+    catalog = catalog or get_catalog()
+
+    results = [None] * len(entries)
+    parsed = []
+    for index, data in enumerate(entries):
+        try:
+            if not isinstance(data, dict):
+                raise BOMRequestError('Ungültiger Eintrag', 'Jeder Eintrag muss ein JSON-Objekt sein.', status=400)
+            parsed.append((index, data, parse_configuration(data)))
+        except BOMRequestError as e:
+            results[index] = {'index': index, 'success': False, 'error': e.error, 'message': e.message}
+
+    taken = set()
+    if not dry_run:
+        taken = taken_article_numbers(config.full_article_number for _, _, config in parsed)
+
+    boms = []
+    for index, data, config in parsed:
+        try:
+            if not dry_run and config.full_article_number:
+                number = config.full_article_number.lower()
+                if number in taken:
+                    raise _duplicate_article_number_error(config.full_article_number)
+                # Also unique within the batch
+                taken.add(number)
+            boms.append((index, build_bom_cached(config, data, catalog=catalog)))
+        except BOMRequestError as e:
+            results[index] = {'index': index, 'success': False, 'error': e.error, 'message': e.message}
+        except Exception as e:
+            results[index] = {
+                'index': index,
+                'success': False,
+                'error': str(e),
+                'message': f'Fehler beim Generieren der BOM: {str(e)}',
+            }
+
+    if boms and not dry_run:
+        save_boms([bom for _, bom in boms])
+
+    for index, bom in boms:
+        config = bom.config
+        result = {
+            'index': index,
+            'success': True,
+            'configuration_id': config.id,
+            'article_number': config.full_article_number or config.generate_article_number(),
+        }
+        if include_items:
+            result['bom_items'] = bom.bom_data()
+        else:
+            result['item_count'] = len(bom.items)
+        results[index] = result
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'count': len(entries),
+        'succeeded': len(boms),
+        'failed': len(entries) - len(boms),
+        'seconds': round(seconds, 3),
+        'boms_per_second': round(len(boms) / seconds, 1) if seconds > 0 else None,
+    }
+    return results, stats
@@ -1,22 +1,9 @@
 from decimal import Decimal, InvalidOperation
 from typing import Dict, List
 
-from django.db.models import Q
-
-from ..models import (
-    DFM,
-    Entlueftung,
-    Kugelhahn,
-    Sondenverschlusskappe,
-    StumpfschweissEndkappe,
-    HVBStuetze,
-    WPVerschlusskappe,
-    WPA,
-    SondenDurchmesserPipe,
-    HVB,
-    Sondenbeschriftung,
-)
-from ..utils import calculate_formula, check_compatibility, format_artikelnummer
+from ..utils import calculate_formula
+from .catalog import get_catalog
+from .compatibility import is_compatible, size_key
 
 
 def _decimal(value) -> Decimal:
@@ -41,16 +28,7 @@ def _extract_da_from_kugelhahn_type(kugelhahn_type: str) -> str:
     return None
 
 
-def _compatibility_match(compat_value: str, hvb_size: str, sonden_durchmesser: str) -> bool:
-    if not compat_value:
-        return True
-    hvb_formatted = f"DA {hvb_size}" if hvb_size else ""
-    sonden_formatted = f"DA {sonden_durchmesser}" if sonden_durchmesser else ""
-    allowed = [part.strip() for part in compat_value.split("|")]
-    return hvb_formatted in allowed or sonden_formatted in allowed
-
-
-def build_sondenverschlusskappen(config, context) -> List[Dict]:
+def build_sondenverschlusskappen(config, context, catalog=None) -> List[Dict]:
     """Sondenverschlusskappe (closure caps) for probes AND HVB.
     
     Business rules (from Excel sheet Sondenverschlusskappe):
@@ -59,6 +37,7 @@ def build_sondenverschlusskappen(config, context) -> List[Dict]:
       - For HVB: always 2 pieces for the matching HVB diameter.
     """
     items: List[Dict] = []
+    catalog = catalog or get_catalog()
     
     sondenanzahl = context.get('sondenanzahl', 0) if context else 0
     if not sondenanzahl:
@@ -74,9 +53,7 @@ def build_sondenverschlusskappen(config, context) -> List[Dict]:
             sonden_durchmesser = sonden_durchmesser[:-2].strip()
         
         # Find Sondenverschlusskappe that matches the probe diameter
-        probe_cap = Sondenverschlusskappe.objects.filter(
-            sonden_durchmesser__iexact=sonden_durchmesser
-        ).first()
+        probe_cap = catalog.sondenverschlusskappe(sonden_durchmesser)
         
         if probe_cap:
             # Quantity = sondenanzahl * 2 (2 pieces per probe)
@@ -84,7 +61,7 @@ def build_sondenverschlusskappen(config, context) -> List[Dict]:
             
             items.append(
                 {
-                    "artikelnummer": format_artikelnummer(probe_cap.artikelnummer),
+                    "artikelnummer": probe_cap.artikelnummer,
                     "artikelbezeichnung": probe_cap.artikelbezeichnung,
                     "menge": _decimal(str(probe_quantity)),
                     "source_table": "Sondenverschlusskappe",
@@ -105,15 +82,13 @@ def build_sondenverschlusskappen(config, context) -> List[Dict]:
             hvb_size = hvb_size[:-2].strip()
         
         if hvb_size:
-            hvb_cap = Sondenverschlusskappe.objects.filter(
-                sonden_durchmesser__iexact=hvb_size
-            ).first()
+            hvb_cap = catalog.sondenverschlusskappe(hvb_size)
             
             if hvb_cap:
                 hvb_quantity = 2
                 items.append(
                     {
-                        "artikelnummer": format_artikelnummer(hvb_cap.artikelnummer),
+                        "artikelnummer": hvb_cap.artikelnummer,
                         "artikelbezeichnung": hvb_cap.artikelbezeichnung,
                         "menge": _decimal(str(hvb_quantity)),
                         "source_table": "Sondenverschlusskappe",
@@ -124,7 +99,7 @@ def build_sondenverschlusskappen(config, context) -> List[Dict]:
     return items
 
 
-def build_sondenbeschriftung(config, context) -> List[Dict]:
+def build_sondenbeschriftung(config, context, catalog=None) -> List[Dict]:
     """
     Build Sondenbeschriftung (probe labelling) articles.
 
@@ -142,15 +117,9 @@ def build_sondenbeschriftung(config, context) -> List[Dict]:
     if not schachttyp:
         return items
 
-    entries = Sondenbeschriftung.objects.all()
-    for entry in entries:
-        # Check chamber compatibility from 'Schächte' column
-        schaechte_raw = entry.schaechte or ""
-        if schaechte_raw:
-            schaechte_list = [s.strip() for s in schaechte_raw.split("|") if s.strip()]
-            if schachttyp not in schaechte_list:
-                continue
-
+    catalog = catalog or get_catalog()
+    # Rows whose 'Schächte' column lists the schachttyp (or is empty)
+    for entry in catalog.sondenbeschriftungen(schachttyp):
         quantity = None
         if entry.menge_formel:
             quantity = calculate_formula(entry.menge_formel, context)
@@ -162,7 +131,7 @@ def build_sondenbeschriftung(config, context) -> List[Dict]:
 
         items.append(
             {
-                "artikelnummer": format_artikelnummer(entry.nummer),
+                "artikelnummer": entry.nummer,
                 "artikelbezeichnung": entry.artikel,
                 "menge": _decimal(quantity),
                 "source_table": "Sondenbeschriftung",
@@ -173,17 +142,22 @@ def build_sondenbeschriftung(config, context) -> List[Dict]:
     return items
 
 
-def build_stumpfschweiss_endkappen(config) -> List[Dict]:
+def build_stumpfschweiss_endkappen(config, catalog=None) -> List[Dict]:
     """Rule set described in the requirements document."""
     items: List[Dict] = []
     hvb_size = str(config.hvb_size)
+    catalog = catalog or get_catalog()
+
+    def is_short(cap_obj):
+        beschreibung = (cap_obj.artikelbezeichnung or "").lower()
+        return "kurz" in beschreibung or "short" in beschreibung
 
     def add_cap(cap_obj, qty):
         if not cap_obj or qty <= 0:
             return
         items.append(
             {
-                "artikelnummer": format_artikelnummer(cap_obj.artikelnummer),
+                "artikelnummer": cap_obj.artikelnummer,
                 "artikelbezeichnung": cap_obj.artikelbezeichnung,
                 "menge": _decimal(qty),
                 "source_table": "Stumpfschweiss-Endkappe",
@@ -194,61 +168,41 @@ def build_stumpfschweiss_endkappen(config) -> List[Dict]:
         # Prefer a non-short cap that matches the selected HVB size (e.g. 110mm).
         # This keeps existing behaviour (2 pieces, non-short) but fixes the
         # wrong diameter (previously always DA 63 because we just took .first()).
-        cap = (
-            StumpfschweissEndkappe.objects.filter(
-                hvb_durchmesser=hvb_size,
-                is_short_version=False,
-            ).first()
-        )
+        hvb_caps = catalog.stumpfschweiss_endkappen(hvb_size)
+        cap = next((c for c in hvb_caps if not c.is_short_version), None)
         if not cap:
             # Fallback: any cap for this HVB size that is not marked as "kurz/short"
-            cap = (
-                StumpfschweissEndkappe.objects.filter(hvb_durchmesser=hvb_size)
-                .exclude(artikelbezeichnung__icontains="kurz")
-                .exclude(artikelbezeichnung__icontains="short")
-                .first()
-            )
+            cap = next((c for c in hvb_caps if not is_short(c)), None)
         if not cap:
             # Final fallback: keep original behaviour (first non-short, then any)
-            cap = StumpfschweissEndkappe.objects.filter(
-                is_short_version=False
-            ).first()
+            all_caps = catalog.stumpfschweiss_endkappen()
+            cap = next((c for c in all_caps if not c.is_short_version), None)
             if not cap:
-                cap = StumpfschweissEndkappe.objects.first()
+                cap = all_caps[0] if all_caps else None
 
         add_cap(cap, 2)
         return items
 
     if hvb_size == "63":
+        caps_63 = catalog.stumpfschweiss_endkappen("63")
         # Dynamic: Find short version for HVB 63mm
-        short_cap = StumpfschweissEndkappe.objects.filter(
-            hvb_durchmesser="63", is_short_version=True
-        ).first()
+        short_cap = next((c for c in caps_63 if c.is_short_version), None)
         # Dynamic: Find normal version (not short) for HVB 63mm
-        normal_cap = StumpfschweissEndkappe.objects.filter(
-            hvb_durchmesser="63", is_short_version=False
-        ).first()
+        normal_cap = next((c for c in caps_63 if not c.is_short_version), None)
         if not normal_cap:
             # Fallback: if no is_short_version field, get first non-short by description
-            normal_cap = StumpfschweissEndkappe.objects.filter(
-                hvb_durchmesser="63"
-            ).exclude(
-                artikelbezeichnung__icontains="kurz"
-            ).exclude(
-                artikelbezeichnung__icontains="short"
-            ).first()
+            normal_cap = next((c for c in caps_63 if not is_short(c)), None)
         add_cap(short_cap, 1)
         add_cap(normal_cap, 1)
         return items
 
-    caps = StumpfschweissEndkappe.objects.filter(hvb_durchmesser=hvb_size)
-    for cap in caps:
+    for cap in catalog.stumpfschweiss_endkappen(hvb_size):
         qty = cap.menge_statisch or Decimal("2")
         add_cap(cap, qty)
     return items
 
 
-def build_entlueftung_components(config, context=None) -> List[Dict]:
+def build_entlueftung_components(config, context=None, catalog=None) -> List[Dict]:
     """Entlüftung parts – ALL articles from Entlüftung.csv are included.
     Business rules:
     - ALL Entlüftung articles are included (they are ventilation/bleeding components)
@@ -256,29 +210,16 @@ def build_entlueftung_components(config, context=None) -> List[Dict]:
     - Kugelhahn articles (those with "Kugelhahn" in description) should be labeled based on which Kugelhahn type they belong to
     - Quantity uses menge_statisch from CSV (as per Entlüftung CSV structure)"""
     items: List[Dict] = []
-    hvb_size = str(config.hvb_size)
-    probe_size = str(config.sonden_durchmesser)
-    
-    from ..models import Kugelhahn, DFM
-    
-    # Build sets of article numbers from Kugelhahn and DFM (for cross-reference check and labeling)
-    kugelhahn_artikelnummern = set(
-        Kugelhahn.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    dfm_artikelnummern = set(
-        DFM.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
+    hvb_size = size_key(config.hvb_size)
+    probe_size = size_key(config.sonden_durchmesser)
+    catalog = catalog or get_catalog()
     
     # Kugelhahn articles that should be labeled based on Kugelhahn type
     # Dynamically detect: articles with "Kugelhahn" in description that also exist in Kugelhahn table
     def is_kugelhahn_article(part):
-        artikelnummer = format_artikelnummer(part.artikelnummer)
+        artikelnummer = part.artikelnummer
         beschreibung = (part.artikelbezeichnung or "").lower()
-        return artikelnummer in kugelhahn_artikelnummern and "kugelhahn" in beschreibung
+        return catalog.is_article(artikelnummer, ("Kugelhahn",)) and "kugelhahn" in beschreibung
     
     # Determine which Kugelhahn type to use for labeling
     # DA 32 articles belong to regular Kugelhahn (DN 25 / DA 32)
@@ -298,13 +239,13 @@ def build_entlueftung_components(config, context=None) -> List[Dict]:
             kugelhahn_source = "D-Kugelhahn"
     
     # Include ALL Entlüftung articles (they are all ventilation/bleeding components)
-    for part in Entlueftung.objects.all():
-        # Check ET-HVB compatibility (if specified)
-        compat_value = getattr(part, "et_hvb", "")
-        if not _compatibility_match(compat_value, hvb_size, config.sonden_durchmesser):
+    for part in catalog.entlueftungen():
+        # Check ET-HVB compatibility (if specified): HVB or probe size listed
+        sizes = part.et_hvb_sizes
+        if sizes is not None and hvb_size not in sizes and probe_size not in sizes:
             continue
         
-        artikelnummer = format_artikelnummer(part.artikelnummer)
+        artikelnummer = part.artikelnummer
         
         # Always label these as Entlüftung in the BOM, even if the same
         # article number also appears in Kugelhahn/DFM tables. This keeps
@@ -330,7 +271,7 @@ def build_manifold_components(config) -> List[Dict]:
     return []
 
 
-def build_plastic_dfm_components(config, context) -> List[Dict]:
+def build_plastic_dfm_components(config, context, catalog=None) -> List[Dict]:
     """Build DFM components (plastic and brass).
 
     Plastic flowmeters (K-DFM): keep existing behaviour (quantities from
@@ -354,15 +295,16 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
     items: List[Dict] = []
     if not config.dfm_type:
         return items
+    catalog = catalog or get_catalog()
 
     is_brass = not (config.dfm_type or "").strip().startswith("K-DFM")
 
     if is_brass:
         # --- Brass flowmeters: DFM.xlsx-driven logic with probe-first search ---
-        dfm_entries = list(
-            DFM.objects.filter(durchflussarmatur=config.dfm_type)
-        )
+        dfm_entries = catalog.dfms(config.dfm_type)
         sondenanzahl = context.get("sondenanzahl", 0) or getattr(config, "sondenanzahl", 0) or 0
+        hvb_size = size_key(config.hvb_size)
+        probe_size = size_key(config.sonden_durchmesser)
 
         always_indices: List[int] = []
         probe_match_indices: List[int] = []
@@ -373,11 +315,8 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
             if not entry.artikelnummer:
                 continue
 
-            has_probe = bool(entry.et_sonden and str(entry.et_sonden).strip())
-            has_hvb = bool(
-                (entry.et_hvb and str(entry.et_hvb).strip())
-                or (entry.dfm_hvb and str(entry.dfm_hvb).strip())
-            )
+            has_probe = entry.et_sonden_sizes is not None
+            has_hvb = entry.et_hvb_sizes is not None or entry.dfm_hvb_sizes is not None
 
             if not has_probe and not has_hvb:
                 # Case 3: rows without probe/HVB info – always included for this brass flowmeter.
@@ -385,21 +324,14 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
                 continue
 
             # Probe match (ET-Sonden) – strict, must match selected probe
-            if has_probe and check_compatibility(
-                entry.et_sonden, config.hvb_size, config.sonden_durchmesser, "sonden"
-            ):
+            if has_probe and probe_size in entry.et_sonden_sizes:
                 probe_match_indices.append(idx)
 
             # HVB match – independent from probe; we only check ET-HVB / DFM-HVB
-            hvb_matches = False
-            if entry.et_hvb and check_compatibility(
-                entry.et_hvb, config.hvb_size, config.sonden_durchmesser, "hvb"
-            ):
-                hvb_matches = True
-            if not hvb_matches and entry.dfm_hvb and check_compatibility(
-                entry.dfm_hvb, config.hvb_size, config.sonden_durchmesser, "hvb"
-            ):
-                hvb_matches = True
+            hvb_matches = (
+                (entry.et_hvb_sizes is not None and hvb_size in entry.et_hvb_sizes)
+                or (entry.dfm_hvb_sizes is not None and hvb_size in entry.dfm_hvb_sizes)
+            )
 
             if hvb_matches:
                 hvb_match_indices.append(idx)
@@ -463,7 +395,7 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
 
             items.append(
                 {
-                    "artikelnummer": format_artikelnummer(entry.artikelnummer),
+                    "artikelnummer": entry.artikelnummer,
                     "artikelbezeichnung": entry.artikelbezeichnung,
                     "menge": _decimal(quantity),
                     "source_table": "DFM",
@@ -476,25 +408,23 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
     if not kugelhahn_type and config.dfm_type and config.dfm_type.startswith("K-DFM"):
         kugelhahn_type = "DN 25 / DA 32"
 
+    hvb_size = size_key(config.hvb_size)
+    probe_size = size_key(config.sonden_durchmesser)
     kugelhahn_formula_map = {}
     if kugelhahn_type:
-        hvb_size = str(config.hvb_size)
-        probe_size = str(config.sonden_durchmesser)
-        kugelhahn_entries = Kugelhahn.objects.filter(kugelhahn=kugelhahn_type)
-        for kh_entry in kugelhahn_entries:
+        for kh_entry in catalog.kugelhaehne(kugelhahn_type):
             if not kh_entry.artikelnummer:
                 continue
-            if kh_entry.et_hvb and not check_compatibility(kh_entry.et_hvb, hvb_size, probe_size, "hvb"):
-                continue
-            if kh_entry.et_sonden and not check_compatibility(kh_entry.et_sonden, hvb_size, probe_size, "sonden"):
-                continue
-            if kh_entry.kh_hvb and not check_compatibility(kh_entry.kh_hvb, hvb_size, probe_size, "hvb"):
+            if not (
+                is_compatible(kh_entry.et_hvb_sizes, hvb_size)
+                and is_compatible(kh_entry.et_sonden_sizes, probe_size)
+                and is_compatible(kh_entry.kh_hvb_sizes, hvb_size)
+            ):
                 continue
             if kh_entry.menge_formel:
-                kugelhahn_formula_map[format_artikelnummer(kh_entry.artikelnummer)] = kh_entry.menge_formel
+                kugelhahn_formula_map[kh_entry.artikelnummer] = kh_entry.menge_formel
 
-    dfm_entries = DFM.objects.filter(durchflussarmatur=config.dfm_type)
-    for entry in dfm_entries:
+    for entry in catalog.dfms(config.dfm_type):
         if not entry.artikelnummer:
             continue
 
@@ -503,24 +433,15 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
         if "einschweißteil" in beschreibung and entry.et_hvb:
             enforce_sonden_compat = False
 
-        if enforce_sonden_compat and not check_compatibility(
-            entry.et_sonden, config.hvb_size, config.sonden_durchmesser, "sonden"
-        ):
+        if enforce_sonden_compat and not is_compatible(entry.et_sonden_sizes, probe_size):
             continue
 
-        hvb_checked = False
+        # DFM-HVB takes precedence over ET-HVB
         if entry.dfm_hvb:
-            if not check_compatibility(entry.dfm_hvb, config.hvb_size, config.sonden_durchmesser, "hvb"):
-                continue
-            hvb_checked = True
-        elif entry.et_hvb and "DA" in entry.et_hvb and "|" in entry.et_hvb:
-            if not check_compatibility(entry.et_hvb, config.hvb_size, config.sonden_durchmesser, "hvb"):
-                continue
-            hvb_checked = True
-
-        if not hvb_checked and entry.et_hvb and not ("DA" in entry.et_hvb and "|" in entry.et_hvb):
-            if not check_compatibility(entry.et_hvb, config.hvb_size, config.sonden_durchmesser, "hvb"):
+            if not is_compatible(entry.dfm_hvb_sizes, hvb_size):
                 continue
+        elif not is_compatible(entry.et_hvb_sizes, hvb_size):
+            continue
 
         quantity = None
         if entry.menge_formel:
@@ -541,7 +462,7 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
                         quantity = None
 
         if quantity is None:
-            an = format_artikelnummer(entry.artikelnummer)
+            an = entry.artikelnummer
             if an in kugelhahn_formula_map:
                 quantity = calculate_formula(kugelhahn_formula_map[an], context)
 
@@ -550,7 +471,7 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
 
         items.append(
             {
-                "artikelnummer": format_artikelnummer(entry.artikelnummer),
+                "artikelnummer": entry.artikelnummer,
                 "artikelbezeichnung": entry.artikelbezeichnung,
                 "menge": _decimal(quantity),
                 "source_table": "DFM",
@@ -559,7 +480,7 @@ def build_plastic_dfm_components(config, context) -> List[Dict]:
     return items
 
 
-def build_wp_components(config, context) -> List[Dict]:
+def build_wp_components(config, context, catalog=None) -> List[Dict]:
     """Build WP (heat pump connection) components based on HVB and WP diameters.
 
     Uses:
@@ -584,14 +505,15 @@ def build_wp_components(config, context) -> List[Dict]:
 
     if not hvb_size or not wp_diameter:
         return items
+    catalog = catalog or get_catalog()
 
     # 1) Stumpfschweiß-Reduktion from WPA (reduction DA <HVB> / <WP> kurz)
-    wpa_entry = WPA.objects.filter(name=hvb_size, wp_durchmesser=wp_diameter).first()
+    wpa_entry = catalog.wpa(hvb_size, wp_diameter)
     if wpa_entry:
         qty = wpa_entry.menge_statisch if wpa_entry.menge_statisch is not None else Decimal("2")
         items.append(
             {
-                "artikelnummer": format_artikelnummer(wpa_entry.artikelnummer),
+                "artikelnummer": wpa_entry.artikelnummer,
                 "artikelbezeichnung": wpa_entry.artikelbezeichnung,
                 "menge": _decimal(qty),
                 "source_table": "WPA",
@@ -600,12 +522,12 @@ def build_wp_components(config, context) -> List[Dict]:
         )
 
     # 2) WP-Verschlusskappe for the selected WP diameter
-    cap = WPVerschlusskappe.objects.filter(name=wp_diameter).first()
+    cap = catalog.wp_verschlusskappe(wp_diameter)
     if cap:
         qty = cap.menge_statisch if cap.menge_statisch is not None else Decimal("2")
         items.append(
             {
-                "artikelnummer": format_artikelnummer(cap.artikelnummer),
+                "artikelnummer": cap.artikelnummer,
                 "artikelbezeichnung": cap.artikelbezeichnung,
                 "menge": _decimal(qty),
                 "source_table": "WP-Verschlusskappe",
@@ -618,11 +540,11 @@ def build_wp_components(config, context) -> List[Dict]:
     # configurable length in meters (default 1 m), provided by the UI.
     wp_pipe_length = getattr(config, "wp_pipe_length", None)
     if wp_pipe_length is not None and wp_pipe_length > 0:
-        hvb_pipe = HVB.objects.filter(hauptverteilerbalken=wp_diameter).first()
+        hvb_pipe = catalog.hvb(wp_diameter)
         if hvb_pipe:
             items.append(
                 {
-                    "artikelnummer": format_artikelnummer(hvb_pipe.artikelnummer),
+                    "artikelnummer": hvb_pipe.artikelnummer,
                     "artikelbezeichnung": hvb_pipe.artikelbezeichnung,
                     "menge": _decimal(wp_pipe_length),
                     "source_table": "WP-Rohr",
@@ -633,7 +555,7 @@ def build_wp_components(config, context) -> List[Dict]:
     return items
 
 
-def build_kugelhahn_components(config, context) -> List[Dict]:
+def build_kugelhahn_components(config, context, catalog=None) -> List[Dict]:
     """
     Build Kugelhahn components **directly** from CSV rules.
 
@@ -654,15 +576,15 @@ def build_kugelhahn_components(config, context) -> List[Dict]:
 
     if not kugelhahn_type:
         return items
+    catalog = catalog or get_catalog()
 
     # Dynamically extract DA size from Kugelhahn type name (for non-Einschweißteil rows)
     da_value = _extract_da_from_kugelhahn_type(kugelhahn_type)
 
-    hvb_size = str(config.hvb_size)
-    probe_size = str(config.sonden_durchmesser)
+    hvb_size = size_key(config.hvb_size)
+    probe_size = size_key(config.sonden_durchmesser)
 
-    entries = Kugelhahn.objects.filter(kugelhahn=kugelhahn_type)
-    for entry in entries:
+    for entry in catalog.kugelhaehne(kugelhahn_type):
         if not entry.artikelnummer:
             continue
 
@@ -680,11 +602,11 @@ def build_kugelhahn_components(config, context) -> List[Dict]:
             continue
 
         # Generic compatibility checks based on CSV columns
-        if entry.et_hvb and not check_compatibility(entry.et_hvb, hvb_size, probe_size, 'hvb'):
-            continue
-        if entry.et_sonden and not check_compatibility(entry.et_sonden, hvb_size, probe_size, 'sonden'):
-            continue
-        if entry.kh_hvb and not check_compatibility(entry.kh_hvb, hvb_size, probe_size, 'hvb'):
+        if not (
+            is_compatible(entry.et_hvb_sizes, hvb_size)
+            and is_compatible(entry.et_sonden_sizes, probe_size)
+            and is_compatible(entry.kh_hvb_sizes, hvb_size)
+        ):
             continue
 
         # Quantity: prefer Formel, fall back to statisch
@@ -699,7 +621,7 @@ def build_kugelhahn_components(config, context) -> List[Dict]:
 
         items.append(
             {
-                "artikelnummer": format_artikelnummer(entry.artikelnummer),
+                "artikelnummer": entry.artikelnummer,
                 "artikelbezeichnung": artikelbezeichnung,
                 "menge": _decimal(quantity),
                 "source_table": "Kugelhahn",
@@ -709,7 +631,7 @@ def build_kugelhahn_components(config, context) -> List[Dict]:
     return items
 
 
-def build_dfm_kugelhahn_components(config, context) -> List[Dict]:
+def build_dfm_kugelhahn_components(config, context, catalog=None) -> List[Dict]:
     """Build D-Kugelhahn components (Kugelhahn-Typ selected from DFM dropdown)
     purely based on CSV rules (Kugelhaehne.csv).
 
@@ -721,13 +643,13 @@ def build_dfm_kugelhahn_components(config, context) -> List[Dict]:
     dfm_kugelhahn_type = config.dfm_kugelhahn_type
     if not dfm_kugelhahn_type:
         return items
+    catalog = catalog or get_catalog()
 
     da_value = _extract_da_from_kugelhahn_type(dfm_kugelhahn_type)
-    hvb_size = str(config.hvb_size)
-    probe_size = str(config.sonden_durchmesser)
+    hvb_size = size_key(config.hvb_size)
+    probe_size = size_key(config.sonden_durchmesser)
 
-    entries = Kugelhahn.objects.filter(kugelhahn=dfm_kugelhahn_type)
-    for entry in entries:
+    for entry in catalog.kugelhaehne(dfm_kugelhahn_type):
         if not entry.artikelnummer:
             continue
 
@@ -743,11 +665,11 @@ def build_dfm_kugelhahn_components(config, context) -> List[Dict]:
             continue
 
         # Respect CSV compatibility fields
-        if entry.et_hvb and not check_compatibility(entry.et_hvb, hvb_size, probe_size, "hvb"):
-            continue
-        if entry.et_sonden and not check_compatibility(entry.et_sonden, hvb_size, probe_size, "sonden"):
-            continue
-        if entry.kh_hvb and not check_compatibility(entry.kh_hvb, hvb_size, probe_size, "hvb"):
+        if not (
+            is_compatible(entry.et_hvb_sizes, hvb_size)
+            and is_compatible(entry.et_sonden_sizes, probe_size)
+            and is_compatible(entry.kh_hvb_sizes, hvb_size)
+        ):
             continue
 
         quantity = None
@@ -761,7 +683,7 @@ def build_dfm_kugelhahn_components(config, context) -> List[Dict]:
 
         items.append(
             {
-                "artikelnummer": format_artikelnummer(entry.artikelnummer),
+                "artikelnummer": entry.artikelnummer,
                 "artikelbezeichnung": artikelbezeichnung,
                 "menge": _decimal(quantity),
                 "source_table": "D-Kugelhahn",
@@ -771,7 +693,7 @@ def build_dfm_kugelhahn_components(config, context) -> List[Dict]:
     return items
 
 
-def build_hvb_stuetze_components(config, custom_quantities: dict = None) -> List[Dict]:
+def build_hvb_stuetze_components(config, custom_quantities: dict = None, catalog=None) -> List[Dict]:
     """Build HVB Stütze (support) components - Oben and Unter articles for each HVB diameter
     CRITICAL: These "GN X - ZUB - Verteiler - Stütze" articles are ONLY for GN X chambers
     (GN X1, GN X2, GN X3, GN X4). They must NOT appear for regular GN chambers (GN 1, GN 2, etc.)
@@ -779,6 +701,7 @@ def build_hvb_stuetze_components(config, custom_quantities: dict = None) -> List
     Args:
         config: BOMConfiguration instance
         custom_quantities: Dictionary mapping artikelnummer to custom quantity (from Step 2)
+        catalog: CatalogSnapshot to read from (defaults to the current snapshot)
     """
     items: List[Dict] = []
     
@@ -802,17 +725,16 @@ def build_hvb_stuetze_components(config, custom_quantities: dict = None) -> List
     
     # Get both Oben and Unter articles for this HVB diameter
     # Only for GN X chambers (already filtered above)
-    stuetze_articles = HVBStuetze.objects.filter(hvb_durchmesser=hvb_size)
+    catalog = catalog or get_catalog()
     
-    for stuetze in stuetze_articles:
-        artikelnummer = format_artikelnummer(stuetze.artikelnummer)
-        artikelnummer_key = str(stuetze.artikelnummer).replace('.0', '').strip()
+    for stuetze in catalog.hvb_stuetzen(hvb_size):
+        artikelnummer = stuetze.artikelnummer
         
         # Use custom quantity if provided, otherwise default to 1
         quantity = Decimal("1")
-        if artikelnummer_key in custom_quantities:
+        if artikelnummer in custom_quantities:
             try:
-                quantity = Decimal(str(custom_quantities[artikelnummer_key]))
+                quantity = Decimal(str(custom_quantities[artikelnummer]))
                 if quantity < 0:
                     quantity = Decimal("1")
             except (ValueError, TypeError):
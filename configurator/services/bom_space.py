@@ -0,0 +1,141 @@
+"""Enumeration and parallel computation of the whole configuration space.
+
+``enumerate_configurations`` walks every combination the configurator form
+offers (Schacht × allowed HVB × probe diameter × sondenanzahl × anschlussart
+× bauform × compatible Kugelhahn × DFM) and yields generate-bom payloads.
+
+``compute_chunk`` runs the BOM pipeline for a list of payloads against a
+catalog snapshot without touching the database, so it can run in worker
+processes: ``init_worker`` receives the pickled ``CatalogSnapshot`` once per
+process and every chunk is computed against that copy.
+"""
+import os
+import pickle
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from . import options
+from .bom_generation import build_bom, parse_configuration
+
+ANSCHLUSSARTEN = ('einseitig', 'beidseitig')
+BAUFORMEN = ('I', 'U')
+MIN_SONDENANZAHL = 2  # Always 2 as per requirement (see options.schachtgrenze_info)
+
+
+def enumerate_configurations(
+    catalog,
+    schachttypen: Optional[Iterable[str]] = None,
+    sondenabstand: int = 100,
+    bauformen: Iterable[str] = BAUFORMEN,
+    sondenanzahl_step: int = 1,
+    default_max_sondenanzahl: int = 20,
+    include_dfm: bool = True,
+) -> Iterator[Dict]:
+    """Yield a generate-bom payload for every valid combination.
+
+    Schacht types without probe diameters are skipped (the form offers no
+    choice for them). Schacht types without a Schachtgrenze allow every HVB
+    size and up to ``default_max_sondenanzahl`` probes.
+    """
+    matrix = catalog.compatibility
+    wanted = set(schachttypen) if schachttypen else None
+    all_hvb_sizes = [hvb.hauptverteilerbalken for hvb in catalog.hvbs()]
+
+    dfm_choices = [('', '')]
+    if include_dfm:
+        for category in ('plastic', 'brass'):
+            dfm_choices += [
+                (name, category) for name in options.dfm_options({'category': category}, catalog)['dfm_options']
+            ]
+
+    kugelhahn_cache = {}
+
+    def kugelhahn_choices(hvb_size, durchmesser):
+        key = (hvb_size, durchmesser)
+        if key not in kugelhahn_cache:
+            data = {'hvb_size': hvb_size, 'sonden_durchmesser': durchmesser}
+            kugelhahn_cache[key] = [''] + options.kugelhahn_options(data, catalog)['kugelhahn_options']
+        return kugelhahn_cache[key]
+
+    seen = set()
+    for schacht in catalog.schaechte():
+        schachttyp = schacht.schachttyp
+        if schachttyp in seen or (wanted is not None and schachttyp not in wanted):
+            continue
+        seen.add(schachttyp)
+
+        durchmesser_list = matrix.sonden_durchmesser(schachttyp)
+        if not durchmesser_list:
+            continue
+
+        allowed = matrix.allowed_hvb_sizes(schachttyp)
+        hvb_sizes = [size for size in all_hvb_sizes if size in allowed] if allowed else all_hvb_sizes
+
+        grenze = catalog.schachtgrenze(schachttyp)
+        max_sondenanzahl = grenze.max_sondenanzahl if grenze and grenze.max_sondenanzahl else default_max_sondenanzahl
+        sondenanzahlen = range(MIN_SONDENANZAHL, max_sondenanzahl + 1, max(1, sondenanzahl_step))
+
+        for hvb_size in hvb_sizes:
+            for durchmesser in durchmesser_list:
+                kugelhaehne = kugelhahn_choices(hvb_size, durchmesser)
+                for sondenanzahl in sondenanzahlen:
+                    for anschlussart in ANSCHLUSSARTEN:
+                        for bauform in bauformen:
+                            for kugelhahn_type in kugelhaehne:
+                                for dfm_type, dfm_category in dfm_choices:
+                                    yield {
+                                        'schachttyp': schachttyp,
+                                        'hvb_size': hvb_size,
+                                        'sonden_durchmesser': durchmesser,
+                                        'sondenanzahl': sondenanzahl,
+                                        'sondenabstand': sondenabstand,
+                                        'anschlussart': anschlussart,
+                                        'bauform': bauform,
+                                        'kugelhahn_type': kugelhahn_type,
+                                        'dfm_type': dfm_type,
+                                        'dfm_category': dfm_category,
+                                    }
+
+
+# -- worker side ---------------------------------------------------------------
+
+_worker_catalog = None
+
+
+def init_worker(catalog_bytes: bytes, quiet: bool = True) -> None:
+    """ProcessPoolExecutor initializer: set up Django and load the catalog snapshot."""
+    global _worker_catalog
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        # Spawned (not forked) workers start with an empty interpreter
+        django.setup()
+    if quiet:
+        # The BOM rules print debug output for every item
+        sys.stdout = open(os.devnull, 'w')
+    _worker_catalog = pickle.loads(catalog_bytes)
+
+
+def compute_chunk(entries: List[Dict], catalog=None) -> List[Dict]:
+    """Compute the BOMs for ``entries``; one result dict per entry, in order.
+
+    Successful results carry the display-ordered ``bom_items`` and the
+    ``cached`` item representation (``GeneratedBOM.to_cache()``) that
+    ``GeneratedBOM.from_cache`` turns back into unsaved rows.
+    """
+    catalog = catalog or _worker_catalog
+    results = []
+    for data in entries:
+        try:
+            config = parse_configuration(data)
+            bom = build_bom(config, data, catalog=catalog)
+            results.append({
+                'params': data,
+                'success': True,
+                'bom_items': bom.bom_data(),
+                'cached': bom.to_cache(),
+            })
+        except Exception as e:
+            results.append({'params': data, 'success': False, 'error': str(e)})
+    return results
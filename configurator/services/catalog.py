@@ -0,0 +1,390 @@
+"""In-process, read-only snapshot of the product catalog.
+
+The catalog tables (Kugelhähne, DFM, Entlüftung, HVB Stützen, ...) only change
+when ``import_csv_data`` runs, but the BOM builders used to query them several
+times per generated BOM. ``get_catalog()`` loads every catalog table once,
+indexes the rows by the keys the builders look them up with and keeps the
+result in memory until the catalog version changes.
+
+The catalog version is a counter in the single ``CatalogVersion`` row. Every
+write to a catalog table bumps it in the same transaction: the import
+commands through ``catalog_update()``, any other save or delete (admin edits)
+through the ``post_save``/``post_delete`` receivers in ``configurator.signals``.
+``CatalogVersionMiddleware`` reads it once per request, so every worker
+process notices a change on its next request and rebuilds its snapshot.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import (
+    Article,
+    CatalogVersion,
+    DFM,
+    Entlueftung,
+    GNXChamberArticle,
+    HVB,
+    HVBStuetze,
+    Kugelhahn,
+    Schacht,
+    Schachtgrenze,
+    Sondenabstand,
+    Sondenbeschriftung,
+    SondenDurchmesser,
+    SondenDurchmesserPipe,
+    Sondengroesse,
+    Sondenverschlusskappe,
+    Schachtkompatibilitaet,
+    StumpfschweissEndkappe,
+    Verrohrung,
+    WPA,
+    WPVerschlusskappe,
+)
+from ..utils import format_artikelnummer
+from .compatibility import CompatibilityMatrix, attach_compatible_sizes
+
+# Tables whose changes bump the catalog version
+CATALOG_MODELS = (
+    Schacht,
+    HVB,
+    Sondengroesse,
+    SondenDurchmesser,
+    SondenDurchmesserPipe,
+    Sondenabstand,
+    Kugelhahn,
+    DFM,
+    Entlueftung,
+    Sondenverschlusskappe,
+    StumpfschweissEndkappe,
+    WPVerschlusskappe,
+    WPA,
+    Sondenbeschriftung,
+    Verrohrung,
+    Schachtgrenze,
+    Schachtkompatibilitaet,
+    GNXChamberArticle,
+    HVBStuetze,
+)
+
+
+def _group_by(rows: Iterable, key) -> Dict[object, Tuple]:
+    """Group rows into tuples by ``key(row)``, keeping the original row order."""
+    grouped: Dict[object, list] = {}
+    for row in rows:
+        grouped.setdefault(key(row), []).append(row)
+    return {k: tuple(v) for k, v in grouped.items()}
+
+
+def _first_by(rows: Iterable, key) -> Dict[object, object]:
+    """Map ``key(row)`` to the first row with that key (same as ``.first()`` by pk)."""
+    first: Dict[object, object] = {}
+    for row in rows:
+        first.setdefault(key(row), row)
+    return first
+
+
+def _lower(value) -> str:
+    return str(value or '').strip().lower()
+
+
+def _by_schachttyp(beschriftungen: Iterable) -> Tuple[Dict[str, Tuple], Tuple]:
+    """Index labeling rows by the Schachttypen of their ``schaechte`` column ("GN 1|GN 2").
+
+    Returns the rows per Schachttyp and the rows for any other Schachttyp.
+    Rows with an empty column apply to every Schachttyp, so they are part of
+    every entry; all entries keep the original row order.
+    """
+    beschriftungen = tuple(beschriftungen)
+    schaechte_by_row = {
+        row.pk: {s.strip() for s in row.schaechte.split('|') if s.strip()}
+        for row in beschriftungen if row.schaechte
+    }
+    schachttypen = set().union(*schaechte_by_row.values())
+    by_schacht = {
+        schachttyp: tuple(
+            row for row in beschriftungen
+            if not row.schaechte or schachttyp in schaechte_by_row[row.pk]
+        )
+        for schachttyp in schachttypen
+    }
+    return by_schacht, tuple(row for row in beschriftungen if not row.schaechte)
+
+
+class CatalogSnapshot:
+    """Indexed, read-only view of all catalog tables used by BOM generation.
+
+    Rows are kept in primary-key order so that lookups return the same rows
+    (and in the same order) as the unordered ORM queries they replace.
+    The snapshot must not be mutated; a new one is built when the catalog
+    version changes.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+
+        schaechte = list(Schacht.objects.order_by('pk'))
+        hvbs = list(HVB.objects.order_by('pk'))
+        sondengroessen = list(Sondengroesse.objects.order_by('pk'))
+        pipes = list(SondenDurchmesserPipe.objects.order_by('pk'))
+        kugelhaehne = list(Kugelhahn.objects.order_by('pk'))
+        dfms = list(DFM.objects.order_by('pk'))
+        entlueftungen = list(Entlueftung.objects.order_by('pk'))
+        verschlusskappen = list(Sondenverschlusskappe.objects.order_by('pk'))
+        endkappen = list(StumpfschweissEndkappe.objects.order_by('pk'))
+        wp_kappen = list(WPVerschlusskappe.objects.order_by('pk'))
+        wpas = list(WPA.objects.order_by('pk'))
+        stuetzen = list(HVBStuetze.objects.order_by('pk'))
+        beschriftungen = list(Sondenbeschriftung.objects.order_by('pk'))
+        gnx_articles = list(GNXChamberArticle.objects.order_by('pk'))
+        # Option lists for the configurator form
+        sonden_durchmesser = list(SondenDurchmesser.objects.all())  # Meta ordering (schachttyp, durchmesser)
+        abstaende = list(Sondenabstand.objects.order_by('sondenabstand', 'pk'))
+        schachtgrenzen = list(Schachtgrenze.objects.order_by('pk'))
+        articles = list(Article.objects.all())
+
+        self._schaechte = tuple(schaechte)
+        self._hvbs = tuple(hvbs)
+        self._schacht = _first_by(schaechte, lambda r: r.schachttyp)
+        self._hvb = _first_by(hvbs, lambda r: r.hauptverteilerbalken)
+        self._sondengroesse = _group_by(sondengroessen, lambda r: _lower(r.schachttyp))
+        self._sonden_pipe = _first_by(pipes, lambda r: r.durchmesser)
+        self._kugelhahn = _group_by(kugelhaehne, lambda r: r.kugelhahn)
+        self._dfm = _group_by(dfms, lambda r: r.durchflussarmatur)
+        self._entlueftung = tuple(entlueftungen)
+        self._sondenverschlusskappe = _first_by(
+            (r for r in verschlusskappen if r.sonden_durchmesser is not None),
+            lambda r: r.sonden_durchmesser.lower(),
+        )
+        self._endkappen = tuple(endkappen)
+        self._endkappen_by_hvb = _group_by(endkappen, lambda r: r.hvb_durchmesser)
+        self._wp_verschlusskappe = _first_by(wp_kappen, lambda r: r.name)
+        self._wpa = _first_by(wpas, lambda r: (r.name, r.wp_durchmesser))
+        self._hvb_stuetze = _group_by(stuetzen, lambda r: r.hvb_durchmesser)
+        self._sondenbeschriftung = tuple(beschriftungen)
+        self._sondenbeschriftung_by_schacht, self._sondenbeschriftung_any = _by_schachttyp(beschriftungen)
+        self._gnx_article = {r.pk: r for r in gnx_articles}
+        self._gnx_articles = tuple(gnx_articles)
+        self._kugelhaehne = tuple(kugelhaehne)
+        self._dfms = tuple(dfms)
+        self._wpas_by_hvb = _group_by(wpas, lambda r: r.name)
+        self._sonden_durchmesser = tuple(sonden_durchmesser)
+        self._sonden_durchmesser_by_schacht = _group_by(sonden_durchmesser, lambda r: (r.schachttyp or '').lower())
+        self._sondenabstand = _group_by(abstaende, lambda r: r.anschlussart)
+        self._schachtgrenze = _first_by(schachtgrenzen, lambda r: r.schachttyp)
+        self.compatibility = CompatibilityMatrix(schachtgrenzen, sonden_durchmesser, sondengroessen)
+        for rows in (kugelhaehne, dfms, entlueftungen):
+            attach_compatible_sizes(rows)
+
+        # Article index (see services.articles), keyed by normalized number
+        self._articles = {article.artikelnummer: article for article in articles}
+        self._article_tables = {article.artikelnummer: frozenset(article.tables) for article in articles}
+
+    # -- single-row lookups -------------------------------------------------
+
+    def schacht(self, schachttyp) -> Optional[Schacht]:
+        return self._schacht.get(str(schachttyp))
+
+    def hvb(self, hauptverteilerbalken) -> Optional[HVB]:
+        return self._hvb.get(str(hauptverteilerbalken))
+
+    def sonden_pipe(self, durchmesser) -> Optional[SondenDurchmesserPipe]:
+        return self._sonden_pipe.get(str(durchmesser))
+
+    def sondenverschlusskappe(self, durchmesser) -> Optional[Sondenverschlusskappe]:
+        """Case-insensitive lookup by ``sonden_durchmesser``."""
+        return self._sondenverschlusskappe.get(str(durchmesser).lower())
+
+    def wp_verschlusskappe(self, wp_durchmesser) -> Optional[WPVerschlusskappe]:
+        return self._wp_verschlusskappe.get(str(wp_durchmesser))
+
+    def wpa(self, hvb_durchmesser, wp_durchmesser) -> Optional[WPA]:
+        return self._wpa.get((str(hvb_durchmesser), str(wp_durchmesser)))
+
+    def gnx_article(self, article_id) -> Optional[GNXChamberArticle]:
+        try:
+            return self._gnx_article.get(int(article_id))
+        except (TypeError, ValueError):
+            return None
+
+    # -- multi-row lookups --------------------------------------------------
+
+    def sondengroessen(self, schachttyp) -> Tuple[Sondengroesse, ...]:
+        """Probe rows for a Schachttyp (case-insensitive)."""
+        return self._sondengroesse.get(_lower(schachttyp), ())
+
+    def kugelhaehne(self, kugelhahn_type) -> Tuple[Kugelhahn, ...]:
+        return self._kugelhahn.get(kugelhahn_type, ())
+
+    def dfms(self, durchflussarmatur) -> Tuple[DFM, ...]:
+        return self._dfm.get(durchflussarmatur, ())
+
+    def entlueftungen(self) -> Tuple[Entlueftung, ...]:
+        return self._entlueftung
+
+    def stumpfschweiss_endkappen(self, hvb_durchmesser=None) -> Tuple[StumpfschweissEndkappe, ...]:
+        """All end caps, or only those for ``hvb_durchmesser`` when given."""
+        if hvb_durchmesser is None:
+            return self._endkappen
+        return self._endkappen_by_hvb.get(str(hvb_durchmesser), ())
+
+    def hvb_stuetzen(self, hvb_durchmesser) -> Tuple[HVBStuetze, ...]:
+        return self._hvb_stuetze.get(str(hvb_durchmesser), ())
+
+    def sondenbeschriftungen(self, schachttyp=None) -> Tuple[Sondenbeschriftung, ...]:
+        """All labeling rows, or only those applying to ``schachttyp`` when given."""
+        if schachttyp is None:
+            return self._sondenbeschriftung
+        return self._sondenbeschriftung_by_schacht.get(schachttyp, self._sondenbeschriftung_any)
+
+    def schaechte(self) -> Tuple[Schacht, ...]:
+        return self._schaechte
+
+    def hvbs(self) -> Tuple[HVB, ...]:
+        return self._hvbs
+
+    def all_kugelhaehne(self) -> Tuple[Kugelhahn, ...]:
+        return self._kugelhaehne
+
+    def all_dfms(self) -> Tuple[DFM, ...]:
+        return self._dfms
+
+    def wpas(self, hvb_durchmesser) -> Tuple[WPA, ...]:
+        """WPA rows for an HVB diameter (the ``name`` column)."""
+        return self._wpas_by_hvb.get(str(hvb_durchmesser), ())
+
+    def gnx_articles(self) -> Tuple[GNXChamberArticle, ...]:
+        return self._gnx_articles
+
+    def sonden_durchmesser(self, schachttyp=None) -> Tuple[SondenDurchmesser, ...]:
+        """Probe diameter rows, optionally for one Schachttyp (case-insensitive)."""
+        if schachttyp is None:
+            return self._sonden_durchmesser
+        return self._sonden_durchmesser_by_schacht.get(str(schachttyp).lower(), ())
+
+    def sondenabstaende(self, anschlussart) -> Tuple[Sondenabstand, ...]:
+        """Probe distances for an Anschlussart, ordered by distance."""
+        return self._sondenabstand.get(anschlussart, ())
+
+    def schachtgrenze(self, schachttyp) -> Optional[Schachtgrenze]:
+        return self._schachtgrenze.get(schachttyp)
+
+    # -- article index ------------------------------------------------------
+
+    def article(self, artikelnummer) -> Optional[Article]:
+        """Article index row for a number (normalized before the lookup)."""
+        return self._articles.get(format_artikelnummer(artikelnummer))
+
+    def is_article(self, artikelnummer, tables: Optional[Iterable[str]] = None) -> bool:
+        """Whether the number exists in the component tables (in one of ``tables`` when given)."""
+        source_tables = self._article_tables.get(format_artikelnummer(artikelnummer))
+        if source_tables is None:
+            return False
+        return tables is None or not source_tables.isdisjoint(tables)
+
+
+_lock = threading.Lock()
+_snapshot: Optional[CatalogSnapshot] = None
+
+
+_CATALOG_VERSION_PK = 1
+# Version read at the start of the current request (see CatalogVersionMiddleware)
+_request_version: contextvars.ContextVar = contextvars.ContextVar('catalog_version', default=None)
+# Depth of nested catalog_update() blocks per thread
+_updates = threading.local()
+
+
+def read_version() -> int:
+    """Catalog version from the database (one primary-key lookup)."""
+    version = CatalogVersion.objects.filter(pk=_CATALOG_VERSION_PK).values_list('version', flat=True).first()
+    return version or 0
+
+
+def current_version() -> int:
+    """Catalog version of the current request, read from the database outside requests."""
+    version = _request_version.get()
+    return read_version() if version is None else version
+
+
+def bump_version() -> int:
+    """Increment the catalog version (in the caller's transaction) and return it."""
+    with transaction.atomic():
+        updated = CatalogVersion.objects.filter(pk=_CATALOG_VERSION_PK).update(
+            version=F('version') + 1, updated_at=timezone.now(),
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    CatalogVersion.objects.create(pk=_CATALOG_VERSION_PK, version=1)
+            except IntegrityError:
+                # Created by a concurrent bump in the meantime
+                CatalogVersion.objects.filter(pk=_CATALOG_VERSION_PK).update(
+                    version=F('version') + 1, updated_at=timezone.now(),
+                )
+        version = read_version()
+    invalidate_catalog()
+    if _request_version.get() is not None:
+        # The rest of the request that changed the catalog sees the change
+        _request_version.set(version)
+    return version
+
+
+def in_catalog_update() -> bool:
+    return getattr(_updates, 'depth', 0) > 0
+
+
+@contextmanager
+def catalog_update():
+    """Group catalog writes into one version bump.
+
+    Row signals inside the block are ignored; the version is bumped once
+    when the outermost block completes without an exception. Use it inside
+    the transaction of the writes so the new version commits with them.
+    """
+    depth = getattr(_updates, 'depth', 0)
+    _updates.depth = depth + 1
+    try:
+        yield
+    finally:
+        _updates.depth = depth
+    if depth == 0:
+        bump_version()
+
+
+class CatalogVersionMiddleware:
+    """Read the catalog version once per request for all ``get_catalog()`` calls."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_version.set(read_version())
+        try:
+            return self.get_response(request)
+        finally:
+            _request_version.reset(token)
+
+
+def get_catalog() -> CatalogSnapshot:
+    """Return the catalog snapshot, rebuilding it if the catalog version changed."""
+    global _snapshot
+    version = current_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            # Build completely before publishing so readers never see a partial snapshot
+            _snapshot = CatalogSnapshot(version)
+        return _snapshot
+
+
+def invalidate_catalog() -> None:
+    """Drop the in-process snapshot; the next ``get_catalog()`` rebuilds it."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
@@ -0,0 +1,222 @@
+"""Row-level diff between imported CSV rows and a catalog table.
+
+Instead of deleting and re-inserting a whole table on every import, rows are
+matched to the existing ones by a natural key (the table's type column plus
+the article number, see ``NATURAL_KEYS``). Only new rows are inserted,
+changed rows updated and vanished rows deleted, so a routine catalog edit
+touches a handful of rows and the diff doubles as a change report.
+
+Lookups on the catalog depend on primary-key order (the first matching row
+wins), so a diff is only applied when it keeps the order of the rows as in
+the file. Reordered files are written as a full replace instead.
+
+The file's rows are streamed through the diff: only the existing table and
+the changed rows are held in memory, new rows are written in batches.
+
+Article numbers are stored normalized (no '.0' suffix from Excel float
+exports, see ``article_number_fields``), so the BOM builders use them as is.
+"""
+import hashlib
+from collections import deque
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.db import models
+
+from ..models import (
+    DFM,
+    Entlueftung,
+    GNXChamberArticle,
+    HVB,
+    HVBStuetze,
+    Kugelhahn,
+    Schacht,
+    Schachtgrenze,
+    Schachtkompatibilitaet,
+    Sondenabstand,
+    Sondenbeschriftung,
+    SondenDurchmesser,
+    SondenDurchmesserPipe,
+    Sondengroesse,
+    Sondenverschlusskappe,
+    StumpfschweissEndkappe,
+    Verrohrung,
+    WPA,
+    WPVerschlusskappe,
+)
+from ..utils import format_artikelnummer
+from .csv_reader import batched
+
+# Fields identifying a row across imports. Keys need not be unique: rows
+# sharing a key are matched in file order.
+NATURAL_KEYS = {
+    Schacht: ('schachttyp',),
+    HVB: ('hauptverteilerbalken', 'artikelnummer'),
+    Sondengroesse: ('schachttyp', 'hvb', 'durchmesser_sonde', 'bauform', 'artikelnummer'),
+    SondenDurchmesser: ('schachttyp', 'durchmesser'),
+    SondenDurchmesserPipe: ('durchmesser',),
+    Sondenabstand: ('anschlussart', 'sondenabstand'),
+    Kugelhahn: ('kugelhahn', 'artikelnummer'),
+    DFM: ('durchflussarmatur', 'artikelnummer'),
+    Entlueftung: ('name', 'artikelnummer'),
+    Sondenverschlusskappe: ('name', 'artikelnummer'),
+    StumpfschweissEndkappe: ('name', 'artikelnummer'),
+    WPVerschlusskappe: ('name', 'artikelnummer'),
+    WPA: ('name', 'wp_durchmesser', 'artikelnummer'),
+    Sondenbeschriftung: ('nummer',),
+    Verrohrung: ('verrohrung', 'artikelnummer'),
+    Schachtgrenze: ('schachttyp',),
+    Schachtkompatibilitaet: ('name', 'artikelnummer'),
+    GNXChamberArticle: ('artikelnummer', 'hvb_size_min', 'hvb_size_max'),
+    HVBStuetze: ('hvb_durchmesser', 'position'),
+}
+
+# Rows per INSERT/UPDATE statement
+BULK_BATCH_SIZE = 500
+
+
+def file_hash(file_path, chunk_size=1 << 16) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def article_number_fields(model) -> Tuple[str, ...]:
+    """Fields of ``model`` holding article numbers, stored as ``utils.format_artikelnummer`` returns them."""
+    return tuple(
+        field.attname for field in model._meta.concrete_fields if field.name in ('artikelnummer', 'nummer')
+    )
+
+
+def normalize_article_numbers(row, fields: Iterable[str]) -> bool:
+    """Normalize the article number ``fields`` of ``row`` in place; True if one changed.
+
+    Empty values (None or '') are left as they are.
+    """
+    changed = False
+    for field in fields:
+        value = getattr(row, field)
+        if value and format_artikelnummer(value) != value:
+            setattr(row, field, format_artikelnummer(value))
+            changed = True
+    return changed
+
+
+def _data_fields(model):
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def _comparable(field, value):
+    """Value as it reads back from the database (decimals rounded to the column's places)."""
+    if value is None:
+        return None
+    if isinstance(field, models.DecimalField):
+        return Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    return field.to_python(value)
+
+
+class TableDiff:
+    """Changes that turn a table's rows into the rows of the imported files.
+
+    ``inserted``, ``updated`` and ``deleted`` hold the natural keys of the
+    affected rows (``updated`` with the changed field names) once
+    ``apply()`` has run.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.key_fields = NATURAL_KEYS[model]
+        self.fields = _data_fields(model)
+        self.inserted: List[Tuple] = []
+        self.updated: List[Tuple[Tuple, List[str]]] = []
+        self.deleted: List[Tuple] = []
+        self.replaced = False
+
+    def key(self, row) -> Tuple:
+        return tuple(getattr(row, field) for field in self.key_fields)
+
+    def apply(self, rows: Callable[[], Iterable]):
+        """Write the changes (the caller provides the transaction).
+
+        ``rows`` returns a fresh iterable of unsaved rows on every call. It is
+        consumed once; a second time only if the rows turn out reordered and
+        the table has to be rewritten.
+        """
+        manager = self.model.objects
+        candidates: Dict[Tuple, deque] = {}
+        for row in manager.order_by('pk').iterator():
+            candidates.setdefault(self.key(row), deque()).append(row)
+
+        pending_inserts = []
+        updated_rows = []
+        last_pk = None
+        for row in rows():
+            key = self.key(row)
+            matches = candidates.get(key)
+            if not matches:
+                self.inserted.append(key)
+                # New rows can be written right away: if a later row turns
+                # out to precede them, the whole table is rewritten anyway
+                if not self.replaced:
+                    pending_inserts.append(row)
+                    if len(pending_inserts) >= BULK_BATCH_SIZE:
+                        manager.bulk_create(pending_inserts)
+                        pending_inserts = []
+                continue
+            current = matches.popleft()
+            # New rows get the highest primary keys, so they must come last
+            if self.inserted or (last_pk is not None and current.pk < last_pk):
+                self.replaced = True
+                pending_inserts = []
+                updated_rows = []
+            last_pk = current.pk
+
+            changed = []
+            for field in self.fields:
+                new_value = getattr(row, field.attname)
+                if _comparable(field, getattr(current, field.attname)) != _comparable(field, new_value):
+                    setattr(current, field.attname, new_value)
+                    changed.append(field.attname)
+            if changed:
+                self.updated.append((key, changed))
+                if not self.replaced:
+                    updated_rows.append(current)
+        leftover = [row for rows_left in candidates.values() for row in rows_left]
+        self.deleted = [self.key(row) for row in leftover]
+
+        if self.replaced:
+            manager.all().delete()
+            for batch in batched(rows(), BULK_BATCH_SIZE):
+                manager.bulk_create(batch)
+            return
+        if leftover:
+            manager.filter(pk__in=[row.pk for row in leftover]).delete()
+        if updated_rows:
+            changed_fields = sorted({field for _, fields in self.updated for field in fields})
+            manager.bulk_update(updated_rows, changed_fields, batch_size=BULK_BATCH_SIZE)
+        if pending_inserts:
+            manager.bulk_create(pending_inserts, batch_size=BULK_BATCH_SIZE)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted or self.replaced)
+
+    def summary(self) -> str:
+        text = f'{len(self.inserted)} added, {len(self.updated)} changed, {len(self.deleted)} removed'
+        if self.replaced:
+            text += ' (order changed, table rewritten)'
+        return text
+
+    def report(self) -> dict:
+        """JSON-serializable list of the changed rows."""
+        return {
+            'table': self.model.__name__,
+            'key': list(self.key_fields),
+            'replaced': self.replaced,
+            'added': [list(map(str, key)) for key in self.inserted],
+            'changed': [{'key': list(map(str, key)), 'fields': fields} for key, fields in self.updated],
+            'removed': [list(map(str, key)) for key in self.deleted],
+        }
@@ -0,0 +1,289 @@
+"""Precomputed Schacht × HVB × probe compatibility matrix.
+
+The option endpoints and the BOM probe selection used to re-derive the valid
+combinations (allowed HVB sizes, probe diameters, probe articles and lengths)
+by filtering ``Schachtgrenze``, ``SondenDurchmesser`` and ``Sondengroesse``
+rows on every request. ``CompatibilityMatrix`` does that work once per catalog
+snapshot: rows are grouped under the exact keys the lookups use, and the
+``sondenanzahl`` range search is resolved into a small breakpoint table, so a
+lookup is a couple of dict accesses plus a bisect over a handful of bounds.
+
+The selection rules (bauform preference, range fallback, whitespace-tolerant
+Schachttyp matching) are the ones the endpoints and ``build_bom`` applied.
+
+The pipe-separated compatibility columns of the Kugelhahn, DFM and
+Entlüftung rows ("DA 63|DA 75") are parsed into sets of sizes when the
+snapshot loads (``attach_compatible_sizes``), so the builders test set
+membership instead of splitting the strings for every row of every BOM.
+"""
+import re
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils import parse_allowed_hvb_sizes
+
+_UNBOUNDED = 999999
+
+# Compatibility columns parsed into ``<column>_sizes`` sets
+COMPATIBILITY_COLUMNS = ('et_hvb', 'et_sonden', 'kh_hvb', 'dfm_hvb')
+_DA_ENTRY_RE = re.compile(r'DA ([1-9][0-9]*)')
+_SIZE_RE = re.compile(r'[1-9][0-9]*')
+
+
+def _lower(value) -> str:
+    return str(value or '').strip().lower()
+
+
+def _numeric_sort_key(value):
+    return int(value) if value.isdigit() else 9999
+
+
+def _count_range(entry) -> Tuple[int, int]:
+    """(min, max) sondenanzahl of a Sondengroesse row; empty bounds are open."""
+    return (entry.sondenanzahl_min or 0, entry.sondenanzahl_max or _UNBOUNDED)
+
+
+def parse_compatible_sizes(value) -> Optional[FrozenSet]:
+    """Sizes listed in a compatibility column: "DA 63|DA 75" -> {63, 75}.
+
+    ``None`` for an empty column, which restricts nothing. An empty entry
+    ("DA 63|") is kept as ``None`` and matches an empty selection; entries
+    not of the form "DA <n>" match no size, like in the string comparison of
+    ``utils.check_compatibility``.
+    """
+    if not value or not value.strip():
+        return None
+    sizes = set()
+    for entry in value.split('|'):
+        entry = entry.strip()
+        if not entry:
+            sizes.add(None)
+            continue
+        match = _DA_ENTRY_RE.fullmatch(entry)
+        if match:
+            sizes.add(int(match.group(1)))
+    return frozenset(sizes)
+
+
+def size_key(value):
+    """A selected HVB size or probe diameter as stored in the size sets ("63", "63 mm" -> 63).
+
+    Empty values give ``None``; values that are not a plain size are
+    returned as text, which is never in a size set.
+    """
+    text = '' if value is None else str(value).strip()
+    if text.lower().endswith('mm'):
+        text = text[:-2].strip()
+    if not text:
+        return None
+    return int(text) if _SIZE_RE.fullmatch(text) else text
+
+
+def is_compatible(sizes: Optional[FrozenSet], size) -> bool:
+    """Whether a size key passes a parsed compatibility column."""
+    return sizes is None or size in sizes
+
+
+def attach_compatible_sizes(rows: Iterable) -> None:
+    """Set ``<column>_sizes`` on each row for the compatibility columns its model has."""
+    for row in rows:
+        for column in COMPATIBILITY_COLUMNS:
+            if hasattr(row, column):
+                setattr(row, f'{column}_sizes', parse_compatible_sizes(getattr(row, column)))
+
+
+class ProbeRangeIndex:
+    """Answers "first row whose sondenanzahl range contains n, else the first row".
+
+    Each row contributes two breakpoints (its min and max + 1); between two
+    consecutive breakpoints the answer cannot change, so it is computed once
+    per interval when the index is built.
+    """
+
+    __slots__ = ('_bounds', '_answers')
+
+    def __init__(self, entries: Sequence):
+        entries = tuple(entries)
+        fallback = entries[0] if entries else None
+        ranges = [(_count_range(entry), entry) for entry in entries]
+
+        bounds = sorted({bound for (low, high), _ in ranges for bound in (low, high + 1)})
+        # Interval i covers [bounds[i - 1], bounds[i]); represent it by its first count
+        samples = [bounds[0] - 1] + bounds if bounds else [0]
+        answers = []
+        for count in samples:
+            match = next((entry for (low, high), entry in ranges if low <= count <= high), fallback)
+            answers.append(match)
+
+        self._bounds = tuple(bounds)
+        self._answers = tuple(answers)
+
+    def get(self, sondenanzahl: int):
+        return self._answers[bisect_right(self._bounds, sondenanzahl)]
+
+
+class _BauformGroups:
+    """Range indexes over the Sondengroesse rows of one key, split by bauform.
+
+    ``row_filter`` drops rows that must never be selected (e.g. rows without
+    an article number); the bauform preference is decided on all rows.
+    """
+
+    __slots__ = ('all', 'by_bauform', 'without_bauform')
+
+    def __init__(self, entries: Iterable, row_filter=None):
+        entries = tuple(entries)
+        by_bauform: Dict[str, list] = {}
+        for entry in entries:
+            if entry.bauform:
+                by_bauform.setdefault(entry.bauform.lower(), []).append(entry)
+        without_bauform = [entry for entry in entries if not entry.bauform]
+
+        def index(rows):
+            if not rows:
+                return None
+            return ProbeRangeIndex([entry for entry in rows if row_filter is None or row_filter(entry)])
+
+        self.all = index(entries)
+        self.by_bauform = {key: index(rows) for key, rows in by_bauform.items()}
+        self.without_bauform = index(without_bauform)
+
+    def select(self, bauform: str, prefer_without_bauform: bool) -> ProbeRangeIndex:
+        """Rows for a bauform: exact match, else rows without bauform, else all rows."""
+        if bauform:
+            return self.by_bauform.get(bauform.lower()) or self.without_bauform or self.all
+        if prefer_without_bauform:
+            return self.without_bauform or self.all
+        return self.all
+
+
+class CompatibilityMatrix:
+    """Compatibility lookups built from the rows of one catalog snapshot."""
+
+    def __init__(self, schachtgrenzen, sonden_durchmesser, sondengroessen):
+        # Allowed HVB sizes per Schachttyp (first Schachtgrenze row wins)
+        self._allowed_hvb: Dict[str, List[str]] = {}
+        for grenze in schachtgrenzen:
+            if grenze.schachttyp not in self._allowed_hvb:
+                self._allowed_hvb[grenze.schachttyp] = parse_allowed_hvb_sizes(grenze.erlaubte_hvb or '')
+
+        # Probe diameters per Schachttyp: case-insensitive key, plus a
+        # whitespace-insensitive key that resolves to the first matching spelling
+        by_schacht: Dict[str, list] = {}
+        by_exact_schacht: Dict[str, list] = {}
+        normalized_spelling: Dict[str, str] = {}
+        for row in sonden_durchmesser:
+            by_schacht.setdefault((row.schachttyp or '').lower(), []).append(row.durchmesser)
+            by_exact_schacht.setdefault(row.schachttyp, []).append(row.durchmesser)
+            normalized_spelling.setdefault(row.schachttyp.strip().lower().replace(' ', ''), row.schachttyp)
+        self._durchmesser = {key: self._sorted_durchmesser(values) for key, values in by_schacht.items()}
+        self._durchmesser_normalized = {
+            key: self._sorted_durchmesser(by_exact_schacht[spelling])
+            for key, spelling in normalized_spelling.items()
+        }
+
+        # Sondengroesse rows per (Schachttyp, HVB) and per (Schachttyp, diameter[, HVB])
+        by_schacht_hvb: Dict[Tuple[str, str], list] = {}
+        by_schacht_durchmesser: Dict[Tuple[str, str], list] = {}
+        by_schacht_durchmesser_hvb: Dict[Tuple[str, str, str], list] = {}
+        by_schacht_iexact: Dict[str, list] = {}
+        for entry in sondengroessen:
+            schacht = _lower(entry.schachttyp)
+            by_schacht_hvb.setdefault((schacht, entry.hvb), []).append(entry)
+            by_schacht_durchmesser.setdefault((schacht, entry.durchmesser_sonde), []).append(entry)
+            by_schacht_durchmesser_hvb.setdefault((schacht, entry.durchmesser_sonde, entry.hvb), []).append(entry)
+            by_schacht_iexact.setdefault((entry.schachttyp or '').lower(), []).append(entry)
+
+        self._length_groups = {key: _BauformGroups(rows) for key, rows in by_schacht_hvb.items()}
+        # BOM probe selection only considers rows that carry an article number
+        has_article = lambda entry: bool(entry.artikelnummer)  # noqa: E731
+        self._article_groups = {
+            key: _BauformGroups(rows, has_article) for key, rows in by_schacht_durchmesser_hvb.items()
+        }
+        self._durchmesser_ranges = {
+            key: ProbeRangeIndex([entry for entry in rows if entry.artikelnummer])
+            for key, rows in by_schacht_durchmesser.items()
+        }
+
+        # Probe option rows (sonden-options endpoint) per Schachttyp and lowercased HVB
+        self._sonden_rows = {key: tuple(rows) for key, rows in by_schacht_iexact.items()}
+        self._sonden_options: Dict[Tuple[str, str], List[dict]] = {}
+        for schacht, rows in self._sonden_rows.items():
+            by_hvb: Dict[str, list] = {}
+            for entry in rows:
+                by_hvb.setdefault((entry.hvb or '').lower(), []).append(entry)
+            for hvb, hvb_rows in by_hvb.items():
+                self._sonden_options[(schacht, hvb)] = self.probe_option_rows(hvb_rows)
+
+    @staticmethod
+    def _sorted_durchmesser(values) -> List[str]:
+        # Distinct, sorted numerically
+        return sorted(dict.fromkeys(values), key=_numeric_sort_key)
+
+    # -- Schachtgrenze --------------------------------------------------------
+
+    def allowed_hvb_sizes(self, schachttyp) -> Optional[List[str]]:
+        """Allowed HVB sizes, or None when the Schachttyp has no Schachtgrenze."""
+        return self._allowed_hvb.get(schachttyp)
+
+    # -- probe diameters ------------------------------------------------------
+
+    def sonden_durchmesser(self, schachttyp) -> List[str]:
+        """Probe diameters for a Schachttyp, ignoring case and (as fallback) spaces."""
+        schachttyp = str(schachttyp)
+        return (
+            self._durchmesser.get(schachttyp.lower())
+            or self._durchmesser_normalized.get(schachttyp.lower().replace(' ', ''))
+            or []
+        )
+
+    # -- Sondengroesse --------------------------------------------------------
+
+    def probe_for_lengths(self, schachttyp, hvb, bauform, sondenanzahl: int):
+        """Sondengroesse row providing the pre-configured Vorlauf/Rücklauf lengths.
+
+        An exact bauform match is preferred, then rows without bauform; without
+        a bauform, rows without bauform are preferred.
+        """
+        groups = self._length_groups.get((_lower(schachttyp), hvb))
+        if groups is None:
+            return None
+        return groups.select(bauform, prefer_without_bauform=True).get(sondenanzahl)
+
+    def probe_article(self, schachttyp, durchmesser, hvb, bauform_letter, sondenanzahl: int):
+        """Sondengroesse row whose pipe article goes into the BOM.
+
+        Tries the rows for Schachttyp, probe diameter and HVB (bauform letter
+        preferred) first, then any HVB for that Schachttyp and diameter.
+        """
+        schacht = _lower(schachttyp)
+        groups = self._article_groups.get((schacht, durchmesser, hvb))
+        match = None
+        if groups is not None:
+            match = groups.select(bauform_letter, prefer_without_bauform=False).get(sondenanzahl)
+        if match is None:
+            ranges = self._durchmesser_ranges.get((schacht, durchmesser))
+            if ranges is not None:
+                match = ranges.get(sondenanzahl)
+        return match
+
+    def probe_rows(self, schachttyp) -> Tuple:
+        """Sondengroesse rows whose Schachttyp equals ``schachttyp`` ignoring case."""
+        return self._sonden_rows.get(str(schachttyp).lower(), ())
+
+    def probe_options(self, schachttyp, hvb) -> List[dict]:
+        """Probe option rows for a Schachttyp and HVB (both ignoring case)."""
+        return self._sonden_options.get((str(schachttyp).lower(), str(hvb).lower()), [])
+
+    @staticmethod
+    def probe_option_rows(entries: Iterable) -> List[dict]:
+        """Distinct probe option dicts of ``entries``, sorted numerically by diameter."""
+        fields = ('durchmesser_sonde', 'sondenanzahl_min', 'sondenanzahl_max', 'artikelnummer', 'artikelbezeichnung')
+        rows = {}
+        for entry in entries:
+            row = {field: getattr(entry, field) for field in fields}
+            rows.setdefault(tuple(row.values()), row)
+        return sorted(
+            rows.values(),
+            key=lambda x: int(x['durchmesser_sonde']) if x['durchmesser_sonde'].isdigit() else 9999
+        )
@@ -0,0 +1,138 @@
+"""Queries over saved BOM configurations shared by the list view and exports.
+
+The list is paginated with a keyset (cursor) over ``(created_at, id)``: a
+page is "the next N rows after this position", which the
+``(created_at, id)`` index answers without counting or skipping earlier
+rows, so every page costs the same no matter how many configurations exist.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Count, Q
+
+from ..models import BOMConfiguration
+
+# Query parameters understood by ``filter_configurations``
+FILTER_PARAMS = ('name', 'schachttyp', 'hvb_size', 'article_number')
+
+# Newest first; ``id`` breaks ties between configurations saved in the same instant
+LIST_ORDERING = ('-created_at', '-id')
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor that was not produced by ``encode_cursor``."""
+
+
+def filter_configurations(params, queryset=None):
+    """Apply the configuration list filters from ``params`` (e.g. ``request.GET``).
+
+    Returns ``(queryset, filters)`` where ``filters`` holds the stripped
+    filter values (empty strings for unused filters).
+    """
+    if queryset is None:
+        queryset = BOMConfiguration.objects.all().order_by(*LIST_ORDERING)
+    filters = {name: (params.get(name, '') or '').strip() for name in FILTER_PARAMS}
+
+    if filters['name']:
+        queryset = queryset.filter(name__icontains=filters['name'])
+    if filters['schachttyp']:
+        queryset = queryset.filter(schachttyp__iexact=filters['schachttyp'])
+    if filters['hvb_size']:
+        queryset = queryset.filter(hvb_size=filters['hvb_size'])
+    if filters['article_number']:
+        article_number = filters['article_number']
+        queryset = queryset.filter(
+            Q(full_article_number__icontains=article_number)
+            | Q(mother_article_number__icontains=article_number)
+            | Q(child_article_number__icontains=article_number)
+        )
+    return queryset, filters
+
+
+def encode_cursor(config) -> str:
+    """Opaque cursor pointing just after ``config`` in list order."""
+    raw = f'{config.created_at.isoformat()}|{config.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """``(created_at, id)`` of a cursor; raises ``InvalidCursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, config_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(config_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(f'Ungültiger Cursor: {cursor}')
+
+
+def paginate_configurations(queryset, cursor=None, page_size=PAGE_SIZE):
+    """One page of ``queryset`` (newest first) after ``cursor``.
+
+    Returns ``(configurations, next_cursor)``; ``next_cursor`` is None on
+    the last page. One query, fetching a single row more than the page to
+    know whether another page follows.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    queryset = queryset.order_by(*LIST_ORDERING)
+    if cursor:
+        created_at, config_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=config_id)
+        )
+
+    configurations = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(configurations) > page_size:
+        configurations = configurations[:page_size]
+        next_cursor = encode_cursor(configurations[-1])
+    return configurations, next_cursor
+
+
+def configuration_stats(queryset):
+    """Status counters of ``queryset`` from a single aggregate query.
+
+    The categories match the status column of the list: existing
+    configurations, (new children of) existing mother articles and new ones.
+    """
+    stats = queryset.order_by().aggregate(
+        total=Count('id'),
+        existing=Count('id', filter=Q(is_existing_configuration=True)),
+        mother=Count('id', filter=Q(is_existing_configuration=False, is_existing_mother_article=True)),
+    )
+    stats['new'] = stats['total'] - stats['existing'] - stats['mother']
+    return stats
+
+
+def configuration_status(config) -> str:
+    if config.is_existing_configuration:
+        return 'existing'
+    if config.is_existing_mother_article:
+        return 'mother'
+    return 'new'
+
+
+def configuration_summary(config) -> dict:
+    """JSON representation of a configuration in the list API."""
+    return {
+        'id': config.id,
+        'name': config.name,
+        'schachttyp': config.schachttyp,
+        'hvb_size': config.hvb_size,
+        'sonden_durchmesser': config.sonden_durchmesser,
+        'sondenanzahl': config.sondenanzahl,
+        'sondenabstand': config.sondenabstand,
+        'anschlussart': config.anschlussart,
+        'bauform': config.bauform,
+        'kugelhahn_type': config.kugelhahn_type,
+        'dfm_type': config.dfm_type,
+        'mother_article_number': config.mother_article_number,
+        'child_article_number': config.child_article_number,
+        'full_article_number': config.full_article_number,
+        'status': configuration_status(config),
+        'created_at': config.created_at.isoformat(),
+        'updated_at': config.updated_at.isoformat(),
+    }
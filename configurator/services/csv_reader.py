@@ -0,0 +1,125 @@
+"""Streaming reader for the catalog CSV files.
+
+The files come from Excel exports in varying encodings (UTF-8 with or without
+BOM, Windows-1252) and with ``,`` or ``;`` as separator. Instead of decoding
+the whole file once per candidate encoding, the encoding is sniffed from the
+first block of bytes and the separator from the header line; rows are then
+decoded and yielded one at a time, so reading memory does not grow with the
+file size.
+
+Bytes that are not valid in the sniffed encoding (e.g. a Windows-1252 "ä"
+further down in an otherwise UTF-8 file) are decoded as Windows-1252 (or
+Latin-1 for the few bytes Windows-1252 leaves undefined) instead of failing
+the import.
+"""
+import codecs
+import csv
+import itertools
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Bytes read to sniff the encoding
+SNIFF_SIZE = 64 * 1024
+DELIMITERS = (',', ';', '\t')
+
+_FALLBACK_ERRORS = 'catalog_csv_fallback'
+_QUOTED_RE = re.compile(r'"[^"]*"')
+
+
+def _decode_fallback(error):
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    data = error.object[error.start:error.end]
+    try:
+        text = data.decode('cp1252')
+    except UnicodeDecodeError:
+        text = data.decode('latin1')
+    return text, error.end
+
+
+codecs.register_error(_FALLBACK_ERRORS, _decode_fallback)
+
+
+def sniff_encoding(file_path) -> str:
+    """Encoding of a file judged by its first ``SNIFF_SIZE`` bytes."""
+    with open(file_path, 'rb') as f:
+        block = f.read(SNIFF_SIZE)
+    if block.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # Not final: the block may end inside a multi-byte character
+        codecs.getincrementaldecoder('utf-8')().decode(block, final=False)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8'
+
+
+def sniff_delimiter(header_line: str) -> str:
+    """Most frequent separator in the header line (``,`` if there is none)."""
+    unquoted = _QUOTED_RE.sub('', header_line)
+    counts = {delimiter: unquoted.count(delimiter) for delimiter in DELIMITERS}
+    best = max(DELIMITERS, key=lambda delimiter: counts[delimiter])
+    return best if counts[best] else ','
+
+
+def read_rows(
+    file_path,
+    is_header: Optional[Callable[[int, str], bool]] = None,
+) -> Iterator[List[str]]:
+    """Yield the rows of a CSV file as lists, the header row first.
+
+    ``is_header(line_number, line)`` finds the header in files with leading
+    junk lines; lines before it are skipped. Without it the first line is
+    the header.
+    """
+    encoding = sniff_encoding(file_path)
+    with open(file_path, 'r', encoding=encoding, errors=_FALLBACK_ERRORS, newline='') as f:
+        lines = iter(f)
+        for line_number, line in enumerate(lines):
+            if is_header is None or is_header(line_number, line):
+                break
+        else:
+            return
+        delimiter = sniff_delimiter(line)
+        yield from csv.reader(itertools.chain([line], lines), delimiter=delimiter)
+
+
+def read_dict_rows(
+    file_path,
+    is_header: Optional[Callable[[int, str], bool]] = None,
+) -> Iterator[Dict[str, str]]:
+    """Yield the rows of a CSV file as dicts keyed by the cleaned header names."""
+    return dict_rows(read_rows(file_path, is_header))
+
+
+def dict_rows(rows: Iterable[List[str]]) -> Iterator[Dict[str, str]]:
+    """Turn rows (header first) into dicts keyed by the cleaned header names.
+
+    Header names are stripped of whitespace and byte order marks. Like
+    ``csv.DictReader``, empty lines are skipped and surplus cells are
+    collected under the key ``None``. Missing cells read as empty strings,
+    like empty ones: exports end rows at the last filled cell or not, and
+    CSV files and Excel sheets of the same catalog must give the same rows.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    fieldnames = [name.lstrip('\ufeff').strip() for name in header]
+    width = len(fieldnames)
+    for values in rows:
+        if not values:
+            continue
+        row = dict(zip(fieldnames, values))
+        if len(values) > width:
+            row[None] = values[width:]
+        else:
+            for name in fieldnames[len(values):]:
+                row[name] = ''
+        yield row
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Lists of up to ``size`` consecutive items."""
+    iterator = iter(iterable)
+    return iter(lambda: list(itertools.islice(iterator, size)), [])
@@ -0,0 +1,211 @@
+"""Server-side export of saved BOMs as CSV or XLSX.
+
+Rows follow the browser export (``exportBOM()``): ``Artikelnummer;Menge;
+Artikelbeschreibung`` without quotes, Menge with a comma as decimal separator
+(no decimals for whole numbers, at most three otherwise) and bracketed
+suffixes like "(Sonden)" removed from the description.
+
+The ``stream_*`` functions are generators for ``StreamingHttpResponse``.
+Configurations are read with ``QuerySet.iterator()`` and their items are
+loaded for ``chunk_size`` configurations at a time, so memory stays constant
+no matter how many configurations are exported.
+"""
+import io
+import re
+import zipfile
+from decimal import ROUND_HALF_UP, Decimal
+from xml.sax.saxutils import escape
+
+from django.utils.text import slugify
+
+from ..models import BOMItem
+from .bom_generation import ordered_bom_items
+
+EXPORT_HEADER = ('Artikelnummer', 'Menge', 'Artikelbeschreibung')
+# Multi-configuration exports prefix each row with the configuration's ID and export name
+MULTI_EXPORT_HEADER = ('Konfiguration-ID', 'Stückliste') + EXPORT_HEADER
+
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_BRACKET_SUFFIX_RE = re.compile(r'\s*\([^)]*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Characters not allowed in XML 1.0 documents
+_XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def clean_artikelnummer(value) -> str:
+    return _WHITESPACE_RE.sub(' ', str(value or '')).strip()
+
+
+def clean_bezeichnung(value) -> str:
+    """Description without bracketed suffixes like "(Sonden)", "(HVB)"."""
+    return _WHITESPACE_RE.sub(' ', _BRACKET_SUFFIX_RE.sub('', str(value or ''))).strip()
+
+
+def round_menge(value) -> Decimal:
+    """Quantity as shown in the BOM table (``floatformat:3``)."""
+    return Decimal(str(value or 0)).quantize(Decimal('0.001'), rounding=ROUND_HALF_UP)
+
+
+def format_menge(value) -> str:
+    """Quantity for CSV: '2', '1,29' (comma decimals, trailing zeros dropped)."""
+    menge = round_menge(value)
+    if menge == menge.to_integral_value():
+        return str(int(menge))
+    return format(menge.normalize(), 'f').replace('.', ',')
+
+
+def export_name(config) -> str:
+    """Article number (or configuration name) used for file names and the Stückliste column."""
+    name = config.full_article_number or config.mother_article_number or slugify(config.name)
+    return re.sub(r'[^\w\-\.]+', '_', name or f'konfiguration_{config.id}')
+
+
+def iter_bom_items(configurations, chunk_size=200):
+    """Yield ``(configuration, item)`` pairs, items in display order per configuration."""
+    batch = []
+    for config in configurations.iterator(chunk_size=chunk_size):
+        batch.append(config)
+        if len(batch) >= chunk_size:
+            yield from _items_for(batch)
+            batch = []
+    if batch:
+        yield from _items_for(batch)
+
+
+def _items_for(configs):
+    items_by_config = {}
+    items = (
+        BOMItem.objects
+        .filter(configuration_id__in=[config.id for config in configs])
+        .only('configuration_id', 'artikelnummer', 'artikelbezeichnung', 'menge', 'source_table', 'position')
+        .order_by('configuration_id', 'position', 'id')
+    )
+    for item in items:
+        items_by_config.setdefault(item.configuration_id, []).append(item)
+    for config in configs:
+        for item in ordered_bom_items(items_by_config.get(config.id, []), config.schachttyp):
+            yield config, item
+
+
+def stream_csv(configurations, multiple=False, chunk_size=200):
+    """CSV lines for the configurations (with ID and Stückliste columns when ``multiple``)."""
+    yield ';'.join(MULTI_EXPORT_HEADER if multiple else EXPORT_HEADER) + '\n'
+    for config, item in iter_bom_items(configurations, chunk_size):
+        row = [
+            clean_artikelnummer(item.artikelnummer),
+            format_menge(item.menge),
+            clean_bezeichnung(item.artikelbezeichnung),
+        ]
+        if multiple:
+            row[:0] = [str(config.id), export_name(config)]
+        yield ';'.join(row) + '\n'
+
+
+# -- XLSX -----------------------------------------------------------------------
+
+_XLSX_STATIC_PARTS = (
+    ('[Content_Types].xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    )),
+    ('_rels/.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )),
+    ('xl/workbook.xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Stückliste" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )),
+    ('xl/_rels/workbook.xml.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )),
+)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream collecting what ZipFile writes until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    return 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'[index]
+
+
+def _xlsx_row(row_number: int, values) -> str:
+    cells = []
+    for index, value in enumerate(values):
+        ref = f'{_column_letter(index)}{row_number}'
+        if isinstance(value, Decimal):
+            cells.append(f'<c r="{ref}"><v>{format(value, "f")}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL_RE.sub('', str(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def stream_xlsx(configurations, multiple=False, chunk_size=200, rows_per_chunk=500):
+    """XLSX workbook bytes (one sheet, numeric Menge column) written as a streamed zip."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS:
+            workbook.writestr(name, content)
+        yield sink.drain()
+
+        with workbook.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            header = MULTI_EXPORT_HEADER if multiple else EXPORT_HEADER
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row(1, header)
+            ).encode('utf-8'))
+
+            row_number = 1
+            for config, item in iter_bom_items(configurations, chunk_size):
+                row_number += 1
+                row = [
+                    clean_artikelnummer(item.artikelnummer),
+                    round_menge(item.menge).normalize(),
+                    clean_bezeichnung(item.artikelbezeichnung),
+                ]
+                if multiple:
+                    row[:0] = [Decimal(config.id), export_name(config)]
+                sheet.write(_xlsx_row(row_number, row).encode('utf-8'))
+                if row_number % rows_per_chunk == 0:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
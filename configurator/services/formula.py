@@ -0,0 +1,332 @@
+"""Compiled evaluation of catalog quantity formulas (``Menge Formel``).
+
+Formulas such as ``=(sondenanzahl-1) * sondenabstand * 2 + zuschlag_links``
+are parsed once into a small expression tree and cached. Evaluating a
+compiled formula against a context walks that tree over Python ints/floats,
+without regular expressions or ``eval``.
+
+The parsing rules reproduce the historic ``calculate_formula`` behaviour
+exactly: the leading ``=`` is dropped, context keys are substituted as whole
+words (longest key first), trailing comments after the numeric expression
+are ignored, unbalanced parentheses cut the expression, and arithmetic
+follows Python's int/float semantics (``/`` always yields a float).
+"""
+import operator
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+# Context keys are replaced by single placeholder characters while compiling.
+# Yi syllables are word characters (like the digits they stand for), so
+# ``\b`` boundaries behave exactly as with the substituted numbers.
+_PLACEHOLDER_BASE = 0xA000
+_PLACEHOLDER_LIMIT = 0xA48C
+
+_NUMBER_RE = re.compile(r'\d+\.\d*|\.\d+|\d+')
+# Values that substitute to a single, non-negative Python number literal
+_LITERAL_RE = re.compile(r'(?:\d+\.\d*|\.\d+|\d+)\Z')
+
+_BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '**': operator.pow,
+}
+_UNARY_OPS = {
+    '+': operator.pos,
+    '-': operator.neg,
+}
+
+
+class FormulaSyntaxError(ValueError):
+    """Raised internally when the numeric part of a formula does not parse."""
+
+
+def _is_placeholder(char: str) -> bool:
+    return _PLACEHOLDER_BASE <= ord(char) < _PLACEHOLDER_LIMIT
+
+
+def _literal_value(text: str):
+    """Convert a number literal like Python's tokenizer would (int or float)."""
+    if '.' in text:
+        return float(text)
+    if len(text) > 1 and text[0] == '0' and text.strip('0'):
+        # Leading zeros in decimal integer literals are a SyntaxError in Python 3
+        raise FormulaSyntaxError(text)
+    return int(text)
+
+
+def _strip_comment(expression: str, extra_chars: str = '') -> Optional[str]:
+    """Cut an expression down to its leading numeric part.
+
+    Mirrors the historic clean-up steps: drop an unclosed parenthesised tail,
+    keep the leading run of number/operator characters and re-check paren
+    balance. ``extra_chars`` are additional characters treated like digits
+    (the variable placeholders).
+    """
+    paren_pos = expression.find('(')
+    if paren_pos >= 0:
+        paren_count = 0
+        for i in range(paren_pos, len(expression)):
+            if expression[i] == '(':
+                paren_count += 1
+            elif expression[i] == ')':
+                paren_count -= 1
+                if paren_count == 0:
+                    break
+        else:
+            if paren_count > 0:
+                expression = expression[:paren_pos].strip()
+
+    match = re.match(r'[0-9+\-*/().\s' + re.escape(extra_chars) + r']+', expression)
+    if not match:
+        return None
+    expression = match.group(0).strip()
+    if not expression:
+        return None
+
+    if expression.count('(') != expression.count(')'):
+        paren_pos = expression.find('(')
+        if paren_pos >= 0:
+            expression = expression[:paren_pos].strip()
+        if not expression:
+            return None
+
+    allowed_chars = set('0123456789+-*/.() ') | set(extra_chars)
+    if not all(c in allowed_chars for c in expression):
+        return None
+    return expression
+
+
+def _tokenize(expression: str, variables: Tuple[str, ...] = ()):
+    tokens = []
+    pos = 0
+    length = len(expression)
+    while pos < length:
+        char = expression[pos]
+        if char == ' ':
+            pos += 1
+        elif expression.startswith('**', pos) or expression.startswith('//', pos):
+            tokens.append(('op', expression[pos:pos + 2]))
+            pos += 2
+        elif char in '+-*/()':
+            tokens.append(('op', char))
+            pos += 1
+        elif _is_placeholder(char):
+            tokens.append(('var', variables[ord(char) - _PLACEHOLDER_BASE]))
+            pos += 1
+        else:
+            match = _NUMBER_RE.match(expression, pos)
+            if not match:
+                raise FormulaSyntaxError(expression)
+            tokens.append(('num', _literal_value(match.group(0))))
+            pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser for Python's arithmetic expression grammar.
+
+    arith := term (('+' | '-') term)*
+    term  := factor (('*' | '/' | '//') factor)*
+    factor:= ('+' | '-') factor | power
+    power := atom ['**' factor]
+    atom  := NUMBER | VARIABLE | '(' arith ')'
+
+    Each rule returns a closure ``f(values) -> number``.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self) -> Callable:
+        node = self.arith()
+        if self.pos != len(self.tokens):
+            raise FormulaSyntaxError('unexpected trailing tokens')
+        return node
+
+    def _peek_op(self):
+        if self.pos < len(self.tokens) and self.tokens[self.pos][0] == 'op':
+            return self.tokens[self.pos][1]
+        return None
+
+    def _binary(self, operand, operators):
+        left = operand()
+        while self._peek_op() in operators:
+            op = _BINARY_OPS[self.tokens[self.pos][1]]
+            self.pos += 1
+            right = operand()
+            left = (lambda l, r, f: lambda values: f(l(values), r(values)))(left, right, op)
+        return left
+
+    def arith(self):
+        return self._binary(self.term, ('+', '-'))
+
+    def term(self):
+        return self._binary(self.factor, ('*', '/', '//'))
+
+    def factor(self):
+        op = self._peek_op()
+        if op in _UNARY_OPS:
+            self.pos += 1
+            operand = self.factor()
+            func = _UNARY_OPS[op]
+            return lambda values: func(operand(values))
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        if self._peek_op() == '**':
+            self.pos += 1
+            exponent = self.factor()
+            return lambda values: operator.pow(base(values), exponent(values))
+        return base
+
+    def atom(self):
+        if self.pos >= len(self.tokens):
+            raise FormulaSyntaxError('unexpected end of expression')
+        kind, value = self.tokens[self.pos]
+        self.pos += 1
+        if kind == 'num':
+            return lambda values: value
+        if kind == 'var':
+            return lambda values: values[value]
+        if value == '(':
+            inner = self.arith()
+            if self._peek_op() != ')':
+                raise FormulaSyntaxError('missing closing parenthesis')
+            self.pos += 1
+            return inner
+        raise FormulaSyntaxError(f'unexpected {value!r}')
+
+
+def _to_decimal(result) -> Decimal:
+    return Decimal(str(result))
+
+
+class CompiledFormula:
+    """A parsed formula with its declared variables.
+
+    ``variables`` lists the context keys the expression reads. ``evaluate``
+    returns the same Decimal (or None) the historic ``calculate_formula``
+    returned for the same formula and context.
+    """
+
+    __slots__ = ('source', 'variables', '_func', '_textual')
+
+    def __init__(self, source: str, variables: Tuple[str, ...], func: Optional[Callable], textual: bool):
+        self.source = source
+        self.variables = variables
+        self._func = func
+        self._textual = textual
+
+    def evaluate(self, context: Dict) -> Optional[Decimal]:
+        if self._textual:
+            return _evaluate_substituted(self.source, context)
+
+        values = {}
+        for name in self.variables:
+            text = str(context[name])
+            if not _LITERAL_RE.match(text):
+                # Negative or non-numeric values change the token stream once
+                # substituted; evaluate those on the substituted text instead.
+                return _evaluate_substituted(self.source, context)
+            try:
+                values[name] = _literal_value(text)
+            except FormulaSyntaxError:
+                # e.g. '007': let the substituted text decide where it ends
+                return _evaluate_substituted(self.source, context)
+
+        if self._func is None:
+            return None
+        try:
+            return _to_decimal(self._func(values))
+        except Exception as exc:
+            print(f"Formula calculation error: {exc}")
+            return None
+
+
+def _strip_prefix(formula: str) -> str:
+    expression = formula.strip()
+    if expression.startswith('='):
+        expression = expression[1:]
+    return expression
+
+
+def _evaluate_substituted(formula: str, context: Dict) -> Optional[Decimal]:
+    """Slow path: substitute the context values as text, then parse and evaluate."""
+    try:
+        expression = _strip_prefix(formula)
+        for key in _key_order(tuple(context)):
+            pattern = r'\b' + re.escape(key) + r'\b'
+            expression = re.sub(pattern, str(context[key]), expression)
+        expression = _strip_comment(expression)
+        if expression is None:
+            return None
+        func = _Parser(_tokenize(expression)).parse()
+        return _to_decimal(func({}))
+    except FormulaSyntaxError:
+        return None
+    except Exception as exc:
+        print(f"Formula calculation error: {exc}")
+        return None
+
+
+@lru_cache(maxsize=256)
+def _key_order(keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Substitution order of the context keys (longest first, stable)."""
+    return tuple(sorted(keys, key=len, reverse=True))
+
+
+@lru_cache(maxsize=4096)
+def compile_formula(formula: str, keys: Tuple[str, ...]) -> CompiledFormula:
+    """Parse ``formula`` for a context with the given keys (cached).
+
+    The key set is part of the cache key because it decides which words
+    are variables and therefore where the numeric expression ends.
+    """
+    key_order = _key_order(keys)
+    expression = _strip_prefix(formula)
+
+    if len(key_order) > _PLACEHOLDER_LIMIT - _PLACEHOLDER_BASE or any(_is_placeholder(c) for c in expression):
+        return CompiledFormula(formula, (), None, textual=True)
+
+    placeholders = ''.join(chr(_PLACEHOLDER_BASE + i) for i in range(len(key_order)))
+    for index, key in enumerate(key_order):
+        pattern = r'\b' + re.escape(key) + r'\b'
+        expression = re.sub(pattern, lambda _match, char=placeholders[index]: char, expression)
+
+    # A variable glued to a '.' would merge with it into one number literal
+    # once substituted (e.g. "sondenanzahl.5"); keep the textual semantics.
+    for i, char in enumerate(expression):
+        if _is_placeholder(char) and (
+            (i > 0 and expression[i - 1] == '.') or (i + 1 < len(expression) and expression[i + 1] == '.')
+        ):
+            return CompiledFormula(formula, (), None, textual=True)
+
+    expression = _strip_comment(expression, placeholders)
+    if expression is None:
+        return CompiledFormula(formula, (), None, textual=False)
+
+    variables = tuple(sorted({key_order[ord(c) - _PLACEHOLDER_BASE] for c in expression if _is_placeholder(c)}))
+    try:
+        func = _Parser(_tokenize(expression, key_order)).parse()
+    except FormulaSyntaxError:
+        func = None
+    return CompiledFormula(formula, variables, func, textual=False)
+
+
+def evaluate_formula(formula, context) -> Optional[Decimal]:
+    """Evaluate ``formula`` against ``context`` using the compiled-formula cache."""
+    if not formula or formula.strip() == '':
+        return None
+    try:
+        compiled = compile_formula(formula, tuple(context))
+    except Exception as exc:
+        print(f"Formula calculation error: {exc}")
+        return None
+    return compiled.evaluate(context)
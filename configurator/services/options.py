@@ -0,0 +1,354 @@
+"""Dependent option lists for the configurator form.
+
+Each function takes the request data of its (legacy) endpoint and returns the
+JSON payload that endpoint returns, reading only from the catalog snapshot.
+``collect_options`` evaluates several of them for one selection, which backs
+the batched ``/api/options/`` endpoint.
+"""
+from .catalog import get_catalog
+from .compatibility import is_compatible, size_key
+
+CSV_NOT_IMPORTED_ERROR = 'CSV data not imported. Please run: python manage.py import_csv_data --force'
+
+# Product tables whose articles can be offered for GN X chambers (article index source tables)
+GNX_ARTICLE_TABLES = ('Kugelhahn', 'DFM', 'Entlueftung', 'Sondenverschlusskappe', 'StumpfschweissEndkappe')
+
+
+def _strip_mm(value) -> str:
+    value = str(value or '').strip()
+    # Remove 'mm' suffix if present (e.g., '110mm' -> '110')
+    if value.lower().endswith('mm'):
+        value = value[:-2].strip()
+    return value
+
+
+def allowed_hvb_sizes(data, catalog=None):
+    """Allowed HVB sizes for a Schachttyp based on Schachtgrenze."""
+    catalog = catalog or get_catalog()
+    try:
+        schachttyp = data.get('schachttyp', '').strip()
+        if not schachttyp:
+            return {'allowed_sizes': [], 'error': 'Schachttyp is required'}
+
+        allowed_sizes = catalog.compatibility.allowed_hvb_sizes(schachttyp)
+        if allowed_sizes is None:
+            # If no restriction found, allow all HVB sizes
+            return {'allowed_sizes': [], 'all_allowed': True}
+
+        return {
+            'allowed_sizes': allowed_sizes,
+            'all_allowed': len(allowed_sizes) == 0  # If empty, all are allowed
+        }
+    except Exception as e:
+        return {'allowed_sizes': [], 'error': str(e)}
+
+
+def schachtgrenze_info(data, catalog=None):
+    """Max sondenanzahl from Schachtgrenze for a Schachttyp."""
+    catalog = catalog or get_catalog()
+    try:
+        schachttyp = data.get('schachttyp', '').strip()
+        if not schachttyp:
+            return {'max_sondenanzahl': None, 'error': 'Schachttyp is required'}
+
+        schachtgrenze = catalog.schachtgrenze(schachttyp)
+        if schachtgrenze is None:
+            # If no restriction found, return None (no limit)
+            return {
+                'max_sondenanzahl': None,
+                'min_sondenanzahl': 2,
+                'error': 'No Schachtgrenze found for this Schachttyp'
+            }
+        return {
+            'max_sondenanzahl': schachtgrenze.max_sondenanzahl,
+            'min_sondenanzahl': 2  # Always 2 as per requirement
+        }
+    except Exception as e:
+        return {'max_sondenanzahl': None, 'error': str(e)}
+
+
+def sonden_durchmesser_options(data, catalog=None):
+    """Probe diameters for a Schachttyp (Sonden Durchmesser.csv).
+
+    Returns ``CSV_NOT_IMPORTED_ERROR`` as error when the table is empty.
+    """
+    catalog = catalog or get_catalog()
+    schachttyp = data.get('schachttyp', '').strip()
+    if not schachttyp:
+        return {
+            'sonden_durchmesser_options': [],
+            'error': 'Missing schachttyp'
+        }
+
+    if not catalog.sonden_durchmesser():
+        return {
+            'sonden_durchmesser_options': [],
+            'error': CSV_NOT_IMPORTED_ERROR
+        }
+
+    # Case-insensitive match, falling back to a match ignoring whitespace differences
+    durchmesser_list = catalog.compatibility.sonden_durchmesser(schachttyp)
+
+    return {
+        # Always show a space before 'mm'
+        'sonden_durchmesser_options': [{'durchmesser': d, 'label': f'{d} mm'} for d in durchmesser_list],
+        'schachttyp': schachttyp
+    }
+
+
+def sonden_options(data, catalog=None):
+    """Probe rows (diameter, sondenanzahl range, article) for a Schachttyp and HVB.
+
+    Falls back to HVB values containing the requested size and finally to all
+    probes of the Schachttyp (reported as ``debug.fallback``).
+    """
+    catalog = catalog or get_catalog()
+    # Normalize inputs defensively (handles autofill and formatting differences)
+    schachttyp = " ".join(str(data.get('schachttyp', '') or '').strip().split())  # collapse inner whitespace
+    hvb_size = _strip_mm(data.get('hvb_size', '') or '')
+
+    if not schachttyp or not hvb_size:
+        return {
+            'sonden_options': [],
+            'error': 'Missing schachttyp or hvb_size',
+            'received': {'schachttyp': schachttyp, 'hvb_size': hvb_size}
+        }
+
+    matrix = catalog.compatibility
+    fallback_used = False
+    options_list = matrix.probe_options(schachttyp, hvb_size)
+    if not options_list:
+        # Try fuzzy HVB matching
+        hvb_lower = hvb_size.lower()
+        options_list = matrix.probe_option_rows(
+            entry for entry in matrix.probe_rows(schachttyp)
+            if hvb_lower in (entry.hvb or '').lower()
+        )
+        # Safe fallback: if still nothing, try by schachttyp only
+        if not options_list:
+            fallback_used = True
+            options_list = matrix.probe_option_rows(matrix.probe_rows(schachttyp))
+
+    payload = {
+        'sonden_options': options_list,
+        'debug': {
+            'received': {'schachttyp': schachttyp, 'hvb_size': hvb_size},
+            'count': len(options_list)
+        }
+    }
+    if fallback_used:
+        payload['debug']['fallback'] = 'schachttyp_only'
+    return payload
+
+
+def sondenabstand_options(data, catalog=None):
+    """Probe distances for an Anschlussart."""
+    catalog = catalog or get_catalog()
+    anschlussart = data.get('anschlussart', 'einseitig')
+    return {
+        'abstand_options': [
+            {
+                'sondenabstand': row.sondenabstand,
+                'zuschlag_links': row.zuschlag_links,
+                'zuschlag_rechts': row.zuschlag_rechts,
+                'hinweis': row.hinweis,
+            }
+            for row in catalog.sondenabstaende(anschlussart)
+        ]
+    }
+
+
+def dfm_options(data, catalog=None):
+    """DFM types of a category ('plastic' or 'brass') in CSV order."""
+    catalog = catalog or get_catalog()
+    category = data.get('category', '')
+    if not category:
+        return {'dfm_options': []}
+
+    # Exclude category headers that shouldn't be selectable
+    exclude_categories = ['Brass Flowmeters', 'Plastic Flowmeters']
+
+    # Distinct Durchflussarmatur in order of first appearance (original CSV order)
+    names = dict.fromkeys(
+        dfm.durchflussarmatur for dfm in catalog.all_dfms()
+        if dfm.durchflussarmatur and dfm.durchflussarmatur not in exclude_categories
+    )
+
+    options = []
+    for name in names:
+        if category == 'plastic':
+            # Plastic flow meters: K-DFM series
+            if name.startswith('K-DFM'):
+                options.append(name)
+        elif category == 'brass':
+            # Brass flow meters: HC VTR, IMI STAD, IMI TA series
+            if (name.startswith('HC VTR') or
+                    name.startswith('IMI STAD') or
+                    name.startswith('IMI TA')):
+                options.append(name)
+    return {'dfm_options': options}
+
+
+def kugelhahn_options(data, catalog=None):
+    """Kugelhahn types compatible with the selected HVB and probe diameter."""
+    catalog = catalog or get_catalog()
+    hvb_size = _strip_mm(data.get('hvb_size', ''))
+    probe_size = _strip_mm(data.get('sonden_durchmesser', ''))
+    if not hvb_size or not probe_size:
+        return {'kugelhahn_options': []}
+
+    hvb_key = size_key(hvb_size)
+    probe_key = size_key(probe_size)
+    compatible_types = set()
+    for entry in catalog.all_kugelhaehne():
+        kh_type = entry.kugelhahn
+        if not kh_type:
+            continue
+
+        # Apply the same compatibility checks as in build_kugelhahn_components
+        if not (
+            is_compatible(entry.et_hvb_sizes, hvb_key)
+            and is_compatible(entry.et_sonden_sizes, probe_key)
+            and is_compatible(entry.kh_hvb_sizes, hvb_key)
+        ):
+            continue
+
+        compatible_types.add(kh_type)
+
+    return {'kugelhahn_options': sorted(compatible_types)}
+
+
+def wp_options(data, catalog=None):
+    """WP diameters available for an HVB size (WPA.csv)."""
+    catalog = catalog or get_catalog()
+    hvb_size = _strip_mm(data.get('hvb_size', ''))
+    if not hvb_size:
+        return {'wp_options': []}
+
+    # In WPA, the "name" field stores the HVB diameter from the first column.
+    wp_diameters = {
+        str(entry.wp_durchmesser).strip()
+        for entry in catalog.wpas(hvb_size)
+        if entry.wp_durchmesser
+    }
+    return {'wp_options': sorted(wp_diameters, key=lambda x: int(x))}
+
+
+def hvb_stuetze_articles(data, catalog=None):
+    """HVB Stütze articles (Oben and Unter) for an HVB size."""
+    catalog = catalog or get_catalog()
+    hvb_size = _strip_mm(data.get('hvb_size', ''))
+    if not hvb_size:
+        return {'articles': []}
+
+    stuetzen = sorted(catalog.hvb_stuetzen(hvb_size), key=lambda s: s.position)
+    return {
+        'articles': [
+            {
+                'artikelnummer': stuetze.artikelnummer,
+                'artikelbezeichnung': stuetze.artikelbezeichnung,
+                'position': stuetze.position,
+                'hvb_durchmesser': stuetze.hvb_durchmesser
+            }
+            for stuetze in stuetzen
+        ]
+    }
+
+
+def gnx_chamber_articles(data, catalog=None):
+    """GN X chamber articles for an HVB size that exist in the product data."""
+    catalog = catalog or get_catalog()
+    hvb_size = int(data.get('hvb_size', 0))
+
+    articles = []
+    for article in catalog.gnx_articles():
+        if not (article.hvb_size_min <= hvb_size <= article.hvb_size_max):
+            continue
+        # Only articles from the product tables; HVBStuetze articles are handled by
+        # build_hvb_stuetze_components and must not appear as "Zusatzartikel" in Step 3
+        if (
+            catalog.is_article(article.artikelnummer, GNX_ARTICLE_TABLES)
+            and not catalog.is_article(article.artikelnummer, ('HVBStuetze',))
+        ):
+            articles.append({
+                'id': article.id,
+                'artikelnummer': article.artikelnummer,
+                'artikelbezeichnung': article.artikelbezeichnung,
+                'is_automatic': article.is_automatic
+            })
+    return {'articles': articles}
+
+
+def probe_lengths(data, catalog=None):
+    """Pre-configured Vorlauf/Rücklauf lengths from Sondengroesse.
+
+    Lookup is based on Schachttyp, HVB, Bauform, and Sondenanzahl (within range).
+    Probe diameter does NOT affect the lengths — only which pipe article is used.
+    """
+    catalog = catalog or get_catalog()
+    schachttyp = (data.get('schachttyp') or '').strip()
+    hvb_size = (data.get('hvb_size') or '').strip()
+    bauform = (data.get('bauform') or '').strip()
+    sondenanzahl = data.get('sondenanzahl')
+
+    if not schachttyp or not hvb_size or sondenanzahl is None:
+        return {'found': False, 'error': 'Missing required fields'}
+
+    try:
+        sondenanzahl = int(sondenanzahl)
+    except (ValueError, TypeError):
+        return {'found': False, 'error': 'Invalid sondenanzahl'}
+
+    # If bauform is provided, prefer exact match; fall back to empty/null bauform.
+    # The entry whose sondenanzahl range contains the count wins, otherwise the first.
+    best_match = catalog.compatibility.probe_for_lengths(schachttyp, hvb_size, bauform, sondenanzahl)
+
+    if not best_match:
+        return {'found': False}
+    return {
+        'found': True,
+        'vorlauf_laenge': str(best_match.vorlauf_laenge) if best_match.vorlauf_laenge is not None else None,
+        'ruecklauf_laenge': str(best_match.ruecklauf_laenge) if best_match.ruecklauf_laenge is not None else None,
+        'schachttyp': best_match.schachttyp,
+        'hvb': best_match.hvb,
+        'bauform': best_match.bauform or '',
+        'sondenanzahl_min': best_match.sondenanzahl_min,
+        'sondenanzahl_max': best_match.sondenanzahl_max,
+    }
+
+
+# Section name in the /api/options/ response -> option function
+OPTION_SECTIONS = {
+    'allowed_hvb_sizes': allowed_hvb_sizes,
+    'schachtgrenze_info': schachtgrenze_info,
+    'sonden_durchmesser_options': sonden_durchmesser_options,
+    'sonden_options': sonden_options,
+    'sondenabstand_options': sondenabstand_options,
+    'dfm_options': dfm_options,
+    'kugelhahn_options': kugelhahn_options,
+    'wp_options': wp_options,
+    'hvb_stuetze_articles': hvb_stuetze_articles,
+    'gnx_chamber_articles': gnx_chamber_articles,
+    'probe_lengths': probe_lengths,
+}
+
+
+def collect_options(selection, sections=None, catalog=None):
+    """Evaluate the requested option sections (default: all) for one selection.
+
+    ``selection`` uses the generate-bom field names; ``dfm_category`` is passed
+    to the DFM section as its ``category``. A failing section reports its error
+    without affecting the others.
+    """
+    catalog = catalog or get_catalog()
+    data = dict(selection)
+    data.setdefault('category', selection.get('dfm_category', ''))
+
+    result = {}
+    for name in sections or OPTION_SECTIONS:
+        func = OPTION_SECTIONS[name]
+        try:
+            result[name] = func(data, catalog)
+        except Exception as e:
+            result[name] = {'error': str(e)}
+    return result
@@ -0,0 +1,91 @@
+"""Material requirements: total quantity per article over many configurations.
+
+The configurations are selected with the configuration list filters plus an
+optional creation date range (e.g. all BOMs of a project or a quarter).
+``BOMItem.menge`` is summed per article number by the database in one
+grouped query, and the rows are read with ``iterator()``, so the CSV is
+streamed while the query returns it instead of exporting every BOM.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Min, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from ..models import BOMItem
+from .configurations import filter_configurations
+from .export import clean_artikelnummer, clean_bezeichnung, format_menge, round_menge
+
+REQUIREMENTS_HEADER = ('Artikelnummer', 'Menge', 'Artikelbeschreibung', 'Konfigurationen')
+
+# Creation date range (YYYY-MM-DD, both days included)
+DATE_PARAMS = ('created_from', 'created_to')
+
+
+class InvalidDate(ValueError):
+    """Raised for a date filter that is not a valid YYYY-MM-DD date."""
+
+
+def _start_of_day(value: str, days: int = 0):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise InvalidDate(f'Ungültiges Datum: {value} (erwartet JJJJ-MM-TT)')
+    return timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+
+
+def filter_requirement_configurations(params):
+    """Configurations for a requirements report: list filters and date range from ``params``.
+
+    Returns ``(queryset, filters)`` like ``filter_configurations``; raises
+    ``InvalidDate``.
+    """
+    configurations, filters = filter_configurations(params)
+    for name in DATE_PARAMS:
+        filters[name] = (params.get(name, '') or '').strip()
+    # Compared as datetimes so the created_at index can be used
+    if filters['created_from']:
+        configurations = configurations.filter(created_at__gte=_start_of_day(filters['created_from']))
+    if filters['created_to']:
+        configurations = configurations.filter(created_at__lt=_start_of_day(filters['created_to'], days=1))
+    return configurations, filters
+
+
+def material_requirements(configurations):
+    """Rows ``{artikelnummer, menge, artikelbezeichnung, configurations}`` per article, by number."""
+    return (
+        BOMItem.objects
+        .filter(configuration_id__in=configurations.order_by().values('id'))
+        .values('artikelnummer')
+        .annotate(
+            menge=Sum('menge'),
+            artikelbezeichnung=Min('artikelbezeichnung'),
+            configurations=Count('configuration_id', distinct=True),
+        )
+        .order_by('artikelnummer')
+    )
+
+
+def requirement_summary(row) -> dict:
+    """JSON representation of a requirements row."""
+    return {
+        'artikelnummer': row['artikelnummer'],
+        # SQLite sums decimals as floats; rounded to the scale of BOMItem.menge
+        'menge': round_menge(row['menge']),
+        'artikelbezeichnung': clean_bezeichnung(row['artikelbezeichnung']),
+        'configurations': row['configurations'],
+    }
+
+
+def stream_requirements_csv(configurations, chunk_size=2000):
+    """CSV lines of the requirements (formatted like the BOM export)."""
+    yield ';'.join(REQUIREMENTS_HEADER) + '\n'
+    for row in material_requirements(configurations).iterator(chunk_size=chunk_size):
+        yield ';'.join([
+            clean_artikelnummer(row['artikelnummer']),
+            format_menge(row['menge']),
+            clean_bezeichnung(row['artikelbezeichnung']),
+            str(row['configurations']),
+        ]) + '\n'
@@ -0,0 +1,90 @@
+"""Where-used queries: which saved configurations contain an article.
+
+The configurations of an article number are found through the
+``(artikelnummer, configuration)`` index of ``BOMItem`` instead of a scan
+over all BOM items. Article numbers are stored normalized (see
+``catalog_import``), so the lookup is an exact match; the requested number
+is normalized the same way.
+
+Results are paginated like the configuration list (keyset over
+``(created_at, id)``, see ``configurations``), and the list filters can
+narrow them down.
+"""
+from typing import Dict, Iterable
+
+from django.db.models import Count, Sum
+
+from ..models import BOMConfiguration, BOMItem
+from ..utils import format_artikelnummer
+from .configurations import LIST_ORDERING, filter_configurations
+from .csv_reader import batched
+from .export import export_name, format_menge
+
+WHERE_USED_HEADER = ('Konfiguration-ID', 'Name', 'Stückliste', 'Schachttyp', 'HVB', 'Menge')
+
+# Columns counted in the where-used summary
+COUNT_FIELDS = ('schachttyp', 'hvb_size')
+
+
+def where_used_items(artikelnummer):
+    """BOM items of an article number (exact match on the normalized number)."""
+    return BOMItem.objects.filter(artikelnummer=format_artikelnummer(artikelnummer))
+
+
+def where_used_configurations(artikelnummer, params=None):
+    """Configurations containing ``artikelnummer``, with the list filters from ``params``.
+
+    Returns ``(queryset, filters)`` like ``filter_configurations``.
+    """
+    queryset = BOMConfiguration.objects.filter(
+        id__in=where_used_items(artikelnummer).values('configuration_id')
+    ).order_by(*LIST_ORDERING)
+    return filter_configurations(params or {}, queryset)
+
+
+def where_used_counts(configurations) -> Dict[str, list]:
+    """Number of configurations per Schachttyp and per HVB size (one grouped query each)."""
+    counts = {}
+    for field in COUNT_FIELDS:
+        rows = (
+            configurations.order_by()
+            .values(field)
+            .annotate(count=Count('id'))
+            .order_by('-count', field)
+        )
+        counts[field] = [{field: row[field], 'count': row['count']} for row in rows]
+    return counts
+
+
+def quantities_by_configuration(artikelnummer, config_ids: Iterable[int]) -> dict:
+    """Total quantity of the article per configuration ID."""
+    rows = (
+        where_used_items(artikelnummer)
+        .filter(configuration_id__in=list(config_ids))
+        .order_by()
+        .values('configuration_id')
+        .annotate(menge=Sum('menge'))
+    )
+    return {row['configuration_id']: row['menge'] for row in rows}
+
+
+def _csv_text(value) -> str:
+    # Values are written unquoted like the BOM export
+    return ' '.join(str(value or '').replace(';', ' ').split())
+
+
+def stream_where_used_csv(artikelnummer, configurations, chunk_size=500):
+    """CSV lines (one per configuration) with the article's quantity in each."""
+    yield ';'.join(WHERE_USED_HEADER) + '\n'
+    for configs in batched(configurations.iterator(chunk_size=chunk_size), chunk_size):
+        quantities = quantities_by_configuration(artikelnummer, [config.id for config in configs])
+        for config in configs:
+            row = [
+                str(config.id),
+                _csv_text(config.name),
+                export_name(config),
+                _csv_text(config.schachttyp),
+                _csv_text(config.hvb_size),
+                format_menge(quantities.get(config.id)),
+            ]
+            yield ';'.join(row) + '\n'
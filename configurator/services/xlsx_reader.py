@@ -0,0 +1,211 @@
+"""Streaming reader for the sheets of ``main excel/main.xlsx``.
+
+An .xlsx workbook is a zip of XML parts. ``Workbook`` opens the zip once,
+reads the sheet names and the shared string table, and ``Sheet.rows()``
+parses a worksheet part with ``iterparse``, yielding one row at a time and
+clearing parsed elements, like a read-only openpyxl workbook but without the
+dependency. Rows have the same shape as those of ``csv_reader.read_rows``
+(lists of strings, header first), so the catalog import can read a sheet
+wherever it reads a CSV file.
+
+Cell values are returned as Excel stores them: numbers in their shortest
+form ("2000852", "1.5"), formulas by their cached result.
+
+``Workbook.preload()`` parses several sheets in a process pool up front;
+their rows are then served from memory.
+"""
+import hashlib
+import posixpath
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+from .csv_reader import dict_rows
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_CELL_REF_RE = re.compile(r'([A-Z]+)(\d+)')
+
+
+def column_index(cell_ref: str) -> int:
+    """Zero-based column of a cell reference ("A1" -> 0, "AB7" -> 27)."""
+    letters = _CELL_REF_RE.match(cell_ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def format_number(value: str) -> str:
+    """Excel's stored number text in its shortest form ("2000852.0" -> "2000852")."""
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    if number.is_integer() and abs(number) < 1e15:
+        return str(int(number))
+    return repr(number)
+
+
+def _text(element) -> str:
+    """Text of a shared or inline string (``<t>`` or rich text runs)."""
+    return ''.join(node.text or '' for node in element.iter(f'{_MAIN_NS}t'))
+
+
+def _load_sheet(path, name: str) -> List[List[str]]:
+    # Runs in a worker process, which opens the workbook itself
+    with Workbook(path) as workbook:
+        return list(workbook.sheet(name).raw_rows())
+
+
+class Workbook:
+    """An .xlsx file opened once for reading any number of sheets."""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._shared_strings: Optional[List[str]] = None
+        self._loaded: Dict[str, List[List[str]]] = {}
+        self.sheet_parts = self._read_sheet_parts()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self.sheet_parts)
+
+    def sheet(self, name: str) -> 'Sheet':
+        return Sheet(self, name, self.sheet_parts[name])
+
+    def preload(self, names, workers: int):
+        """Parse the sheets ``names`` in ``workers`` processes and keep their rows."""
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(_load_sheet, self.path, name) for name in names}
+            for name, future in futures.items():
+                self._loaded[name] = future.result()
+
+    def _read_sheet_parts(self) -> Dict[str, str]:
+        """Sheet name -> worksheet part, in workbook order."""
+        targets = {}
+        with self._zip.open('xl/_rels/workbook.xml.rels') as f:
+            for _, element in iterparse(f):
+                if element.tag == f'{_PACKAGE_REL_NS}Relationship':
+                    target = element.get('Target')
+                    if target.startswith('/'):
+                        targets[element.get('Id')] = target.lstrip('/')
+                    else:
+                        targets[element.get('Id')] = posixpath.normpath(posixpath.join('xl', target))
+        parts = {}
+        with self._zip.open('xl/workbook.xml') as f:
+            for _, element in iterparse(f):
+                if element.tag == f'{_MAIN_NS}sheet':
+                    parts[element.get('name')] = targets[element.get(f'{_REL_NS}id')]
+        return parts
+
+    @property
+    def shared_strings(self) -> List[str]:
+        if self._shared_strings is None:
+            self._shared_strings = []
+            if 'xl/sharedStrings.xml' in self._zip.namelist():
+                with self._zip.open('xl/sharedStrings.xml') as f:
+                    for _, element in iterparse(f):
+                        if element.tag == f'{_MAIN_NS}si':
+                            self._shared_strings.append(_text(element))
+                            element.clear()
+        return self._shared_strings
+
+    def part_hash(self, part: str) -> str:
+        """SHA-256 of a worksheet part together with the shared strings it refers to."""
+        digest = hashlib.sha256()
+        for name in (part, 'xl/sharedStrings.xml'):
+            if name in self._zip.namelist():
+                with self._zip.open(name) as f:
+                    for chunk in iter(lambda: f.read(1 << 16), b''):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+
+class Sheet:
+    """One worksheet of a ``Workbook``."""
+
+    def __init__(self, workbook: Workbook, name: str, part: str):
+        self.workbook = workbook
+        self.name = name
+        self.part = part
+
+    def __str__(self):
+        return f'{self.workbook.path}#{self.name}'
+
+    def content_hash(self) -> str:
+        return self.workbook.part_hash(self.part)
+
+    def _cell_value(self, cell) -> str:
+        cell_type = cell.get('t', 'n')
+        if cell_type == 'inlineStr':
+            inline = cell.find(f'{_MAIN_NS}is')
+            return _text(inline) if inline is not None else ''
+        value = cell.findtext(f'{_MAIN_NS}v')
+        if value is None:
+            return ''
+        if cell_type == 's':
+            return self.workbook.shared_strings[int(value)]
+        if cell_type == 'n':
+            return format_number(value)
+        if cell_type == 'b':
+            return 'TRUE' if value == '1' else 'FALSE'
+        # 'str' (formula result) and 'e' (error) hold their text
+        return value
+
+    def raw_rows(self) -> Iterator[List[str]]:
+        """All rows as stored (empty rows included), without trailing empty cells."""
+        if self.name in self.workbook._loaded:
+            for values in self.workbook._loaded[self.name]:
+                yield list(values)
+            return
+        with self.workbook._zip.open(self.part) as f:
+            for _, element in iterparse(f):
+                if element.tag != f'{_MAIN_NS}row':
+                    continue
+                values = []
+                for cell in element.iter(f'{_MAIN_NS}c'):
+                    ref = cell.get('r')
+                    index = column_index(ref) if ref else len(values)
+                    values.extend([''] * (index - len(values)))
+                    values.append(self._cell_value(cell))
+                element.clear()
+                # Formatted but empty trailing cells
+                while values and values[-1] == '':
+                    values.pop()
+                yield values
+
+    def rows(self, is_header: Optional[Callable[[int, str], bool]] = None) -> Iterator[List[str]]:
+        """Yield the non-empty rows as lists of strings, the header row first.
+
+        ``is_header`` works as in ``csv_reader.read_rows``; it receives the
+        row's cells joined by commas. Data rows are padded to the header's
+        width, so missing cells read as empty strings like in a CSV export.
+        """
+        rows = (values for values in self.raw_rows() if values)
+        for line_number, header in enumerate(rows):
+            if is_header is None or is_header(line_number, ','.join(header)):
+                break
+        else:
+            return
+        yield header
+        for values in rows:
+            values.extend([''] * (len(header) - len(values)))
+            yield values
+
+    def dict_rows(self, is_header: Optional[Callable[[int, str], bool]] = None) -> Iterator[Dict[str, str]]:
+        """Rows as dicts keyed by the cleaned header names (see ``csv_reader.dict_rows``)."""
+        return dict_rows(self.rows(is_header))
@@ -0,0 +1,69 @@
+"""Bump the catalog version when a catalog row is saved or deleted outside an import.
+
+Changes to a component table also rebuild the article index. Both run once
+when the transaction commits, however many rows it changed (e.g. a bulk
+delete in the admin). Article numbers saved through the admin or management
+commands are normalized like imported ones, so the BOM builders can use them
+as is.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import BOMItem
+from .services.articles import ARTICLE_SOURCE_TABLES, rebuild_article_index
+from .services.catalog import CATALOG_MODELS, bump_version, in_catalog_update
+from .services.catalog_import import article_number_fields, normalize_article_numbers
+
+
+def normalize_row_article_numbers(sender, instance, **kwargs):
+    # Imports write with bulk_create and normalize while parsing
+    normalize_article_numbers(instance, article_number_fields(sender))
+
+
+class CatalogChange:
+    """On-commit callback rebuilding the article index (if needed) and bumping the version."""
+
+    def __init__(self, rebuild_articles: bool):
+        self.rebuild_articles = rebuild_articles
+
+    def __call__(self):
+        with transaction.atomic():
+            if self.rebuild_articles:
+                rebuild_article_index()
+            bump_version()
+
+
+def _scheduled_change():
+    """The ``CatalogChange`` already registered in the current transaction, if any."""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    # Dropped with the callbacks when the transaction (or savepoint) rolls back
+    for _, callback, *_ in connection.run_on_commit:
+        if isinstance(callback, CatalogChange):
+            return callback
+    return None
+
+
+def catalog_row_changed(sender, **kwargs):
+    # Imports bump the version once for all their writes (see catalog_update)
+    if in_catalog_update():
+        return
+    rebuild_articles = sender.__name__ in ARTICLE_SOURCE_TABLES
+    change = _scheduled_change()
+    if change is not None:
+        change.rebuild_articles = change.rebuild_articles or rebuild_articles
+    else:
+        # Runs right away outside a transaction
+        transaction.on_commit(CatalogChange(rebuild_articles))
+
+
+def connect_catalog_signals():
+    for model in (*CATALOG_MODELS, BOMItem):
+        if article_number_fields(model):
+            pre_save.connect(
+                normalize_row_article_numbers, sender=model, dispatch_uid=f'article_numbers_{model.__name__}'
+            )
+    for model in CATALOG_MODELS:
+        post_save.connect(catalog_row_changed, sender=model, dispatch_uid=f'catalog_version_save_{model.__name__}')
+        post_delete.connect(catalog_row_changed, sender=model, dispatch_uid=f'catalog_version_delete_{model.__name__}')
@@ -0,0 +1,110 @@
+import threading
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from .models import Article, BOMConfiguration, ChildArticleCounter, Kugelhahn, Sondenbeschriftung
+from .services.article_numbers import claim_child_article_number, peek_child_number
+from .services.articles import rebuild_article_index
+from .services.catalog import read_version
+from .views import _check_configuration
+
+CONFIGURATION = {
+    'schachttyp': 'GN 1',
+    'hvb_size': '90',
+    'sonden_durchmesser': '50',
+    'sondenanzahl': 10,
+    'sondenabstand': 100,
+    'anschlussart': 'beidseitig',
+    'bauform': 'U',
+    'dfm_type': 'Plastic Flowmeters',
+}
+
+
+class ChildNumberClaimTests(TransactionTestCase):
+    """Concurrent saves for one mother article get distinct child numbers."""
+
+    def test_concurrent_claims_get_distinct_numbers(self):
+        ChildArticleCounter.objects.create(mother_article_number='1000089', last_child_number=4)
+        barrier = threading.Barrier(2)
+        claimed = []
+        errors = []
+
+        def claim():
+            config = BOMConfiguration(name='Neue Konfiguration', mother_article_number='1000089', **CONFIGURATION)
+            try:
+                barrier.wait()
+                claim_child_article_number(config)
+                claimed.append(config.full_article_number)
+            except Exception as e:  # Reported below, threads swallow exceptions
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(claimed), ['1000089-005', '1000089-006'])
+        self.assertEqual(ChildArticleCounter.objects.get(mother_article_number='1000089').last_child_number, 6)
+
+
+class ConfigurationCheckTests(TestCase):
+    """Checking a configuration suggests a child number without reserving it."""
+
+    def setUp(self):
+        mother = BOMConfiguration(
+            name='Mutter', mother_article_number='1000089', child_article_number='001',
+            full_article_number='1000089-001', **CONFIGURATION,
+        )
+        mother.save()
+        ChildArticleCounter.objects.create(mother_article_number='1000089', last_child_number=1)
+
+    def test_repeated_checks_do_not_advance_counter(self):
+        data = {**CONFIGURATION, 'sondenanzahl': 12}
+        for _ in range(3):
+            result = _check_configuration(data)
+            self.assertEqual(result['type'], 'mother_article')
+            self.assertEqual(result['suggested_child_number'], '1000089-002')
+        self.assertEqual(ChildArticleCounter.objects.get(mother_article_number='1000089').last_child_number, 1)
+        self.assertEqual(peek_child_number('1000089'), 2)
+
+
+class ArticleNumberNormalizationTests(TestCase):
+    """Catalog rows saved outside the import store normalized article numbers."""
+
+    def test_saved_rows_drop_excel_suffix(self):
+        kugelhahn = Kugelhahn.objects.create(kugelhahn='DN 25 / DA 32', artikelnummer=' 2000852.0 ')
+        beschriftung = Sondenbeschriftung.objects.create(nummer='2001300.0')
+        kugelhahn.refresh_from_db()
+        beschriftung.refresh_from_db()
+        self.assertEqual(kugelhahn.artikelnummer, '2000852')
+        self.assertEqual(beschriftung.nummer, '2001300')
+
+    def test_inner_decimals_are_kept(self):
+        kugelhahn = Kugelhahn.objects.create(kugelhahn='DN 25 / DA 32', artikelnummer='10.02')
+        kugelhahn.refresh_from_db()
+        self.assertEqual(kugelhahn.artikelnummer, '10.02')
+
+
+class CatalogChangeTests(TestCase):
+    """Admin edits rebuild the article index and bump the version once per transaction."""
+
+    def test_bulk_delete_rebuilds_once(self):
+        # Without signals: TestCase's transaction never commits, so their callback would never run
+        Kugelhahn.objects.bulk_create(
+            Kugelhahn(kugelhahn='DN 25 / DA 32', artikelnummer=number) for number in ('9000001', '9000002', '9000003')
+        )
+        rebuild_article_index()
+        self.assertEqual(Article.objects.filter(artikelnummer__startswith='900000').count(), 3)
+        version = read_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for kugelhahn in Kugelhahn.objects.filter(artikelnummer__startswith='900000'):
+                    kugelhahn.delete()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(read_version(), version + 1)
+        self.assertFalse(Article.objects.filter(artikelnummer__startswith='900000').exists())
@@ -5,10 +5,17 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('configurator/', views.configurator, name='configurator'),
     path('configurations/', views.configuration_list, name='configuration_list'),
+    path('configurations/export/', views.export_configurations, name='export_configurations'),
     path('configuration/<int:config_id>/', views.view_configuration, name='view_configuration'),
+    path('configuration/<int:config_id>/export/', views.export_configuration, name='export_configuration'),
     path('configuration/<int:config_id>/delete/', views.delete_configuration, name='delete_configuration'),
     
     # API endpoints
+    path('api/configurations/', views.configurations_api, name='configurations_api'),
+    path('api/options/', views.get_options, name='get_options'),
+    path('api/articles/valid/', views.check_articles, name='check_articles'),
+    path('api/where-used/', views.where_used_api, name='where_used'),
+    path('api/material-requirements/', views.material_requirements_api, name='material_requirements'),
     path('api/sonden-durchmesser-options/', views.get_sonden_durchmesser_options, name='get_sonden_durchmesser_options'),
     path('api/sonden-options/', views.get_sonden_options, name='get_sonden_options'),
     path('api/sondenabstand-options/', views.get_sondenabstand_options, name='get_sondenabstand_options'),
@@ -22,6 +29,8 @@ urlpatterns = [
     path('api/probe-lengths/', views.get_probe_lengths, name='get_probe_lengths'),
     path('api/gnx-chamber-articles/', views.get_gnx_chamber_articles, name='get_gnx_chamber_articles'),
     path('api/generate-bom/', views.generate_bom, name='generate_bom'),
+    path('api/generate-bom/batch/', views.generate_bom_batch, name='generate_bom_batch'),
+    path('api/preview-bom/', views.preview_bom, name='preview_bom'),
     path('api/delete-bom-items/', views.delete_bom_items, name='delete_bom_items'),
     path('api/delete-configurations/', views.delete_configurations, name='delete_configurations'),
     path('api/update-probes/', views.update_probes_endpoint, name='update_probes_endpoint'),
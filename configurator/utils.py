@@ -1,6 +1,7 @@
-from decimal import Decimal
 import re
 
+from .services.formula import evaluate_formula
+
 
 def parse_allowed_hvb_sizes(erlaubte_hvb):
     """
@@ -101,72 +102,11 @@ def format_artikelnummer(artikelnummer):
 
 
 def calculate_formula(formula, context):
-    """Safely calculate formula with given context"""
-    if not formula or formula.strip() == '':
-        return None
-
-    try:
-        safe_formula = formula.strip()
-        if safe_formula.startswith('='):
-            safe_formula = safe_formula[1:]
-
-        sorted_keys = sorted(context.keys(), key=len, reverse=True)
-        for key in sorted_keys:
-            value = context[key]
-            pattern = r'\b' + re.escape(key) + r'\b'
-            safe_formula = re.sub(pattern, str(value), safe_formula)
-        
-        # Many CSV formulas contain human-readable comments after the actual
-        # expression (e.g. "sondenanzahl*2 (if probe is 32 mm ...)").
-        # We only want to evaluate the leading numeric expression and ignore
-        # any trailing descriptive text.
-        # Find the first opening parenthesis and check if it's balanced
-        paren_pos = safe_formula.find('(')
-        if paren_pos >= 0:
-            # Check if parentheses are balanced from this point
-            paren_count = 0
-            balanced = True
-            for i in range(paren_pos, len(safe_formula)):
-                if safe_formula[i] == '(':
-                    paren_count += 1
-                elif safe_formula[i] == ')':
-                    paren_count -= 1
-                    if paren_count == 0:
-                        # Found matching closing paren, include the full expression
-                        break
-            else:
-                # No matching closing paren found - truncate before the opening paren
-                if paren_count > 0:
-                    safe_formula = safe_formula[:paren_pos].strip()
-        
-        # Extract only the numeric expression part (numbers, operators, spaces, balanced parens)
-        # Match from start: numbers, operators, spaces, and balanced parentheses
-        match = re.match(r'[0-9+\-*/().\s]+', safe_formula)
-        if not match:
-            return None
-
-        safe_formula = match.group(0).strip()
-        if not safe_formula:
-            return None
-
-        # Verify parentheses are balanced before eval
-        if safe_formula.count('(') != safe_formula.count(')'):
-            # Unbalanced parentheses - extract only the part before the first unclosed paren
-            paren_pos = safe_formula.find('(')
-            if paren_pos >= 0:
-                safe_formula = safe_formula[:paren_pos].strip()
-            if not safe_formula:
-                return None
-
-        allowed_chars = set('0123456789+-*/.() ')
-        if not all(c in allowed_chars for c in safe_formula):
-            return None
-
-        result = eval(safe_formula)
-        return Decimal(str(result))
-    except Exception as exc:
-        print(f"Formula calculation error: {exc}")
-        return None
+    """Safely calculate formula with given context.
+
+    Formulas are compiled once and cached (see services.formula); no eval.
+    """
+    return evaluate_formula(formula, context)
 
 
 def check_compatibility(compatibility_field, hvb_size, sonden_durchmesser, check_type='either'):
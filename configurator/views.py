@@ -1,94 +1,25 @@
-def calculate_hvb_length(config):
-    """Calculate HVB length using correct formulas:
-    Einseitig (one-sided): ((X-1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
-    Beidseitig (two-sided): ((X/2 - 1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
-
-    Where:
-    - X = sondenanzahl (number of probes)
-    - 100 = constant (NOT sondenabstand)
-    - Zuschlag 1 = zuschlag_links
-    - Zuschlag 2 = zuschlag_rechts
-    """
-    try:
-        sondenanzahl = Decimal(config.sondenanzahl)
-        zuschlag_links = Decimal(config.zuschlag_links or 100)
-        zuschlag_rechts = Decimal(config.zuschlag_rechts or 100)
-        anschlussart = str(config.anschlussart or 'einseitig').strip().lower()
-    except Exception:
-        return None
-
-    if sondenanzahl <= 1:
-        return None
-
-    # Constant value: 100 (NOT sondenabstand)
-    constant = Decimal('100')
-
-    # Apply formula based on anschlussart
-    if anschlussart == 'einseitig':
-        # Einseitig: ((X-1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
-        base = (sondenanzahl - 1) * constant
-        total_mm = (base + zuschlag_links + zuschlag_rechts) * Decimal('2')
-    elif anschlussart == 'beidseitig':
-        # Beidseitig: ((X/2 - 1) * 100 + Zuschlag 1 + Zuschlag 2) * 2
-        half_probes = sondenanzahl / Decimal('2')
-        base = (half_probes - 1) * constant
-        total_mm = (base + zuschlag_links + zuschlag_rechts) * Decimal('2')
-    else:
-        # Default to einseitig if unknown
-        base = (sondenanzahl - 1) * constant
-        total_mm = (base + zuschlag_links + zuschlag_rechts) * Decimal('2')
-
-    if total_mm <= 0:
-        return None
-    return total_mm / Decimal('1000')
 import json
+import logging
 import re
-from decimal import Decimal
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q, Min
 from .models import (
-    Schacht, HVB, Sondengroesse, Sondenabstand, SondenDurchmesser, Kugelhahn, DFM,
-    BOMConfiguration, BOMItem, GNXChamberArticle, GNXChamberConfiguration,
-    Schachtgrenze
+    Schacht, HVB, Sondenabstand, Kugelhahn,
+    BOMConfiguration, BOMItem,
 )
-from .services import bom_rules
-from .utils import parse_allowed_hvb_sizes
-from .utils import format_artikelnummer, calculate_formula, check_compatibility
-
-
-BOM_SOURCE_SORT_PRIORITY = {
-    'Schacht': 0,
-    'HVB': 1,
-    'Sondengroesse': 2,
-    'Sonden-Durchmesser': 2,
-    'WP-Rohr': 98,
-    'Entlüftung': 99,
-}
-BOM_DEFAULT_PRIORITY = 50
-
-
-def _bom_sort_key(source_table, original_index, artikelnummer=None, schachttyp=None):
-    """
-    Return a tuple for stable sorting of BOM items by source_table priority.
-    
-    Special rule for Sondenbeschriftung article 2002024 (Schilder Ø 80 mm Erdwärmesonde):
-    - If Schachttyp == \"Verteiler\": always first position (priority -1).
-    - If a chamber/manhole is selected (any other Schachttyp): always directly
-      after the Schacht article (priority 0.5, between Schacht (0) and HVB (1)).
-    """
-    priority = float(BOM_SOURCE_SORT_PRIORITY.get(source_table, BOM_DEFAULT_PRIORITY))
-
-    if artikelnummer == '2002024' and source_table == 'Sondenbeschriftung':
-        if schachttyp == 'Verteiler':
-            priority = -1.0
-        else:
-            priority = 0.5
+from .services import articles, bom_generation, export, options, requirements, where_used
+from .services.article_numbers import format_child_number, peek_child_number
+from .services.bom_generation import BOMRequestError, ordered_bom_items
+from .services.configurations import (
+    PAGE_SIZE, InvalidCursor, configuration_stats, configuration_summary, filter_configurations,
+    paginate_configurations,
+)
+from .utils import format_artikelnummer
 
-    return (priority, original_index)
+logger = logging.getLogger(__name__)
 
 
 def index(request):
@@ -163,68 +94,9 @@ def get_sonden_durchmesser_options(request):
     """Get Sonden Durchmesser options based on selected schachttyp"""
     try:
         data = json.loads(request.body)
-        schachttyp = data.get('schachttyp', '').strip()
-        
-        if not schachttyp:
-            return JsonResponse({
-                'sonden_durchmesser_options': [],
-                'error': 'Missing schachttyp'
-            })
-        
-        # Check if any data exists in SondenDurchmesser table
-        total_count = SondenDurchmesser.objects.count()
-        if total_count == 0:
-            return JsonResponse({
-                'sonden_durchmesser_options': [],
-                'error': 'CSV data not imported. Please run: python manage.py import_csv_data --force'
-            }, status=500)
-        
-        # Get probe diameters for this schacht type from SondenDurchmesser model
-        # Use case-insensitive matching and handle potential whitespace differences
-        schachttyp_clean = schachttyp.strip()
-        
-        # Debug: Log what we're searching for
-        print(f"DEBUG: Searching for schachttyp: '{schachttyp_clean}'")
-        
-        # First try exact match (case-insensitive)
-        durchmesser_list = list(SondenDurchmesser.objects.filter(
-            schachttyp__iexact=schachttyp_clean
-        ).values_list('durchmesser', flat=True).distinct())
-        
-        print(f"DEBUG: Found {len(durchmesser_list)} diameters with exact match")
-        
-        # If no exact match, try fuzzy matching
-        if not durchmesser_list:
-            # Get all schacht types from database
-            all_schacht_types = SondenDurchmesser.objects.values_list('schachttyp', flat=True).distinct()
-            print(f"DEBUG: Available schacht types in DB: {list(all_schacht_types)}")
-            
-            # Try to find by matching (normalize both sides)
-            search_normalized = schachttyp_clean.lower().replace(' ', '')
-            for st in all_schacht_types:
-                st_normalized = st.strip().lower().replace(' ', '')
-                if st_normalized == search_normalized:
-                    print(f"DEBUG: Found fuzzy match: '{st}' matches '{schachttyp_clean}'")
-                    durchmesser_list = list(SondenDurchmesser.objects.filter(
-                        schachttyp=st
-                    ).values_list('durchmesser', flat=True).distinct())
-                    break
-        
-        print(f"DEBUG: Final result: {len(durchmesser_list)} diameters - {list(durchmesser_list)}")
-        
-        # Sort numerically
-        durchmesser_list = sorted(
-            durchmesser_list,
-            key=lambda x: int(x) if x.isdigit() else 9999
-        )
-        
-        # Format as options (always show a space before 'mm')
-        options = [{'durchmesser': d, 'label': f'{d} mm'} for d in durchmesser_list]
-        
-        return JsonResponse({
-            'sonden_durchmesser_options': options,
-            'schachttyp': schachttyp
-        })
+        payload = options.sonden_durchmesser_options(data)
+        status = 500 if payload.get('error') == options.CSV_NOT_IMPORTED_ERROR else 200
+        return JsonResponse(payload, status=status)
     
     except Exception as e:
         import traceback
@@ -237,108 +109,17 @@ def get_sonden_durchmesser_options(request):
         }, status=500)
 
 
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_sonden_options(request):
     """Get probe options based on selected shaft type and HVB"""
     try:
         data = json.loads(request.body)
-        raw_schachttyp = data.get('schachttyp', '') or ''
-        raw_hvb_size = data.get('hvb_size', '') or ''
-
-        # Normalize inputs defensively (handles autofill and formatting differences)
-        schachttyp = " ".join(str(raw_schachttyp).strip().split())  # collapse inner whitespace
-        hvb_size = str(raw_hvb_size).strip()
-        # Remove 'mm' suffix if present, but keep the number
-        if hvb_size.lower().endswith('mm'):
-            hvb_size = hvb_size[:-2].strip()
-        
-        # Debug logging
-        print(f"DEBUG: Received request - schachttyp: '{schachttyp}', hvb_size: '{hvb_size}'")
-        print(f"DEBUG: schachttyp type: {type(schachttyp)}, hvb_size type: {type(hvb_size)}")
-        print(f"DEBUG: schachttyp repr: {repr(schachttyp)}, hvb_size repr: {repr(hvb_size)}")
-        
-        # Check if values are None or empty
-        if not schachttyp or not hvb_size:
-            print(f"DEBUG: Missing values - schachttyp: '{schachttyp}', hvb_size: '{hvb_size}'")
-            return JsonResponse({
-                'sonden_options': [],
-                'error': 'Missing schachttyp or hvb_size',
-                'received': {'schachttyp': schachttyp, 'hvb_size': hvb_size}
-            })
-        
-        # Try strict case-insensitive match first
-        sonden_options = Sondengroesse.objects.filter(
-            schachttyp__iexact=schachttyp,
-            hvb__iexact=hvb_size
-        )
-        
-        print(f"DEBUG: Query filter - schachttyp='{schachttyp}', hvb='{hvb_size}'")
-        print(f"DEBUG: Found {sonden_options.count()} probes with exact match")
-        
-        # If no exact match, try to find similar matches for debugging
-        if sonden_options.count() == 0:
-            print(f"DEBUG: No exact match found. Searching for similar...")
-            
-            # Try fuzzy HVB matching and trimmed values
-            if sonden_options.count() == 0:
-                sonden_options = Sondengroesse.objects.filter(
-                    schachttyp__iexact=schachttyp.strip(),
-                    hvb__icontains=hvb_size.strip()
-                )
-                print(f"DEBUG: Fuzzy/trimmed match found: {sonden_options.count()}")
-
-            # Safe fallback: if still nothing, try by schachttyp only
-            fallback_used = False
-            if sonden_options.count() == 0:
-                fallback_used = True
-                sonden_options = Sondengroesse.objects.filter(
-                    schachttyp__iexact=schachttyp.strip()
-                )
-                print(f"DEBUG: Fallback by schachttyp only: {sonden_options.count()}")
-            
-            # Show what schachttyp values exist
-            all_schacht = Sondengroesse.objects.values_list('schachttyp', flat=True).distinct()
-            print(f"DEBUG: Available schachttyp values: {list(all_schacht)}")
-            
-            # Show what hvb values exist
-            all_hvb = Sondengroesse.objects.values_list('hvb', flat=True).distinct()
-            print(f"DEBUG: Available hvb values: {list(all_hvb)}")
-            
-            # Show first few probes
-            sample_probes = Sondengroesse.objects.all()[:5]
-            for probe in sample_probes:
-                print(f"DEBUG: Sample probe - schachttyp: '{probe.schachttyp}' (repr: {repr(probe.schachttyp)}), hvb: '{probe.hvb}' (repr: {repr(probe.hvb)})")
-        
-        # Get the values and sort numerically by diameter
-        options_list = sonden_options.values(
-            'durchmesser_sonde', 'sondenanzahl_min', 'sondenanzahl_max',
-            'artikelnummer', 'artikelbezeichnung'
-        ).distinct()
-        
-        # Convert to list and sort numerically by durchmesser_sonde
-        options_list = list(options_list)
-        options_list = sorted(
-            options_list,
-            key=lambda x: int(x['durchmesser_sonde']) if x['durchmesser_sonde'].isdigit() else 9999
-        )
-        print(f"DEBUG: Returning {len(options_list)} options")
-        
-        response_payload = {
-            'sonden_options': options_list,
-            'debug': {
-                'received': {'schachttyp': schachttyp, 'hvb_size': hvb_size},
-                'count': len(options_list)
-            }
-        }
-        if 'fallback_used' in locals() and fallback_used:
-            response_payload['debug']['fallback'] = 'schachttyp_only'
-        return JsonResponse(response_payload)
+        return JsonResponse(options.sonden_options(data))
     
     except Exception as e:
-        print(f"DEBUG: Exception in get_sonden_options: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Exception in get_sonden_options')
         return JsonResponse({
             'sonden_options': [],
             'error': str(e)
@@ -350,17 +131,8 @@ def get_sonden_options(request):
 def get_sondenabstand_options(request):
     """Get probe distance options"""
     data = json.loads(request.body)
-    anschlussart = data.get('anschlussart', 'einseitig')
-    
-    abstand_options = Sondenabstand.objects.filter(
-        anschlussart=anschlussart
-    ).values(
-        'sondenabstand', 'zuschlag_links', 'zuschlag_rechts', 'hinweis'
-    ).order_by('sondenabstand')
-    
-    return JsonResponse({
-        'abstand_options': list(abstand_options)
-    })
+    return JsonResponse(options.sondenabstand_options(data))
+
 
 
 @csrf_exempt
@@ -369,258 +141,82 @@ def get_allowed_hvb_sizes(request):
     """Get allowed HVB sizes for a selected Schachttyp based on Schachtgrenze"""
     try:
         data = json.loads(request.body)
-        schachttyp = data.get('schachttyp', '').strip()
-        
-        if not schachttyp:
-            return JsonResponse({'allowed_sizes': [], 'error': 'Schachttyp is required'})
-        
-        # Get Schachtgrenze for this Schachttyp
-        try:
-            schachtgrenze = Schachtgrenze.objects.get(schachttyp=schachttyp)
-            erlaubte_hvb = schachtgrenze.erlaubte_hvb or ''
-        except Schachtgrenze.DoesNotExist:
-            # If no restriction found, allow all HVB sizes
-            return JsonResponse({'allowed_sizes': [], 'all_allowed': True})
-        
-        # Parse allowed HVB sizes from erlaubte_hvb field
-        allowed_sizes = parse_allowed_hvb_sizes(erlaubte_hvb)
-        
-        return JsonResponse({
-            'allowed_sizes': allowed_sizes,
-            'all_allowed': len(allowed_sizes) == 0  # If empty, all are allowed
-        })
+        return JsonResponse(options.allowed_hvb_sizes(data))
     except Exception as e:
         return JsonResponse({'allowed_sizes': [], 'error': str(e)})
 
 
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_schachtgrenze_info(request):
     """Get max sondenanzahl from Schachtgrenze based on Schachttyp"""
     try:
         data = json.loads(request.body)
-        schachttyp = data.get('schachttyp', '').strip()
-        
-        if not schachttyp:
-            return JsonResponse({'max_sondenanzahl': None, 'error': 'Schachttyp is required'})
-        
-        # Get Schachtgrenze for this Schachttyp
-        try:
-            schachtgrenze = Schachtgrenze.objects.get(schachttyp=schachttyp)
-            max_sondenanzahl = schachtgrenze.max_sondenanzahl
-            return JsonResponse({
-                'max_sondenanzahl': max_sondenanzahl,
-                'min_sondenanzahl': 2  # Always 2 as per requirement
-            })
-        except Schachtgrenze.DoesNotExist:
-            # If no restriction found, return None (no limit)
-            return JsonResponse({
-                'max_sondenanzahl': None,
-                'min_sondenanzahl': 2,
-                'error': 'No Schachtgrenze found for this Schachttyp'
-            })
+        return JsonResponse(options.schachtgrenze_info(data))
     except Exception as e:
         return JsonResponse({'max_sondenanzahl': None, 'error': str(e)})
 
 
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_dfm_options(request):
     """Get DFM options based on category"""
     data = json.loads(request.body)
-    category = data.get('category', '')
-    
-    if not category:
-        return JsonResponse({'dfm_options': []})
-    
-    # Exclude category headers that shouldn't be selectable
-    exclude_categories = ['Brass Flowmeters', 'Plastic Flowmeters']
-
-    # Preserve the original CSV order by using the smallest primary key (id)
-    # for each distinct Durchflussarmatur instead of alphabetical ordering.
-    all_dfm_types = (
-        DFM.objects.exclude(durchflussarmatur__in=exclude_categories)
-        .values('durchflussarmatur')
-        .annotate(first_id=Min('id'))
-        .order_by('first_id')
-    )
+    return JsonResponse(options.dfm_options(data))
 
-    dfm_options = []
-    
-    # "Kugelhahn-Typ" is always available as an option regardless of category
-    # Note: This will be added in the frontend, but we keep the backend clean
-    
-    for dfm in all_dfm_types:
-        name = dfm['durchflussarmatur']
-        
-        if category == 'plastic':
-            # Plastic flow meters: K-DFM series
-            if name.startswith('K-DFM'):
-                dfm_options.append(name)
-        elif category == 'brass':
-            # Brass flow meters: HC VTR, IMI STAD, IMI TA series
-            if (name.startswith('HC VTR') or 
-                name.startswith('IMI STAD') or 
-                name.startswith('IMI TA')):
-                dfm_options.append(name)
-    
-    return JsonResponse({
-        'dfm_options': dfm_options
-    })
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_kugelhahn_options(request):
     """Return compatible Kugelhahn types for the selected HVB and probe diameter."""
-    from .models import Kugelhahn
-    from .utils import check_compatibility
-
     try:
         data = json.loads(request.body)
-        hvb_size = str(data.get('hvb_size', '') or '').strip()
-        probe_size = str(data.get('sonden_durchmesser', '') or '').strip()
-
-        if hvb_size.lower().endswith('mm'):
-            hvb_size = hvb_size[:-2].strip()
-        if probe_size.lower().endswith('mm'):
-            probe_size = probe_size[:-2].strip()
-
-        if not hvb_size or not probe_size:
-            return JsonResponse({'kugelhahn_options': []})
-
-        compatible_types = set()
-        for entry in Kugelhahn.objects.all():
-            kh_type = entry.kugelhahn
-            if not kh_type:
-                continue
-
-            # Apply the same compatibility checks as in build_kugelhahn_components
-            if entry.et_hvb and not check_compatibility(entry.et_hvb, hvb_size, probe_size, 'hvb'):
-                continue
-            if entry.et_sonden and not check_compatibility(entry.et_sonden, hvb_size, probe_size, 'sonden'):
-                continue
-            if entry.kh_hvb and not check_compatibility(entry.kh_hvb, hvb_size, probe_size, 'hvb'):
-                continue
-
-            compatible_types.add(kh_type)
-
-        options = sorted(compatible_types)
-        return JsonResponse({'kugelhahn_options': options})
+        return JsonResponse(options.kugelhahn_options(data))
     except Exception as e:
         return JsonResponse({'kugelhahn_options': [], 'error': str(e)}, status=500)
 
 
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_wp_options(request):
     """Return available WP diameters for a given HVB size based on WPA.csv data."""
-    from .models import WPA
-
     try:
         data = json.loads(request.body)
-        hvb_size = str(data.get('hvb_size', '')).strip()
-
-        if not hvb_size:
-            return JsonResponse({'wp_options': []})
-
-        # Remove 'mm' suffix if present (e.g., '110mm' -> '110')
-        if hvb_size.lower().endswith('mm'):
-            hvb_size = hvb_size[:-2].strip()
-
-        # In WPA model, the "name" field stores the HVB diameter from the first column.
-        wpa_entries = WPA.objects.filter(name=hvb_size)
-
-        wp_diameters = set()
-        for entry in wpa_entries:
-            if entry.wp_durchmesser:
-                wp_diameters.add(str(entry.wp_durchmesser).strip())
-
-        # Return sorted list of unique WP diameters (as strings)
-        wp_options = sorted(wp_diameters, key=lambda x: int(x))
-
-        return JsonResponse({'wp_options': wp_options})
+        return JsonResponse(options.wp_options(data))
     except Exception as e:
         return JsonResponse({'wp_options': [], 'error': str(e)}, status=500)
 
 
-@csrf_exempt
-@require_http_methods(["POST"])
-def check_existing_configuration(request):
-    """Check if configuration already exists - matches exact requirements from client"""
-    data = json.loads(request.body)
-    
-    # Extract configuration parameters
-    schachttyp = data.get('schachttyp')
-    hvb_size = data.get('hvb_size')
-    sonden_durchmesser = data.get('sonden_durchmesser')
-    sondenanzahl = data.get('sondenanzahl')
-    sondenabstand = data.get('sondenabstand')
-    anschlussart = data.get('anschlussart')
-    kugelhahn_type = data.get('kugelhahn_type', '') or ''
-    dfm_type = data.get('dfm_type', '') or ''
-    dfm_category = data.get('dfm_category', '') or ''
-    dfm_kugelhahn_type = data.get('dfm_kugelhahn_type', '') or ''
-    bauform = data.get('bauform', 'I') or 'I'
+
+def _check_configuration(data):
+    """Look up an existing configuration / mother article for the given parameters."""
     
-    # Normalize empty strings to None for optional fields
-    kugelhahn_type = kugelhahn_type if kugelhahn_type else None
-    dfm_type = dfm_type if dfm_type else None
-    dfm_category = dfm_category if dfm_category else None
-    dfm_kugelhahn_type = dfm_kugelhahn_type if dfm_kugelhahn_type else None
+    # Configurations with the same parameters share a fingerprint; mother
+    # articles are identified by schachttyp, hvb_size and sonden_durchmesser
+    fingerprint, base_fingerprint = BOMConfiguration.fingerprints_for(data)
     
     # STEP 1: Check if exact configuration exists (all parameters match)
-    # This includes optional fields - if they're None, match None; if they have values, match values
-    query = BOMConfiguration.objects.filter(
-        schachttyp=schachttyp,
-        hvb_size=hvb_size,
-        sonden_durchmesser=sonden_durchmesser,
-        sondenanzahl=sondenanzahl,
-        sondenabstand=sondenabstand,
-        anschlussart=anschlussart,
-        bauform=bauform
-    )
-    
-    # Handle optional fields - match None if not provided, or match value if provided
-    if kugelhahn_type is None:
-        query = query.filter(kugelhahn_type__isnull=True)
-    else:
-        query = query.filter(kugelhahn_type=kugelhahn_type)
-    
-    if dfm_type is None:
-        query = query.filter(dfm_type__isnull=True)
-    else:
-        query = query.filter(dfm_type=dfm_type)
-    
-    if dfm_category is None:
-        query = query.filter(dfm_category__isnull=True)
-    else:
-        query = query.filter(dfm_category=dfm_category)
-    
-    if dfm_kugelhahn_type is None:
-        query = query.filter(dfm_kugelhahn_type__isnull=True)
-    else:
-        query = query.filter(dfm_kugelhahn_type=dfm_kugelhahn_type)
-    
-    existing_config = query.first()
+    existing_config = BOMConfiguration.objects.filter(fingerprint=fingerprint).first()
     
     if existing_config and existing_config.full_article_number:
         # Exact configuration exists with article number
-        return JsonResponse({
+        return {
             'exists': True,
             'type': 'full_configuration',
             'article_number': existing_config.full_article_number,
             'configuration_id': existing_config.id,
             'message': f'Diese Konfiguration existiert bereits mit Artikelnummer: {existing_config.full_article_number}'
-        })
+        }
     
     # STEP 2: Check if mother article exists (base configuration match)
     # Mother article is defined by: schachttyp, hvb_size, sonden_durchmesser
     # Find any configuration with these base parameters that has a mother_article_number
     mother_config = BOMConfiguration.objects.filter(
-        schachttyp=schachttyp,
-        hvb_size=hvb_size,
-        sonden_durchmesser=sonden_durchmesser,
+        base_fingerprint=base_fingerprint,
         mother_article_number__isnull=False
     ).exclude(mother_article_number='').first()
     
@@ -628,63 +224,51 @@ def check_existing_configuration(request):
         # Check if this exact configuration already has a child article
         # (i.e., does this exact config exist as a child of this mother?)
         existing_child = BOMConfiguration.objects.filter(
-            schachttyp=schachttyp,
-            hvb_size=hvb_size,
-            sonden_durchmesser=sonden_durchmesser,
-            sondenanzahl=sondenanzahl,
-            sondenabstand=sondenabstand,
-            anschlussart=anschlussart,
-            bauform=bauform,
-            kugelhahn_type=kugelhahn_type,
-            dfm_type=dfm_type,
-            dfm_category=dfm_category,
-            dfm_kugelhahn_type=dfm_kugelhahn_type,
+            fingerprint=fingerprint,
             mother_article_number=mother_config.mother_article_number
         ).exclude(child_article_number__isnull=True).exclude(child_article_number='').first()
         
         if existing_child and existing_child.child_article_number:
             # This exact configuration already exists as a child
             full_article = f"{mother_config.mother_article_number}-{existing_child.child_article_number.split('-')[-1]}"
-            return JsonResponse({
+            return {
                 'exists': True,
                 'type': 'full_configuration',
                 'article_number': full_article,
                 'configuration_id': existing_child.id,
                 'message': f'Diese Konfiguration existiert bereits mit Artikelnummer: {full_article}'
-            })
+            }
         
         # Mother article exists, but this exact configuration doesn't have a child article yet
-        # Find the highest child number and suggest the next one
-        existing_children = BOMConfiguration.objects.filter(
-            mother_article_number=mother_config.mother_article_number
-        ).exclude(child_article_number__isnull=True).exclude(child_article_number='')
-        
-        # Extract child numbers and find the highest
-        max_child_num = 0
-        for child in existing_children:
-            child_num_str = child.child_article_number.split('-')[-1] if '-' in child.child_article_number else child.child_article_number
-            try:
-                child_num = int(child_num_str)
-                max_child_num = max(max_child_num, child_num)
-            except ValueError:
-                pass
-        
-        next_child_number = f"{mother_config.mother_article_number}-{max_child_num + 1:03d}"
+        # Only a suggestion: the number is reserved when the BOM is saved
+        next_child_number = format_child_number(
+            mother_config.mother_article_number,
+            peek_child_number(mother_config.mother_article_number),
+        )
         
-        return JsonResponse({
+        return {
             'exists': True,
             'type': 'mother_article',
             'mother_article_number': mother_config.mother_article_number,
             'suggested_child_number': next_child_number,
             'message': f'Mutterartikel "{mother_config.mother_article_number}" existiert bereits, aber es gibt keine Kindartikelnummer zu dieser Konfiguration.'
-        })
+        }
     
     # STEP 3: No match found - new configuration
-    return JsonResponse({
+    return {
         'exists': False,
         'type': 'new_configuration',
         'message': 'Neue Konfiguration - Artikelnummer muss erstellt werden'
-    })
+    }
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def check_existing_configuration(request):
+    """Check if configuration already exists - matches exact requirements from client"""
+    data = json.loads(request.body)
+    return JsonResponse(_check_configuration(data))
+
 
 
 @csrf_exempt
@@ -692,34 +276,8 @@ def check_existing_configuration(request):
 def get_hvb_stuetze_articles(request):
     """Get HVB Stütze articles (Oben and Unter) based on HVB size"""
     data = json.loads(request.body)
-    hvb_size = data.get('hvb_size', '').strip()
-    
-    if not hvb_size:
-        return JsonResponse({
-            'articles': []
-        })
-    
-    # Remove 'mm' suffix if present
-    if hvb_size.lower().endswith('mm'):
-        hvb_size = hvb_size[:-2].strip()
-    
-    from .models import HVBStuetze
-    
-    # Get both Oben and Unter articles for this HVB diameter
-    stuetze_articles = HVBStuetze.objects.filter(hvb_durchmesser=hvb_size).order_by('position')
-    
-    articles = []
-    for stuetze in stuetze_articles:
-        articles.append({
-            'artikelnummer': str(stuetze.artikelnummer).replace('.0', '').strip(),
-            'artikelbezeichnung': stuetze.artikelbezeichnung,
-            'position': stuetze.position,
-            'hvb_durchmesser': stuetze.hvb_durchmesser
-        })
-    
-    return JsonResponse({
-        'articles': articles
-    })
+    return JsonResponse(options.hvb_stuetze_articles(data))
+
 
 
 @csrf_exempt
@@ -732,159 +290,48 @@ def get_probe_lengths(request):
     """
     try:
         data = json.loads(request.body)
-        schachttyp = (data.get('schachttyp') or '').strip()
-        hvb_size = (data.get('hvb_size') or '').strip()
-        bauform = (data.get('bauform') or '').strip()
-        sondenanzahl = data.get('sondenanzahl')
-
-        if not schachttyp or not hvb_size or sondenanzahl is None:
-            return JsonResponse({'found': False, 'error': 'Missing required fields'})
-
-        try:
-            sondenanzahl = int(sondenanzahl)
-        except (ValueError, TypeError):
-            return JsonResponse({'found': False, 'error': 'Invalid sondenanzahl'})
-
-        # Build query: match schachttyp and hvb, optionally bauform
-        candidates = Sondengroesse.objects.filter(
-            schachttyp__iexact=schachttyp,
-            hvb=hvb_size,
-        )
-
-        # If bauform is provided, prefer exact match; fall back to empty/null bauform
-        if bauform:
-            bauform_candidates = candidates.filter(bauform__iexact=bauform)
-            if not bauform_candidates.exists():
-                # Also try with first letter (e.g. "I-Form (einseitig)" -> look for matching)
-                bauform_candidates = candidates.filter(
-                    Q(bauform__isnull=True) | Q(bauform='')
-                )
-            candidates = bauform_candidates if bauform_candidates.exists() else candidates
-        else:
-            # No bauform selected — prefer entries without bauform
-            no_bauform = candidates.filter(Q(bauform__isnull=True) | Q(bauform=''))
-            if no_bauform.exists():
-                candidates = no_bauform
-
-        # Find best match where sondenanzahl is within min-max range
-        best_match = None
-        for entry in candidates:
-            min_count = entry.sondenanzahl_min or 0
-            max_count = entry.sondenanzahl_max or 999999
-            if min_count <= sondenanzahl <= max_count:
-                best_match = entry
-                break
-
-        # Fallback: take first candidate if no range match
-        if best_match is None and candidates.exists():
-            best_match = candidates.first()
-
-        if best_match:
-            return JsonResponse({
-                'found': True,
-                'vorlauf_laenge': str(best_match.vorlauf_laenge) if best_match.vorlauf_laenge is not None else None,
-                'ruecklauf_laenge': str(best_match.ruecklauf_laenge) if best_match.ruecklauf_laenge is not None else None,
-                'schachttyp': best_match.schachttyp,
-                'hvb': best_match.hvb,
-                'bauform': best_match.bauform or '',
-                'sondenanzahl_min': best_match.sondenanzahl_min,
-                'sondenanzahl_max': best_match.sondenanzahl_max,
-            })
-        else:
-            return JsonResponse({'found': False})
+        return JsonResponse(options.probe_lengths(data))
     except Exception as e:
         import traceback
         traceback.print_exc()
         return JsonResponse({'found': False, 'error': str(e)}, status=500)
 
 
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_gnx_chamber_articles(request):
     """Get GN X chamber articles based on HVB size - only return articles that exist in product data"""
     data = json.loads(request.body)
-    hvb_size = int(data.get('hvb_size', 0))
-    
-    # Get all potential articles for this HVB size
-    potential_articles = GNXChamberArticle.objects.filter(
-        hvb_size_min__lte=hvb_size,
-        hvb_size_max__gte=hvb_size
-    )
-    
-    # Build a set of all valid article numbers from product tables
-    from .models import Kugelhahn, DFM, Entlueftung, HVBStuetze, Sondenverschlusskappe, StumpfschweissEndkappe
-    
-    valid_artikelnummern = set()
-    
-    # Collect from all product tables
-    valid_artikelnummern.update(
-        Kugelhahn.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    valid_artikelnummern.update(
-        DFM.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    valid_artikelnummern.update(
-        Entlueftung.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    valid_artikelnummern.update(
-        Sondenverschlusskappe.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    valid_artikelnummern.update(
-        StumpfschweissEndkappe.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    
-    # CRITICAL: Exclude HVBStuetze articles - they are already handled by build_hvb_stuetze_components
-    # These should NOT appear as "Zusatzartikel" in Step 3
-    hvbstuetze_artikelnummern = set(
-        HVBStuetze.objects.exclude(artikelnummer__isnull=True)
-        .exclude(artikelnummer='')
-        .values_list('artikelnummer', flat=True)
-    )
-    
-    # Normalize article numbers (remove .0 suffix, convert to string)
-    valid_artikelnummern_normalized = set()
-    for num in valid_artikelnummern:
-        if num:
-            # Convert to string and remove .0 if present
-            num_str = str(num).replace('.0', '').strip()
-            if num_str:
-                valid_artikelnummern_normalized.add(num_str)
-    
-    # Normalize HVBStuetze article numbers for exclusion
-    hvbstuetze_artikelnummern_normalized = set()
-    for num in hvbstuetze_artikelnummern:
-        if num:
-            num_str = str(num).replace('.0', '').strip()
-            if num_str:
-                hvbstuetze_artikelnummern_normalized.add(num_str)
-    
-    # Filter articles to only include those with valid article numbers
-    # BUT exclude articles that are already in HVBStuetze (they're handled separately)
-    valid_articles = []
-    for article in potential_articles:
-        artikelnummer = str(article.artikelnummer).replace('.0', '').strip()
-        # Must exist in product data AND not be an HVBStuetze article
-        if artikelnummer in valid_artikelnummern_normalized and artikelnummer not in hvbstuetze_artikelnummern_normalized:
-            valid_articles.append({
-                'id': article.id,
-                'artikelnummer': article.artikelnummer,
-                'artikelbezeichnung': article.artikelbezeichnung,
-                'is_automatic': article.is_automatic
-            })
-    
-    return JsonResponse({
-        'articles': valid_articles
-    })
+    return JsonResponse(options.gnx_chamber_articles(data))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def get_options(request):
+    """All dependent option lists for the current (partial) selection in one response.
+
+    Accepts the generate-bom field names plus an optional ``sections`` list
+    (default: every option section). Each section contains exactly what the
+    corresponding single-purpose endpoint returns. ``check_configuration`` can
+    be requested as an extra section; it queries the saved configurations.
+    """
+    try:
+        data = json.loads(request.body)
+        sections = data.get('sections') or list(options.OPTION_SECTIONS)
+        unknown = [name for name in sections if name not in options.OPTION_SECTIONS and name != 'check_configuration']
+        if unknown:
+            return JsonResponse({'error': f'Unknown sections: {", ".join(unknown)}'}, status=400)
+
+        response = options.collect_options(
+            data, [name for name in sections if name != 'check_configuration']
+        )
+        if 'check_configuration' in sections:
+            response['check_configuration'] = _check_configuration(data)
+        return JsonResponse(response)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
 
 
 @csrf_exempt
@@ -894,531 +341,25 @@ def generate_bom(request):
     data = json.loads(request.body)
     
     try:
-        # Validate required fields (check for None, not falsy values, since 0 is valid)
-        required_fields = ['schachttyp', 'hvb_size', 'sonden_durchmesser', 'sondenanzahl', 'sondenabstand', 'anschlussart']
-        missing_fields = [field for field in required_fields if data.get(field) is None or data.get(field) == '']
-        if missing_fields:
-            return JsonResponse({
-                'success': False,
-                'error': f'Fehlende Pflichtfelder: {", ".join(missing_fields)}',
-                'message': f'Bitte füllen Sie alle Pflichtfelder aus: {", ".join(missing_fields)}'
-            })
-        
-        # Safely convert to int with defaults
-        sondenanzahl = data.get('sondenanzahl', 0)
-        sondenabstand = data.get('sondenabstand', 0)
-        zuschlag_links = data.get('zuschlag_links', 100)
-        zuschlag_rechts = data.get('zuschlag_rechts', 100)
-        wp_pipe_length_raw = data.get('wp_pipe_length')
-        
-        try:
-            sondenanzahl = int(sondenanzahl) if sondenanzahl else 0
-            sondenabstand = int(sondenabstand) if sondenabstand else 0
-            zuschlag_links = int(zuschlag_links) if zuschlag_links else 100
-            zuschlag_rechts = int(zuschlag_rechts) if zuschlag_rechts else 100
-        except (ValueError, TypeError) as e:
-            return JsonResponse({
-                'success': False,
-                'error': f'Ungültige Zahlenwerte: {str(e)}',
-                'message': 'Bitte überprüfen Sie die eingegebenen Zahlenwerte.'
-            })
-        
-        # Handle article number logic
-        mother_article_number = (data.get('mother_article_number', '') or '').strip()
-        child_article_number = (data.get('child_article_number', '') or '').strip()
-        full_article_number = (data.get('full_article_number', '') or '').strip()
-        
-        # If child_article_number is provided in format "1000089-002", extract mother and child
-        if child_article_number and '-' in child_article_number:
-            parts = child_article_number.split('-', 1)
-            if not mother_article_number:
-                mother_article_number = parts[0]
-            if len(parts) > 1:
-                child_article_number = parts[1]
-            if not full_article_number:
-                full_article_number = child_article_number  # Use the full format provided
-        
-        # If full_article_number is provided in format "1000089-002", extract mother and child
-        if full_article_number and '-' in full_article_number and not mother_article_number:
-            parts = full_article_number.split('-', 1)
-            mother_article_number = parts[0]
-            if len(parts) > 1:
-                child_article_number = parts[1]
-        
-        # If we have mother and child, construct full_article_number
-        if mother_article_number and child_article_number and not full_article_number:
-            full_article_number = f"{mother_article_number}-{child_article_number}"
-        
-        # Enforce uniqueness of article numbers across all BOM configurations
-        # Double article numbers cause problems in downstream ERP systems, so we block them here.
-        if full_article_number:
-            # Case-insensitive check to avoid duplicates that differ only by casing/whitespace
-            if BOMConfiguration.objects.filter(full_article_number__iexact=full_article_number).exists():
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Artikelnummer bereits vergeben',
-                    'message': f'Diese Artikelnummer \"{full_article_number}\" wird bereits von einer anderen Konfiguration verwendet. '
-                               'Bitte wählen Sie eine andere Artikelnummer.'
-                }, status=400)
-        
-        # Parse optional per-probe lengths
-        vorlauf_raw = data.get('vorlauf_length_per_probe')
-        ruecklauf_raw = data.get('ruecklauf_length_per_probe')
-        vorlauf_val = None
-        ruecklauf_val = None
-        if vorlauf_raw not in (None, '', 'null'):
-            try:
-                vorlauf_val = Decimal(str(vorlauf_raw))
-            except Exception:
-                pass
-        if ruecklauf_raw not in (None, '', 'null'):
-            try:
-                ruecklauf_val = Decimal(str(ruecklauf_raw))
-            except Exception:
-                pass
-
-        # Parse WP diameter and pipe length
-        wp_diameter_str = (data.get('wp_diameter') or '').strip()
-        wp_pipe_length = None
-        if wp_diameter_str:
-            if wp_pipe_length_raw in (None, '', 'null'):
-                wp_pipe_length = Decimal('1')
-            else:
-                try:
-                    wp_pipe_length = Decimal(str(wp_pipe_length_raw))
-                except Exception:
-                    wp_pipe_length = Decimal('1')
-
-        # Parse HVB Stütze custom quantities
-        hvb_stuetze_data = data.get('hvb_stuetze_articles') or None
-
-        # Create BOM configuration
-        config = BOMConfiguration.objects.create(
-            name=data.get('configuration_name', 'Neue Konfiguration'),
-            schachttyp=data.get('schachttyp'),
-            hvb_size=data.get('hvb_size'),
-            sonden_durchmesser=data.get('sonden_durchmesser'),
-            sondenanzahl=sondenanzahl,
-            sondenabstand=sondenabstand,
-            anschlussart=data.get('anschlussart'),
-            kugelhahn_type=data.get('kugelhahn_type', '') or None,
-            dfm_type=data.get('dfm_type', '') or None,
-            dfm_category=data.get('dfm_category', '') or None,
-            dfm_kugelhahn_type=data.get('dfm_kugelhahn_type', '') or None,
-            bauform=data.get('bauform', 'I') or 'I',
-            mother_article_number=mother_article_number or None,
-            child_article_number=child_article_number or None,
-            full_article_number=full_article_number or None,
-            zuschlag_links=zuschlag_links,
-            zuschlag_rechts=zuschlag_rechts,
-            wp_diameter_value=wp_diameter_str or None,
-            wp_pipe_length_value=wp_pipe_length,
-            vorlauf_length_per_probe=vorlauf_val,
-            ruecklauf_length_per_probe=ruecklauf_val,
-            hvb_stuetze_quantities=hvb_stuetze_data,
-        )
-        # Attach runtime attributes for BOM rule processing
-        config.wp_diameter = wp_diameter_str
-        config.wp_pipe_length = wp_pipe_length
-        
-        # Calculate context for formulas
-        calc_context = config.calculate_quantities()
-        
-        bom_items = []
-        
-        # Add Schacht item (FINALIZED - correct based on Schachttyp selection)
-        schacht = Schacht.objects.filter(schachttyp=config.schachttyp).first()
-        # Skip placeholder rows without a real article number (e.g. "-" in CSV)
-        if schacht and schacht.artikelnummer and str(schacht.artikelnummer).strip() not in ('', '-'):
-            quantity = schacht.menge_statisch or Decimal('1')
-            if schacht.menge_formel:
-                calculated = calculate_formula(schacht.menge_formel, calc_context)
-                if calculated is not None:
-                    quantity = calculated
-            
-            bom_item = BOMItem.objects.create(
-                configuration=config,
-                artikelnummer=format_artikelnummer(schacht.artikelnummer),
-                artikelbezeichnung=schacht.artikelbezeichnung,
-                menge=quantity,
-                source_table='Schacht'
-            )
-            bom_items.append(bom_item)
-        
-        # Add HVB item (FINALIZED - correct based on HVB-Größe selection)
-        hvb = HVB.objects.filter(hauptverteilerbalken=config.hvb_size).first()
-        if hvb:
-            quantity = hvb.menge_statisch or Decimal('1')
-            calculated = None
-            length = calculate_hvb_length(config)
-            if length is not None:
-                quantity = length
-                calculated = length * Decimal('1000')
-            elif hvb.menge_formel:
-                calculated_value = calculate_formula(hvb.menge_formel, calc_context)
-                if calculated_value is not None:
-                    quantity = calculated_value / Decimal('1000')
-                    calculated = calculated_value
-            
-            # Use plain artikelbezeichnung without dimension information
-            artikelbezeichnung = hvb.artikelbezeichnung
-            
-            bom_item = BOMItem.objects.create(
-                configuration=config,
-                artikelnummer=format_artikelnummer(hvb.artikelnummer),
-                artikelbezeichnung=artikelbezeichnung,
-                menge=quantity,
-                calculated_quantity=calculated if hvb.menge_formel else None,
-                source_table='HVB'
-            )
-            bom_items.append(bom_item)
-        
-        # Add Sonden items (probe pipes)
-        # Dynamic selection: Match by probe diameter and schachttyp/HVB/bauform/sondenanzahl range
-        # Step 1: Try to find a record that matches ALL criteria (schachttyp, HVB, bauform, sondenanzahl range)
-        # Step 2: Fall back to just probe diameter + schachttyp if no full match
-        sondenanzahl = config.sondenanzahl or 0
-        bauform_raw = str(config.bauform or '').strip()
-        # Normalize bauform: extract just the letter (e.g. "I-Form (einseitig)" -> "I", "U" -> "U")
-        bauform_letter = ''
-        if bauform_raw:
-            bauform_letter = bauform_raw[0].upper() if bauform_raw else ''
-
-        # Try full match first (with HVB and bauform)
-        sonden_candidates = Sondengroesse.objects.filter(
-            durchmesser_sonde=config.sonden_durchmesser,
-            schachttyp__iexact=config.schachttyp,
-            hvb=str(config.hvb_size),
-        )
-        if bauform_letter:
-            bauform_filtered = sonden_candidates.filter(bauform__iexact=bauform_letter)
-            if bauform_filtered.exists():
-                sonden_candidates = bauform_filtered
-            else:
-                # Also try empty bauform
-                sonden_candidates_no_bauform = sonden_candidates.filter(
-                    Q(bauform__isnull=True) | Q(bauform='')
-                )
-                if sonden_candidates_no_bauform.exists():
-                    sonden_candidates = sonden_candidates_no_bauform
-
-        # Find the best match based on sondenanzahl being within the allowed range
-        # Priority: 1) sondenanzahl within range, 2) closest match
-        best_match = None
-        
-        for sonde in sonden_candidates:
-            if not sonde.artikelnummer:
-                continue
-            min_count = sonde.sondenanzahl_min or 0
-            max_count = sonde.sondenanzahl_max or 999999
-            if min_count <= sondenanzahl <= max_count:
-                best_match = sonde
-                break
-            elif best_match is None:
-                best_match = sonde
-
-        # Fallback: if no full match, try with just probe diameter + schachttyp
-        if best_match is None:
-            fallback_candidates = Sondengroesse.objects.filter(
-                durchmesser_sonde=config.sonden_durchmesser,
-                schachttyp__iexact=config.schachttyp,
-            )
-            for sonde in fallback_candidates:
-                if not sonde.artikelnummer:
-                    continue
-                min_count = sonde.sondenanzahl_min or 0
-                max_count = sonde.sondenanzahl_max or 999999
-                if min_count <= sondenanzahl <= max_count:
-                    best_match = sonde
-                    break
-                elif best_match is None:
-                    best_match = sonde
-        
-        # If we found a match, add it to BOM
-        if best_match and best_match.artikelnummer:
-            # Calculate quantities based on Vorlauf/Rücklauf
-            # These are per-sonde lengths, so multiply by sondenanzahl
-            vorlauf_qty = best_match.vorlauf_laenge or Decimal('0')
-            ruecklauf_qty = best_match.ruecklauf_laenge or Decimal('0')
-            
-            # Optional overrides from UI (per-probe lengths in meters)
-            user_vorlauf = data.get('vorlauf_length_per_probe')
-            user_ruecklauf = data.get('ruecklauf_length_per_probe')
-            
-            if user_vorlauf not in (None, '', 'null'):
-                try:
-                    vorlauf_qty = Decimal(str(user_vorlauf))
-                except Exception:
-                    pass
-            
-            if user_ruecklauf not in (None, '', 'null'):
-                try:
-                    ruecklauf_qty = Decimal(str(user_ruecklauf))
-                except Exception:
-                    pass
-            
-            # If no UI override, still allow CSV formulas
-            if best_match.vorlauf_formel and (user_vorlauf in (None, '', 'null')):
-                calculated = calculate_formula(best_match.vorlauf_formel, calc_context)
-                if calculated is not None:
-                    vorlauf_qty = calculated
-            
-            if best_match.ruecklauf_formel and (user_ruecklauf in (None, '', 'null')):
-                calculated = calculate_formula(best_match.ruecklauf_formel, calc_context)
-                if calculated is not None:
-                    ruecklauf_qty = calculated
-            
-            # Multiply by sondenanzahl to get total length for all sonden
-            total_qty = (vorlauf_qty + ruecklauf_qty) * Decimal(str(config.sondenanzahl))
-            print(f"DEBUG Sonden: Artikel={best_match.artikelnummer}, Vorlauf={vorlauf_qty}, Ruecklauf={ruecklauf_qty}, Sondenanzahl={config.sondenanzahl}, Total={total_qty}")
-            
-            if total_qty > 0:
-                bom_item = BOMItem.objects.create(
-                    configuration=config,
-                    artikelnummer=format_artikelnummer(best_match.artikelnummer),
-                    artikelbezeichnung=best_match.artikelbezeichnung,
-                    menge=total_qty,
-                    source_table='Sondengroesse'
-                )
-                print(f"DEBUG BOMItem created: Menge={bom_item.menge}, Type={type(bom_item.menge)}, String={str(bom_item.menge)}")
-                bom_items.append(bom_item)
-        
-        # Fallback: If no match found in Sondengroesse (or match has no artikelnummer), use Sonden-Durchmesser.csv pipe articles
-        if not best_match or not best_match.artikelnummer:
-            from .models import SondenDurchmesserPipe
-            sonden_durchmesser_clean = str(config.sonden_durchmesser or "").strip()
-            if sonden_durchmesser_clean:
-                # Remove 'mm' suffix if present
-                if sonden_durchmesser_clean.lower().endswith('mm'):
-                    sonden_durchmesser_clean = sonden_durchmesser_clean[:-2].strip()
-                
-                pipe = SondenDurchmesserPipe.objects.filter(durchmesser=sonden_durchmesser_clean).first()
-                if pipe and pipe.artikelnummer:
-                    # Calculate quantity: use sondenanzahl * default length per probe
-                    # Default: assume 0.5m per probe (vorlauf + ruecklauf combined)
-                    sondenanzahl = config.sondenanzahl or 0
-                    if sondenanzahl > 0:
-                        default_length_per_probe = Decimal('0.5')  # meters
-                        total_qty = default_length_per_probe * Decimal(str(sondenanzahl))
-                        
-                        if total_qty > 0:
-                            bom_item = BOMItem.objects.create(
-                                configuration=config,
-                                artikelnummer=format_artikelnummer(pipe.artikelnummer),
-                                artikelbezeichnung=pipe.artikelbezeichnung,
-                                menge=total_qty,
-                                source_table='Sonden-Durchmesser'
-                            )
-                            bom_items.append(bom_item)
-        
-        # Handle GN X chamber articles if applicable
-        if config.schachttyp in ['GN X1', 'GN X2', 'GN X3', 'GN X4']:
-            # Build set of valid article numbers from all product tables
-            from .models import Kugelhahn, DFM, Entlueftung, HVBStuetze, Sondenverschlusskappe, StumpfschweissEndkappe
-            
-            valid_artikelnummern = set()
-            valid_artikelnummern.update(
-                Kugelhahn.objects.exclude(artikelnummer__isnull=True)
-                .exclude(artikelnummer='')
-                .values_list('artikelnummer', flat=True)
-            )
-            valid_artikelnummern.update(
-                DFM.objects.exclude(artikelnummer__isnull=True)
-                .exclude(artikelnummer='')
-                .values_list('artikelnummer', flat=True)
-            )
-            valid_artikelnummern.update(
-                Entlueftung.objects.exclude(artikelnummer__isnull=True)
-                .exclude(artikelnummer='')
-                .values_list('artikelnummer', flat=True)
-            )
-            valid_artikelnummern.update(
-                HVBStuetze.objects.exclude(artikelnummer__isnull=True)
-                .exclude(artikelnummer='')
-                .values_list('artikelnummer', flat=True)
-            )
-            valid_artikelnummern.update(
-                Sondenverschlusskappe.objects.exclude(artikelnummer__isnull=True)
-                .exclude(artikelnummer='')
-                .values_list('artikelnummer', flat=True)
-            )
-            valid_artikelnummern.update(
-                StumpfschweissEndkappe.objects.exclude(artikelnummer__isnull=True)
-                .exclude(artikelnummer='')
-                .values_list('artikelnummer', flat=True)
-            )
-            
-            # Normalize article numbers (remove .0 suffix, convert to string)
-            valid_artikelnummern_normalized = set()
-            for num in valid_artikelnummern:
-                if num:
-                    num_str = str(num).replace('.0', '').strip()
-                    if num_str:
-                        valid_artikelnummern_normalized.add(num_str)
-            
-            gnx_articles_data = data.get('gnx_articles', [])
-            for article_data in gnx_articles_data:
-                article_id = article_data.get('id')
-                custom_quantity = Decimal(str(article_data.get('quantity', 1)))
-                
-                try:
-                    gnx_article = GNXChamberArticle.objects.get(id=article_id)
-                    
-                    # Validate article number exists in product data
-                    artikelnummer = str(gnx_article.artikelnummer).replace('.0', '').strip()
-                    if artikelnummer not in valid_artikelnummern_normalized:
-                        # Skip invalid articles - they don't exist in product data
-                        continue
-                    
-                    # Create GN X chamber configuration
-                    GNXChamberConfiguration.objects.create(
-                        bom_configuration=config,
-                        gnx_article=gnx_article,
-                        custom_quantity=custom_quantity
-                    )
-                    
-                    # Add to BOM items
-                    bom_item = BOMItem.objects.create(
-                        configuration=config,
-                        artikelnummer=format_artikelnummer(gnx_article.artikelnummer),
-                        artikelbezeichnung=gnx_article.artikelbezeichnung,
-                        menge=custom_quantity,
-                        source_table='GNXChamberArticle'
-                    )
-                    bom_items.append(bom_item)
-                except GNXChamberArticle.DoesNotExist:
-                    # Skip if article doesn't exist
-                    continue
-        
-        # Use rule-based builders for all configurations
-        additional_components = []
-        # Get custom HVB Stuetze quantities from request
-        hvb_stuetze_quantities = data.get('hvb_stuetze_articles', {})
-        additional_components.extend(bom_rules.build_hvb_stuetze_components(config, hvb_stuetze_quantities))
-        additional_components.extend(bom_rules.build_kugelhahn_components(config, calc_context))
-        additional_components.extend(bom_rules.build_dfm_kugelhahn_components(config, calc_context))
-        additional_components.extend(bom_rules.build_plastic_dfm_components(config, calc_context))
-        additional_components.extend(bom_rules.build_sondenverschlusskappen(config, calc_context))
-        additional_components.extend(bom_rules.build_sondenbeschriftung(config, calc_context))
-        additional_components.extend(bom_rules.build_stumpfschweiss_endkappen(config))
-        additional_components.extend(bom_rules.build_wp_components(config, calc_context))
-        additional_components.extend(bom_rules.build_entlueftung_components(config, calc_context))
-        additional_components.extend(bom_rules.build_manifold_components(config))
-
-        component_map = {}
-        for component in additional_components:
-            # Use both artikelnummer and source_table as key to keep different sources separate
-            # This ensures "Kugelhahn" and "D-Kugelhahn" items are distinguished even if same article
-            source = component.get('source_table', component.get('source', 'Unknown'))
-            key = f"{component['artikelnummer']}::{source}"
-            
-            if key in component_map:
-                component_map[key]['menge'] += component['menge']
-                # Preserve finalized flag if any component is finalized
-                if component.get('is_finalized', False):
-                    component_map[key]['is_finalized'] = True
-            else:
-                component_map[key] = {
-                    'artikelnummer': component['artikelnummer'],
-                    'artikelbezeichnung': component['artikelbezeichnung'],
-                    'menge': component['menge'],
-                    'source_table': source,
-                    'is_finalized': component.get('is_finalized', False)
-                }
-
-        # Ensure certain component groups always appear at the bottom of the BOM (and exports).
-        # This preserves the relative order within each group.
-        bottom_sources = {
-            "HVB Stütze",
-            "Sondenbeschriftung",
-        }
-        components_in_order = list(component_map.values())
-        components_in_order.sort(key=lambda c: (c.get("source_table") in bottom_sources))
-
-        for component in components_in_order:
-            bom_item = BOMItem.objects.create(
-                configuration=config,
-                artikelnummer=format_artikelnummer(component['artikelnummer']),
-                artikelbezeichnung=component['artikelbezeichnung'],
-                menge=component['menge'],
-                source_table=component['source_table']
-            )
-            bom_items.append(bom_item)
-            # Store is_finalized flag for JSON response (we'll add it to bom_data later)
-            bom_item._is_finalized = component.get('is_finalized', False)
-        
-        # Prepare response data
-        bom_data = []
-        for item in bom_items:
-            # Convert Decimal to float for JSON serialization to avoid any scaling issues
-            menge_value = float(item.menge)
-            print(f"DEBUG JSON: Article {item.artikelnummer}, Menge in DB: {item.menge}, Float: {menge_value}, Source: {item.source_table}")
-            
-            # Check if item is finalized
-            is_finalized = False
-            if hasattr(item, '_is_finalized'):
-                is_finalized = item._is_finalized
-            elif item.source_table in ['Schacht', 'HVB', 'HVB Stütze']:
-                # Schacht, HVB, and HVB Stütze are finalized (correct based on selections)
-                is_finalized = True
-            
-            bom_data.append({
-                'artikelnummer': item.artikelnummer,
-                'artikelbezeichnung': item.artikelbezeichnung,
-                'menge': menge_value,  # Use float instead of string to ensure correct serialization
-                'source': item.source_table,
-                'is_finalized': is_finalized
-            })
-        
-        # Sort BOM items: Schacht → (optional) Sondenbeschriftung 2002024 → HVB → Sonden → middle → WP-Rohr/Entlüftung
-        for idx, item in enumerate(bom_data):
-            item['_orig_idx'] = idx
-            item['_sort_key'] = _bom_sort_key(
-                item.get('source', ''),
-                idx,
-                artikelnummer=item.get('artikelnummer'),
-                schachttyp=config.schachttyp,
-            )
-        bom_data.sort(key=lambda item: item['_sort_key'])
-
-        # Ensure these classes are at the end (block ordering):
-        # - GNX (HVB Stütze / GNXChamberArticle) should be directly before the Rohr block.
-        # - Rohr - PE 100-RC (from HVB/Sonden*) should be directly before WP-Rohr (if present),
-        #   otherwise it is the last block.
-        # - WP-Rohr is always the last group.
-        rohr_items = []
-        wp_rohr_items = []
-        gnx_items = []
-        other_items = []
-        for item in bom_data:
-            source = item.get('source', '')
-            bezeichnung = item.get('artikelbezeichnung', '') or ''
-            if source in ['HVB', 'Sondengroesse', 'Sonden-Durchmesser'] and bezeichnung.startswith('Rohr - PE 100-RC'):
-                rohr_items.append(item)
-            elif source == 'WP-Rohr':
-                wp_rohr_items.append(item)
-            elif source in ['HVB Stütze', 'GNXChamberArticle']:
-                gnx_items.append(item)
-            else:
-                other_items.append(item)
-
-        if wp_rohr_items:
-            bom_data = other_items + gnx_items + rohr_items + wp_rohr_items
-        else:
-            bom_data = other_items + gnx_items + rohr_items
-
-        for item in bom_data:
-            item.pop('_orig_idx', None)
-            item.pop('_sort_key', None)
+        config = bom_generation.parse_configuration(data)
+        bom_generation.ensure_article_number_available(config)
+        bom = bom_generation.build_bom_cached(config, data)
+        bom.save()
 
         return JsonResponse({
             'success': True,
             'configuration_id': config.id,
-            'bom_items': bom_data,
+            'bom_items': bom.bom_data(),
             'article_number': config.full_article_number or config.generate_article_number(),
             'message': 'BOM erfolgreich generiert'
         })
         
+    except BOMRequestError as e:
+        return JsonResponse({
+            'success': False,
+            'error': e.error,
+            'message': e.message
+        }, status=e.status)
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -1432,45 +373,99 @@ def generate_bom(request):
         })
 
 
+# Upper bound for the number of configurations in one batch request
+BOM_BATCH_MAX_SIZE = 1000
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def generate_bom_batch(request):
+    """Generate and save BOMs for a list of configurations in one request.
+
+    Body: {"configurations": [<generate-bom payload>, ...],
+           "dry_run": false, "include_items": true}
+    Each result carries the index of its configuration; failing entries are
+    reported individually and do not stop the others.
+    """
+    try:
+        data = json.loads(request.body)
+        entries = data.get('configurations') if isinstance(data, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return JsonResponse({
+                'success': False,
+                'error': 'configurations must be a non-empty list',
+                'message': 'Bitte übergeben Sie eine Liste von Konfigurationen.'
+            }, status=400)
+        if len(entries) > BOM_BATCH_MAX_SIZE:
+            return JsonResponse({
+                'success': False,
+                'error': f'At most {BOM_BATCH_MAX_SIZE} configurations per request',
+                'message': f'Maximal {BOM_BATCH_MAX_SIZE} Konfigurationen pro Anfrage.'
+            }, status=400)
+
+        results, stats = bom_generation.generate_batch(
+            entries,
+            dry_run=bool(data.get('dry_run', False)),
+            include_items=bool(data.get('include_items', True)),
+        )
+        logger.debug(
+            'BOM Batch: %s/%s BOMs in %ss (%s BOMs/s)',
+            stats['succeeded'], stats['count'], stats['seconds'], stats['boms_per_second'],
+        )
+        return JsonResponse({
+            'success': stats['failed'] == 0,
+            'results': results,
+            'stats': stats,
+            'message': f"{stats['succeeded']} von {stats['count']} BOMs erfolgreich generiert"
+        })
+
+    except Exception as e:
+        logger.exception('BOM Batch Error')
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'message': f'Fehler beim Generieren der BOMs: {str(e)}',
+        })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def preview_bom(request):
+    """Compute a BOM like generate_bom without saving anything (dry run)"""
+    data = json.loads(request.body)
+    
+    try:
+        config = bom_generation.parse_configuration(data)
+        bom = bom_generation.build_bom_cached(config, data)
+
+        return JsonResponse({
+            'success': True,
+            'configuration_id': None,
+            'bom_items': bom.bom_data(),
+            'article_number': config.full_article_number or config.generate_article_number(),
+            'message': 'BOM-Vorschau berechnet'
+        })
+        
+    except BOMRequestError as e:
+        return JsonResponse({
+            'success': False,
+            'error': e.error,
+            'message': e.message
+        }, status=e.status)
+    except Exception as e:
+        logger.exception('BOM Preview Error')
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'message': f'Fehler beim Berechnen der BOM-Vorschau: {str(e)}',
+        })
+
+
 def view_configuration(request, config_id):
     """View a specific BOM configuration"""
     config = get_object_or_404(BOMConfiguration, id=config_id)
-    bom_items_qs = list(config.items.all().order_by('id'))
-    # Sort: Schacht → (optional) Sondenbeschriftung 2002024 → HVB → Sonden → middle articles → WP-Rohr/Entlüftung
-    for idx, item in enumerate(bom_items_qs):
-        item._sort_idx = idx
-        item._sort_key = _bom_sort_key(
-            item.source_table,
-            idx,
-            artikelnummer=item.artikelnummer,
-            schachttyp=config.schachttyp,
-        )
-    bom_items_qs.sort(key=lambda item: item._sort_key)
-
-    # Reposition block ordering (same rules as JSON view):
-    # - GNX (HVB Stütze / GNXChamberArticle) should be directly before the Rohr block.
-    # - Rohr - PE 100-RC (from HVB/Sonden*) should be directly before WP-Rohr (if present).
-    # - WP-Rohr is always the last group.
-    rohr_items = []
-    wp_rohr_items = []
-    gnx_items = []
-    other_items = []
-    for item in bom_items_qs:
-        source = item.source_table or ''
-        bezeichnung = item.artikelbezeichnung or ''
-        if source in ['HVB', 'Sondengroesse', 'Sonden-Durchmesser'] and bezeichnung.startswith('Rohr - PE 100-RC'):
-            rohr_items.append(item)
-        elif source == 'WP-Rohr':
-            wp_rohr_items.append(item)
-        elif source in ['HVB Stütze', 'GNXChamberArticle']:
-            gnx_items.append(item)
-        else:
-            other_items.append(item)
-
-    if wp_rohr_items:
-        bom_items_qs = other_items + gnx_items + rohr_items + wp_rohr_items
-    else:
-        bom_items_qs = other_items + gnx_items + rohr_items
+    # Positions are stored at generation time (same display order as the JSON view)
+    bom_items_qs = ordered_bom_items(config.items.order_by('position', 'id'), config.schachttyp)
     gnx_configurations = config.gnxchamberconfiguration_set.all()
     
     context = {
@@ -1482,47 +477,170 @@ def view_configuration(request, config_id):
 
 
 def configuration_list(request):
-    """List all BOM configurations with simple filtering"""
-    base_qs = BOMConfiguration.objects.all().order_by('-created_at')
-    total_configurations = base_qs.count()
-    
-    configurations = base_qs
-    
+    """List BOM configurations with simple filtering, one page at a time"""
     # Basic filters from query parameters
-    name_query = request.GET.get('name', '').strip()
-    schachttyp = request.GET.get('schachttyp', '').strip()
-    hvb_size = request.GET.get('hvb_size', '').strip()
-    article_number = request.GET.get('article_number', '').strip()
-    
-    if name_query:
-        configurations = configurations.filter(name__icontains=name_query)
-    if schachttyp:
-        configurations = configurations.filter(schachttyp__iexact=schachttyp)
-    if hvb_size:
-        configurations = configurations.filter(hvb_size=hvb_size)
-    if article_number:
-        configurations = configurations.filter(
-            Q(full_article_number__icontains=article_number)
-            | Q(mother_article_number__icontains=article_number)
-            | Q(child_article_number__icontains=article_number)
-        )
-    
-    filters_active = any([name_query, schachttyp, hvb_size, article_number])
-    
+    configurations, filters = filter_configurations(request.GET)
+    filters_active = any(filters.values())
+    stats = configuration_stats(configurations)
+
+    cursor = request.GET.get('cursor') or None
+    try:
+        page, next_cursor = paginate_configurations(configurations, cursor)
+    except InvalidCursor:
+        cursor = None
+        page, next_cursor = paginate_configurations(configurations)
+
+    # Page links keep the filters and only replace the cursor
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    first_page_query = params.urlencode()
+    next_page_query = None
+    if next_cursor:
+        params['cursor'] = next_cursor
+        next_page_query = params.urlencode()
+
     context = {
-        'configurations': configurations,
-        'filters': {
-            'name': name_query,
-            'schachttyp': schachttyp,
-            'hvb_size': hvb_size,
-            'article_number': article_number,
-        },
+        'configurations': page,
+        'filters': filters,
         'filters_active': filters_active,
-        'total_configurations': total_configurations,
+        'stats': stats,
+        'is_first_page': cursor is None,
+        'first_page_query': first_page_query,
+        'next_page_query': next_page_query,
     }
     return render(request, 'configurator/configuration_list.html', context)
 
 
+@require_http_methods(["GET"])
+def configurations_api(request):
+    """JSON variant of the configuration list (?cursor=&page_size= plus the list filters)"""
+    configurations, filters = filter_configurations(request.GET)
+    try:
+        page_size = int(request.GET.get('page_size') or PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'page_size muss eine Zahl sein'}, status=400)
+    try:
+        page, next_cursor = paginate_configurations(configurations, request.GET.get('cursor') or None, page_size)
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'configurations': [configuration_summary(config) for config in page],
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'stats': configuration_stats(configurations),
+    })
+
+
+@require_http_methods(["GET"])
+def check_articles(request):
+    """Check article numbers against the article index (?artikelnummer=...&table=..., both repeatable)"""
+    numbers = [number for number in request.GET.getlist('artikelnummer') if number.strip()]
+    if not numbers:
+        return JsonResponse({'success': False, 'error': 'Parameter artikelnummer fehlt'}, status=400)
+    results = articles.validate_articles(numbers, request.GET.getlist('table') or None)
+    return JsonResponse({
+        'success': True,
+        'valid': all(result['valid'] for result in results),
+        'articles': results,
+    })
+
+
+@require_http_methods(["GET"])
+def where_used_api(request):
+    """Configurations containing an article (?artikelnummer=&cursor=&page_size= plus the list filters)"""
+    artikelnummer = (request.GET.get('artikelnummer') or '').strip()
+    if not artikelnummer:
+        return JsonResponse({'success': False, 'error': 'Parameter artikelnummer fehlt'}, status=400)
+    configurations, filters = where_used.where_used_configurations(artikelnummer, request.GET)
+    try:
+        page_size = int(request.GET.get('page_size') or PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'page_size muss eine Zahl sein'}, status=400)
+    try:
+        page, next_cursor = paginate_configurations(configurations, request.GET.get('cursor') or None, page_size)
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    quantities = where_used.quantities_by_configuration(artikelnummer, [config.id for config in page])
+    counts = where_used.where_used_counts(configurations)
+    return JsonResponse({
+        'success': True,
+        'artikelnummer': format_artikelnummer(artikelnummer),
+        'configurations': [
+            {**configuration_summary(config), 'menge': quantities.get(config.id)} for config in page
+        ],
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'total': sum(row['count'] for row in counts['schachttyp']),
+        'counts': counts,
+    })
+
+
+@require_http_methods(["GET"])
+def material_requirements_api(request):
+    """Total quantity per article over the configurations matching the list filters
+
+    Also filters by ?created_from=&created_to= (YYYY-MM-DD); ?format=csv streams a CSV download.
+    """
+    try:
+        configurations, filters = requirements.filter_requirement_configurations(request.GET)
+    except requirements.InvalidDate as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if request.GET.get('format') == 'csv':
+        response = StreamingHttpResponse(
+            requirements.stream_requirements_csv(configurations),
+            content_type=export.CSV_CONTENT_TYPE,
+        )
+        response['Content-Disposition'] = 'attachment; filename="materialbedarf.csv"'
+        return response
+
+    return JsonResponse({
+        'success': True,
+        'filters': filters,
+        'configuration_count': configurations.count(),
+        'articles': [
+            requirements.requirement_summary(row)
+            for row in requirements.material_requirements(configurations).iterator()
+        ],
+    })
+
+
+def _export_response(configurations, filename, multiple, export_format):
+    """Stream configurations as CSV (default) or XLSX attachment."""
+    if export_format == 'xlsx':
+        response = StreamingHttpResponse(
+            export.stream_xlsx(configurations, multiple=multiple),
+            content_type=export.XLSX_CONTENT_TYPE,
+        )
+        filename += '.xlsx'
+    else:
+        response = StreamingHttpResponse(
+            export.stream_csv(configurations, multiple=multiple),
+            content_type=export.CSV_CONTENT_TYPE,
+        )
+        filename += '.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_http_methods(["GET"])
+def export_configuration(request, config_id):
+    """Download the BOM of one configuration (?format=csv|xlsx)"""
+    config = get_object_or_404(BOMConfiguration, id=config_id)
+    configurations = BOMConfiguration.objects.filter(id=config.id)
+    return _export_response(configurations, export.export_name(config), False, request.GET.get('format', 'csv'))
+
+
+@require_http_methods(["GET"])
+def export_configurations(request):
+    """Download the BOMs of all configurations matching the list filters (?format=csv|xlsx)"""
+    configurations, _ = filter_configurations(request.GET)
+    return _export_response(configurations, 'stuecklisten', True, request.GET.get('format', 'csv'))
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def delete_bom_items(request):
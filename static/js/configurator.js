@@ -9,6 +9,70 @@ function isGNXSchachttyp(schachttyp) {
     return ['GN X1', 'GN X2', 'GN X3', 'GN X4'].includes(schachttyp);
 }
 
+// ---- Dependent option lists (one /api/options/ request per selection) ----
+// HVB sizes, probe diameters, distances, DFM/Kugelhahn/WP options, GN X and
+// HVB Stütze articles and probe lengths all come from one batched request.
+// Handlers reacting to the same change share it instead of each calling
+// its own endpoint.
+let optionsRequest = null;
+let optionsRequestKey = null;
+
+function currentOptionsSelection() {
+    return {
+        schachttyp: ($('#schachttyp').val() || configurationData.schachttyp || '').trim(),
+        hvb_size: $('#hvbSize').val() || configurationData.hvb_size || '',
+        sonden_durchmesser: $('#sondenDurchmesser').val() || '',
+        anschlussart: $('#anschlussart').val() || '',
+        bauform: $('#bauform').val() || '',
+        sondenanzahl: $('#sondenanzahl').val() || '',
+        dfm_category: $('#dfmCategory').val() || ''
+    };
+}
+
+function fetchOptions() {
+    const key = JSON.stringify(currentOptionsSelection());
+    if (optionsRequest && optionsRequestKey === key) {
+        return optionsRequest;
+    }
+    const request = $.ajax({
+        url: '/api/options/',
+        method: 'POST',
+        cache: false,
+        data: key,
+        contentType: 'application/json'
+    });
+    request.fail(function() {
+        // Don't keep failed responses around for the next caller
+        if (optionsRequest === request) {
+            optionsRequest = null;
+        }
+    });
+    optionsRequest = request;
+    optionsRequestKey = key;
+    return request;
+}
+
+function requestOptions(section, handlers, extraData) {
+    // extraData: send a one-off request for just this section (e.g. the configuration check)
+    const request = extraData
+        ? $.ajax({
+            url: '/api/options/',
+            method: 'POST',
+            data: JSON.stringify({ ...extraData, sections: [section] }),
+            contentType: 'application/json'
+        })
+        : fetchOptions();
+    request
+        .done(function(response) {
+            handlers.success(response[section] || {});
+        })
+        .fail(function(xhr, status, error) {
+            if (handlers.error) {
+                handlers.error(xhr, status, error);
+            }
+        });
+}
+
 $(document).ready(function() {
     // Merge copy-from data into configurationData early so all restore logic can use it
     if (window.initialConfigurationData && Object.keys(window.initialConfigurationData).length > 0) {
@@ -856,13 +920,7 @@ function updateHvbOptions() {
     
     const currentValue = $hvbSelect.val();
     
-    $.ajax({
-        url: '/api/allowed-hvb-sizes/',
-        method: 'POST',
-        data: JSON.stringify({
-            schachttyp: schachttyp
-        }),
-        contentType: 'application/json',
+    requestOptions('allowed_hvb_sizes', {
         success: function(data) {
             console.log('Allowed HVB sizes response:', data);
             
@@ -965,24 +1023,11 @@ function updateSondenOptions() {
         return;
     }
     
-    // Clean values
-    const cleanSchachttyp = schachttyp.trim();
-    
     // Show loading state
     $('#sondenDurchmesser').html('<option value="">Lade Optionen...</option>');
     
     // Make AJAX request to get Sonden Durchmesser options from CSV
-    $.ajax({
-        url: '/api/sonden-durchmesser-options/',
-        method: 'POST',
-        cache: false,
-        data: JSON.stringify({
-            schachttyp: cleanSchachttyp
-        }),
-        contentType: 'application/json',
-        headers: {
-            'X-Requested-With': 'XMLHttpRequest'
-        },
+    requestOptions('sonden_durchmesser_options', {
         success: function(data) {
             console.log('API success - Sonden Durchmesser options count:', data.sonden_durchmesser_options ? data.sonden_durchmesser_options.length : 0);
             
@@ -1133,13 +1178,7 @@ function updateSondenabstandOptions() {
         return;
     }
     
-    $.ajax({
-        url: '/api/sondenabstand-options/',
-        method: 'POST',
-        data: JSON.stringify({
-            anschlussart: anschlussart
-        }),
-        contentType: 'application/json',
+    requestOptions('sondenabstand_options', {
         success: function(data) {
             let options = '<option value="">Bitte wählen...</option>';
             let standardOption = null;
@@ -1306,13 +1345,7 @@ function handleDFMCategoryChange() {
     // Show loading state
     $('#dfmType').html('<option value="">Lade Optionen...</option>').prop('disabled', false);
     
-    $.ajax({
-        url: '/api/dfm-options/',
-        method: 'POST',
-        data: JSON.stringify({
-            category: category
-        }),
-        contentType: 'application/json',
+    requestOptions('dfm_options', {
         success: function(data) {
             let options = '<option value="">Bitte wählen...</option>';
             
@@ -1353,20 +1386,7 @@ function updateKugelhahnOptions() {
         return;
     }
 
-    const csrftoken = $('[name=csrfmiddlewaretoken]').val();
-
-    $.ajax({
-        url: '/api/kugelhahn-options/',
-        method: 'POST',
-        contentType: 'application/json',
-        headers: {
-            'X-CSRFToken': csrftoken,
-            'X-Requested-With': 'XMLHttpRequest'
-        },
-        data: JSON.stringify({
-            hvb_size: hvbSize,
-            sonden_durchmesser: probeSize
-        }),
+    requestOptions('kugelhahn_options', {
         success: function(response) {
             const options = response.kugelhahn_options || [];
 
@@ -1420,19 +1440,8 @@ function updateSondenanzahlFromSchachtgrenze() {
         return;
     }
     
-    // Get CSRF token
-    const csrftoken = $('[name=csrfmiddlewaretoken]').val();
-    
     // Fetch max sondenanzahl from Schachtgrenze
-    $.ajax({
-        url: '/api/schachtgrenze-info/',
-        method: 'POST',
-        contentType: 'application/json',
-        headers: {
-            'X-CSRFToken': csrftoken,
-            'X-Requested-With': 'XMLHttpRequest'
-        },
-        data: JSON.stringify({ schachttyp: schachttyp }),
+    requestOptions('schachtgrenze_info', {
         success: function(response) {
             console.log('Schachtgrenze response:', response);
             
@@ -1486,17 +1495,7 @@ function updateWPOptions() {
     $wpSelect.html('<option value="">Lade WP-Optionen...</option>');
     $hint.text('');
 
-    const csrftoken = $('[name=csrfmiddlewaretoken]').val();
-
-    $.ajax({
-        url: '/api/wp-options/',
-        method: 'POST',
-        contentType: 'application/json',
-        headers: {
-            'X-CSRFToken': csrftoken,
-            'X-Requested-With': 'XMLHttpRequest'
-        },
-        data: JSON.stringify({ hvb_size: hvbSize }),
+    requestOptions('wp_options', {
         success: function(response) {
             const options = response.wp_options || [];
             let html = '<option value="">Keinen auswählen</option>';
@@ -1581,13 +1580,7 @@ function loadGNXArticles() {
         return;
     }
     
-    $.ajax({
-        url: '/api/gnx-chamber-articles/',
-        method: 'POST',
-        data: JSON.stringify({
-            hvb_size: hvbSize
-        }),
-        contentType: 'application/json',
+    requestOptions('gnx_chamber_articles', {
         success: function(data) {
             gnxArticles = data.articles || [];
             renderGNXArticles();
@@ -1652,13 +1645,7 @@ function loadHVBStuetzeArticles() {
         return;
     }
     
-    $.ajax({
-        url: '/api/hvb-stuetze-articles/',
-        method: 'POST',
-        data: JSON.stringify({
-            hvb_size: hvbSize
-        }),
-        contentType: 'application/json',
+    requestOptions('hvb_stuetze_articles', {
         success: function(data) {
             hvbStuetzeArticles = data.articles || [];
             renderHVBStuetzeArticles();
@@ -1753,16 +1740,7 @@ function loadProbeLengths() {
         return; // Not enough data yet
     }
 
-    $.ajax({
-        url: '/api/probe-lengths/',
-        method: 'POST',
-        data: JSON.stringify({
-            schachttyp: schachttyp,
-            hvb_size: hvbSize,
-            bauform: bauform,
-            sondenanzahl: sondenanzahl
-        }),
-        contentType: 'application/json',
+    requestOptions('probe_lengths', {
         success: function(data) {
             if (!data.found) {
                 console.log('No pre-configured probe lengths found for this combination.');
@@ -1911,11 +1889,7 @@ function checkConfiguration() {
     };
     
     // Check for existing configurations
-    $.ajax({
-        url: '/api/check-configuration/',
-        method: 'POST',
-        data: JSON.stringify(configurationData),
-        contentType: 'application/json',
+    requestOptions('check_configuration', {
         success: function(data) {
             $('#configurationCheck').addClass('d-none');
             $('#articleNumberSection').removeClass('d-none');
@@ -1926,7 +1900,7 @@ function checkConfiguration() {
         error: function() {
             BOMConfigurator.showAlert('Fehler beim Prüfen der Konfiguration.', 'danger');
         }
-    });
+    }, configurationData);
 }
 
 function showConfigurationSummary() {